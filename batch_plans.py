@@ -0,0 +1,241 @@
+"""
+Generate targets and plans for a file of profiles, e.g. a corporate cohort.
+
+Reads one profile per line from a JSONL file:
+
+    {"id": "emp-0001", "gender": "Female", "age": 34, "height_cm": 165, "weight_kg": 62,
+     "goal": "Maintain", "fitness_level": "Beginner", "dietary_preferences": "vegetarian"}
+
+fitness_level (default Intermediate) and dietary_preferences are optional;
+rows without an id are keyed by line number. Every row gets its targets and
+a meal and/or workout plan, generated by the app agents on a bounded
+worker pool. Results are appended to the output JSONL as they finish, one
+line per row:
+
+    {"id": ..., "line": ..., "plans": ["meal", "workout"], "detail": "full",
+     "targets": {...}, "meal_plan": {...}, "workout_plan": {...}}
+
+The output file is the checkpoint: on a re-run, rows already in it with the
+same --plans and --detail are skipped, so a crashed or interrupted run
+resumes where it stopped. Re-running with other options generates every row
+again for those options, appended as new lines. Rows that
+failed (invalid input or a failed generation) are written to
+<output>.errors.jsonl for that run and retried on the next one; plans that
+did succeed for a failed row come from the plan cache then.
+
+Usage:
+    python batch_plans.py profiles.jsonl --output plans.jsonl --workers 8
+    python batch_plans.py profiles.jsonl --output plans.jsonl --plans meal --detail simple
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Literal
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from fitsync.agents import (
+    generate_comprehensive_meal_plan,
+    generate_detailed_workout_plan,
+    generate_meal_plan,
+    generate_workout_plan,
+)
+from fitsync.api import Profile
+from fitsync.llm import api_key_required, create_backend
+from fitsync.schemas import parse_stats
+from fitsync.targets import calculate_targets
+
+load_dotenv()
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 10
+
+
+class BatchProfile(Profile):
+    fitness_level: Literal["Beginner", "Intermediate", "Advanced"] = "Intermediate"
+    dietary_preferences: str = ""
+
+
+def read_profiles(path):
+    """Yield (line number, row id, profile dict or None, error) for every non-empty line."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row_id = f"line-{line_number}"
+            try:
+                row = json.loads(line)
+                if isinstance(row, dict) and "id" in row:
+                    row_id = str(row["id"])
+                yield line_number, row_id, BatchProfile.model_validate(row), None
+            except ValidationError as e:
+                problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors())
+                yield line_number, row_id, None, f"Invalid profile: {problems}"
+            except ValueError as e:
+                yield line_number, row_id, None, f"Invalid JSON: {e}"
+
+
+def row_options(plans, detail):
+    """The options a row was generated with, as written to and resumed from the output."""
+    return {"plans": sorted(set(plans)), "detail": detail}
+
+
+def completed_rows(path):
+    """
+    (row id, plans, detail) of the rows already in the output file. A line
+    cut off by a crash is truncated away so the next result starts on a
+    fresh line.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                done.add((record["id"], tuple(record.get("plans", ())), record.get("detail")))
+            except (ValueError, KeyError, TypeError):
+                # Cut off by a crash, or not a result record at all
+                break
+            good_bytes += len(line)
+    if good_bytes < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+def generate_row(backend, profile, plans, detail):
+    """Targets and plans for one profile. Raises RuntimeError if any plan fails."""
+    targets = calculate_targets(profile.gender, profile.age, profile.height_cm, profile.weight_kg, profile.goal)
+    result = {"targets": targets}
+    if "meal" in plans:
+        if detail == "simple":
+            data, raw = generate_meal_plan(backend, targets, profile.gender, profile.age, profile.goal)
+        else:
+            data, raw = generate_comprehensive_meal_plan(
+                backend, targets, profile.gender, profile.age, profile.goal, profile.dietary_preferences
+            )
+        if data is None:
+            raise RuntimeError(f"meal plan: {raw}")
+        result["meal_plan"] = data
+    if "workout" in plans:
+        if detail == "simple":
+            data, raw = generate_workout_plan(backend, profile.gender, profile.age, profile.goal)
+        else:
+            data, raw = generate_detailed_workout_plan(
+                backend, profile.gender, profile.age, profile.goal, profile.fitness_level
+            )
+        if data is None:
+            raise RuntimeError(f"workout plan: {raw}")
+        result["workout_plan"] = data
+    return result
+
+
+def write_line(f, record):
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file with one profile per line")
+    parser.add_argument("--output", required=True, help="JSONL file results are appended to (and resumed from)")
+    parser.add_argument("--workers", type=int, default=4, help="Rows generated concurrently")
+    parser.add_argument("--plans", nargs="+", default=["meal", "workout"], choices=["meal", "workout"])
+    parser.add_argument("--detail", default="full", choices=["full", "simple"],
+                        help="Chatbot plans with options per meal (full) or app.py's one-screen plans (simple)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key_required() and not api_key:
+        print("❌ ERROR: GEMINI_API_KEY not found in .env file")
+        return 1
+
+    options = row_options(args.plans, args.detail)
+    done_rows = completed_rows(args.output)
+    errors_path = args.output + ".errors.jsonl"
+    rows = []
+    seen = set()
+    skipped = duplicates = 0
+    invalid = []
+    for line_number, row_id, profile, error in read_profiles(args.input):
+        if error:
+            invalid.append({"id": row_id, "line": line_number, "error": error})
+        elif row_id in seen:
+            duplicates += 1
+        elif (row_id, tuple(options["plans"]), options["detail"]) in done_rows:
+            seen.add(row_id)
+            skipped += 1
+        else:
+            seen.add(row_id)
+            rows.append((line_number, row_id, profile))
+
+    print(f"{len(rows)} profiles to generate, {skipped} already done, "
+          f"{len(invalid)} invalid, {duplicates} duplicate ids ignored")
+    backend = create_backend(api_key)
+    ok = 0
+    failures = len(invalid)
+    start = last_report = time.perf_counter()
+
+    with open(args.output, "a", encoding="utf-8") as out, \
+            open(errors_path, "w", encoding="utf-8") as errors, \
+            ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for record in invalid:
+            write_line(errors, record)
+
+        # Keep only a couple of rows queued per worker instead of the whole file
+        queue = iter(rows)
+        pending = {}
+
+        def fill():
+            while len(pending) < args.workers * 2:
+                row = next(queue, None)
+                if row is None:
+                    return
+                pending[executor.submit(generate_row, backend, row[2], args.plans, args.detail)] = row
+
+        fill()
+        try:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    line_number, row_id, _ = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failures += 1
+                        write_line(errors, {"id": row_id, "line": line_number, "error": str(e)})
+                        print(f"❌ {row_id} (line {line_number}): {e}")
+                        continue
+                    ok += 1
+                    write_line(out, {"id": row_id, "line": line_number, **options, **result})
+                fill()
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    os.fsync(out.fileno())
+                    print(f"  {ok + failures - len(invalid)}/{len(rows)} done, "
+                          f"{ok / (now - start):.2f} rows/s, {failures} failed")
+        except KeyboardInterrupt:
+            print("Interrupted, finished rows are saved; re-run the same command to resume")
+            for future in pending:
+                future.cancel()
+            raise SystemExit(130)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Wrote {ok} rows to {args.output} in {elapsed:.1f}s "
+          f"({ok / elapsed if elapsed else 0:.2f} rows/s), {failures} failed")
+    if failures:
+        print(f"Failed rows are in {errors_path}; re-run the same command to retry them")
+    print(f"Fresh responses: {parse_stats()}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+Timing comparison for the "Generate My Plan" flow in app.py.
+
+Runs app.py headlessly with a stubbed Gemini client whose calls sleep for a
+fixed time, then compares the measured wall-clock time against running the
+two agents back to back.
+
+Usage:
+    python benchmarks/bench_agents.py --meal-delay 1.5 --workout-delay 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from unittest import mock
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "app.py"
+
+MEAL_JSON = json.dumps({"meals": [
+    {"meal": "Breakfast", "food": "Oatmeal", "calories": 450, "protein_g": 30, "carbs_g": 55, "fats_g": 10},
+    {"meal": "Lunch", "food": "Chicken rice bowl", "calories": 650, "protein_g": 45, "carbs_g": 70, "fats_g": 15},
+    {"meal": "Snack", "food": "Greek yogurt", "calories": 250, "protein_g": 20, "carbs_g": 20, "fats_g": 6},
+    {"meal": "Dinner", "food": "Salmon and potatoes", "calories": 700, "protein_g": 45, "carbs_g": 60, "fats_g": 25}
+]})
+
+WORKOUT_JSON = json.dumps({"workouts": [
+    {"day": day, "focus": "Full Body", "total_sets": 18, "intensity_score": 7}
+    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+]})
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubAsyncModels:
+    async def generate_content(self, model, contents, config=None):
+        # Delays are read per call because the app caches its client
+        meal_delay, workout_delay = StubClient.delays
+        if "nutritionist" in contents:
+            await asyncio.sleep(meal_delay)
+            return StubResponse(MEAL_JSON)
+        await asyncio.sleep(workout_delay)
+        return StubResponse(WORKOUT_JSON)
+
+
+class StubAio:
+    def __init__(self):
+        self.models = StubAsyncModels()
+
+
+class StubClient:
+    delays = (0.0, 0.0)
+
+    def __init__(self, api_key=None):
+        self.aio = StubAio()
+
+
+def run_once():
+    """Click "Generate My Plan" once and return the elapsed seconds."""
+    at = AppTest.from_file(str(APP_PATH), default_timeout=60)
+    at.run()
+    start = time.perf_counter()
+    at.sidebar.button[0].click().run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meal-delay", type=float, default=1.5, help="Stubbed Nutritionist latency (s)")
+    parser.add_argument("--workout-delay", type=float, default=1.0, help="Stubbed Fitness Coach latency (s)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "stub-key")
+    # Measure dispatch, not the plan cache
+    os.environ["FITSYNC_CACHE_DISABLED"] = "1"
+
+    # Baseline: the script overhead with instant agents
+    StubClient.delays = (0.0, 0.0)
+    with mock.patch("google.genai.Client", StubClient):
+        overhead = min(run_once() for _ in range(args.runs))
+
+        StubClient.delays = (args.meal_delay, args.workout_delay)
+        timings = [run_once() for _ in range(args.runs)]
+
+    measured = min(timings)
+    sequential = overhead + args.meal_delay + args.workout_delay
+    ideal = overhead + max(args.meal_delay, args.workout_delay)
+
+    print("=" * 60)
+    print("AGENT DISPATCH TIMING (stubbed Gemini client)")
+    print("=" * 60)
+    print(f"Nutritionist latency:       {args.meal_delay:.2f}s")
+    print(f"Fitness Coach latency:      {args.workout_delay:.2f}s")
+    print(f"Script overhead:            {overhead:.2f}s")
+    print("-" * 60)
+    print(f"Sequential (sum of calls):  {sequential:.2f}s")
+    print(f"Concurrent (slowest call):  {ideal:.2f}s")
+    print(f"Measured (best of {args.runs}):      {measured:.2f}s")
+    print(f"Speed-up vs sequential:     {sequential / measured:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
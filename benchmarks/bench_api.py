@@ -0,0 +1,154 @@
+"""
+Load test for the HTTP API (fitsync/api.py) against a stubbed backend.
+
+Starts the API in-process on a free port with the replay backend (recorded
+responses from benchmarks/fixtures/cassette.jsonl, served after a sampled
+latency), the plan cache and plan library disabled so every plan request
+reaches the backend. Then drives each endpoint with concurrent keep-alive
+clients for a fixed duration and reports requests/second, latency
+percentiles and status codes.
+
+Usage:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --clients 64 --workers 16 --latency lognormal:0.8,2.5
+    python benchmarks/bench_api.py --url http://localhost:8000   # an already running server
+"""
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PROFILE = {"gender": "Male", "age": 30, "height_cm": 178, "weight_kg": 80, "goal": "Gain Muscle"}
+
+REQUESTS = {
+    "/targets": PROFILE,
+    "/meal-plan": {**PROFILE, "detail": "simple"},
+    "/workout-plan": {"gender": "Female", "age": 42, "goal": "Maintain", "fitness_level": "Beginner"},
+    "/chat": {
+        "message": "What should I eat before a workout?",
+        "profile": PROFILE,
+        "history": [
+            {"role": "user", "text": "How much protein do I need?"},
+            {"role": "assistant", "text": "About 1.6-2.2 g per kg of body weight per day."},
+        ],
+    },
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def client(host, port, path, body, stop_at, latencies, statuses):
+    conn = http.client.HTTPConnection(host, port, timeout=300)
+    payload = json.dumps(body)
+    headers = {"Content-Type": "application/json"}
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, payload, headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            retry_after = response.getheader("Retry-After")
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=300)
+            status = "conn error"
+            retry_after = None
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+        # Back off like a well-behaved client when the server is saturated
+        if retry_after:
+            time.sleep(float(retry_after))
+    conn.close()
+
+
+def load(host, port, path, body, clients, duration):
+    latencies = []
+    statuses = Counter()
+    stop_at = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(host, port, path, body, stop_at, latencies, statuses))
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - start
+
+
+def start_server(args):
+    os.environ["FITSYNC_LLM_BACKEND"] = "replay"
+    os.environ.setdefault("FITSYNC_CASSETTE", str(ROOT / "benchmarks" / "fixtures" / "cassette.jsonl"))
+    os.environ["FITSYNC_REPLAY_LATENCY"] = args.latency
+    os.environ["FITSYNC_CACHE_DISABLED"] = "1"
+    # A path that does not exist, so no plan is served from the library
+    os.environ["FITSYNC_PLAN_LIBRARY"] = str(ROOT / "benchmarks" / "fixtures" / "no_plan_library.json")
+    os.environ["FITSYNC_LLM_CONCURRENCY"] = str(max(args.workers, 16))
+
+    from fitsync.api import create_server
+    from fitsync.llm import create_backend
+
+    server = create_server(create_backend(), "127.0.0.1", 0, args.workers, args.queue, args.timeout)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "127.0.0.1", server.server_port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients per endpoint")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--workers", type=int, default=8, help="API worker pool size")
+    parser.add_argument("--queue", type=int, default=32, help="API queue size")
+    parser.add_argument("--timeout", type=float, default=30.0, help="API request timeout in seconds")
+    parser.add_argument("--latency", default="fixed:0.5", help="stubbed model latency (fixed:S, uniform:A,B, lognormal:P50,P95)")
+    parser.add_argument("--endpoints", nargs="+", default=list(REQUESTS), choices=list(REQUESTS))
+    args = parser.parse_args()
+
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+        setup = f"server {args.url}"
+    else:
+        host, port = start_server(args)
+        setup = (f"in-process server: {args.workers} workers, queue {args.queue}, "
+                 f"timeout {args.timeout:g}s, stub latency {args.latency}")
+
+    print("=" * 88)
+    print(f"HTTP API LOAD TEST ({args.clients} clients x {args.duration:g}s per endpoint)")
+    print(setup)
+    print("=" * 88)
+    print(f"{'endpoint':<15}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    print("-" * 88)
+    for path in args.endpoints:
+        latencies, statuses, elapsed = load(host, port, path, REQUESTS[path], args.clients, args.duration)
+        if not latencies:
+            print(f"{path:<15}{0:>9}")
+            continue
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str))
+        print(f"{path:<15}{len(latencies):>9}{len(latencies) / elapsed:>9.1f}"
+              f"{statistics.median(latencies) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>9.1f}  {summary}")
+    if not args.url:
+        print("(generated endpoints are bounded by workers / stub latency; requests beyond "
+              "workers + queue get 503)")
+
+
+if __name__ == "__main__":
+    main()
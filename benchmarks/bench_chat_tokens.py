@@ -0,0 +1,86 @@
+"""
+Per-turn chat input tokens, before and after multi-turn history.
+
+Plays a scripted conversation through chat_with_ai_stream on the replay
+backend and prints the estimated input tokens of every turn:
+
+    single-turn   the old prompt (profile + question, no history)
+    full history  system prompt plus every earlier message, unbounded
+    sent          what is actually sent: summary + windowed history + question,
+                  plus the system prompt unless it is served from context cache
+
+Usage:
+    python benchmarks/bench_chat_tokens.py --turns 30 --budget 2000
+    python benchmarks/bench_chat_tokens.py --cache-min-tokens 0   # force context caching
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+QUESTIONS = [
+    "What are the best protein sources for muscle gain?",
+    "How much of that should I eat on rest days?",
+    "How do I improve my bench press?",
+    "My left shoulder clicks on the way down, should I worry?",
+    "What should I eat before a workout?",
+    "And after?",
+    "Is creatine worth it?",
+    "How many rest days do I need per week?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=2000, help="History token budget per turn")
+    parser.add_argument("--cache-min-tokens", type=int, help="Override the context caching threshold")
+    args = parser.parse_args()
+
+    os.environ["FITSYNC_LLM_BACKEND"] = "replay"
+    os.environ["FITSYNC_CASSETTE"] = str(ROOT / "benchmarks" / "fixtures" / "cassette.jsonl")
+    os.environ["FITSYNC_CHAT_HISTORY_TOKENS"] = str(args.budget)
+    if args.cache_min_tokens is not None:
+        os.environ["FITSYNC_CHAT_CACHE_MIN_TOKENS"] = str(args.cache_min_tokens)
+
+    from fitsync.agents import chat_with_ai_stream
+    from fitsync.conversation import new_memory
+    from fitsync.llm import create_backend
+    from fitsync.records import ChatMessage
+    from fitsync.targets import calculate_targets
+
+    backend = create_backend()
+    profile = {
+        "gender": "Male", "age": 30, "height_cm": 178, "weight_kg": 80, "goal": "Gain Muscle",
+        "fitness_level": "Intermediate", "dietary_preferences": "",
+        "targets": calculate_targets("Male", 30, 178, 80, "Gain Muscle"),
+    }
+    messages = []
+    memory = new_memory()
+    rows = []
+    for turn in range(args.turns):
+        question = QUESTIONS[turn % len(QUESTIONS)]
+        answer = "".join(chat_with_ai_stream(backend, question, profile, {}, history=messages, memory=memory))
+        messages.append(ChatMessage("user", question))
+        messages.append(ChatMessage("assistant", answer))
+        rows.append(memory["last_turn_tokens"])
+
+    print("=" * 66)
+    print(f"CHAT INPUT TOKENS PER TURN (budget {args.budget}, estimated)")
+    print("=" * 66)
+    print(f"{'turn':>5}{'single-turn':>14}{'full history':>15}{'sent':>10}{'cached':>10}")
+    print("-" * 66)
+    for turn, tokens in enumerate(rows, 1):
+        print(f"{turn:>5}{tokens['single_turn']:>14}{tokens['full_history']:>15}{tokens['sent']:>10}{tokens['cached']:>10}")
+    print("-" * 66)
+    total = {key: sum(row[key] for row in rows) for key in rows[0]}
+    print(f"{'total':>5}{total['single_turn']:>14}{total['full_history']:>15}{total['sent']:>10}{total['cached']:>10}")
+    print(f"Sent vs full history: {total['sent'] / total['full_history']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
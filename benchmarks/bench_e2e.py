@@ -0,0 +1,278 @@
+"""
+End-to-end latency benchmark for app.py and chatbot_app.py.
+
+Drives both apps headlessly with streamlit's AppTest against the replay LLM
+backend (benchmarks/fixtures/cassette.jsonl), so no network or API key is
+needed. For every interaction it reports p50/p95/p99 of:
+
+    rerun    wall-clock time of the script rerun triggered by the interaction
+    parse    time spent parsing model JSON (schema validation and the stream parser)
+    render   time spent in the fitsync.render plan renderers
+
+plus the peak Python memory of each session (measured in a separate pass
+with tracemalloc, which would otherwise slow down the timings).
+
+Results are written as JSON so runs can be compared between versions:
+
+Usage:
+    python benchmarks/bench_e2e.py --sessions 20 --output benchmarks/results/e2e.json
+    python benchmarks/bench_e2e.py --compare benchmarks/results/e2e.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import streamlit  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import fitsync.render  # noqa: E402
+import fitsync.schemas  # noqa: E402
+from fitsync.jsonstream import JSONArrayStreamer  # noqa: E402
+from fitsync.records import ChatMessage, session_memory_report  # noqa: E402
+
+CASSETTE = ROOT / "benchmarks" / "fixtures" / "cassette.jsonl"
+APP_PATH = str(ROOT / "app.py")
+CHATBOT_PATH = str(ROOT / "chatbot_app.py")
+
+RENDERERS = [
+    "render_meal_plan", "render_workout_plan",
+    "display_meal", "display_meal_plan", "display_meal_plan_summary",
+    "display_workout_day", "display_workout_plan", "display_workout_plan_summary",
+    "display_chat_message", "display_chat_message_summary",
+]
+
+
+class Timings:
+    """Accumulates parse and render time for the interaction in progress."""
+
+    def __init__(self):
+        self.current = {"parse": 0.0, "render": 0.0}
+        self._depth = {"parse": 0, "render": 0}
+
+    def reset(self):
+        self.current = {"parse": 0.0, "render": 0.0}
+
+    def wrap(self, category, fn):
+        # Only the outermost call is counted, renderers call each other
+        def timed(*args, **kwargs):
+            self._depth[category] += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._depth[category] -= 1
+                if not self._depth[category]:
+                    self.current[category] += time.perf_counter() - start
+        return timed
+
+
+def instrument(timings):
+    """Patch the parse and render entry points with timing wrappers."""
+    patches = [
+        mock.patch.object(fitsync.schemas, "parse_plan", timings.wrap("parse", fitsync.schemas.parse_plan)),
+        mock.patch.object(JSONArrayStreamer, "feed", timings.wrap("parse", JSONArrayStreamer.feed)),
+    ]
+    for name in RENDERERS:
+        patches.append(mock.patch.object(fitsync.render, name, timings.wrap("render", getattr(fitsync.render, name))))
+    return patches
+
+
+def load_fixture_plans():
+    plans = {}
+    with open(CASSETTE, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["task"] in ("comprehensive_meal_plan", "detailed_workout_plan"):
+                plans[entry["task"]] = json.loads(entry["text"])
+    return plans
+
+
+def long_history(turns, plans):
+    """A chat transcript of the given number of turns, with a meal or workout plan every fifth turn."""
+    messages = []
+    for turn in range(turns):
+        messages.append(ChatMessage("user", f"Question {turn}: how should I adjust my training this week?"))
+        if turn % 10 == 4:
+            messages.append(ChatMessage.with_plan("meal_plan", plans["comprehensive_meal_plan"]))
+        elif turn % 10 == 9:
+            messages.append(ChatMessage.with_plan("workout_plan", plans["detailed_workout_plan"]))
+        else:
+            messages.append(ChatMessage("assistant", "Keep your protein high and progress your lifts gradually. " * 4))
+    return messages
+
+
+def measure(timings, results, name, action):
+    """Run one interaction, recording rerun, parse and render time in ms."""
+    timings.reset()
+    start = time.perf_counter()
+    at = action()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+    sample = results.setdefault(name, {"rerun": [], "parse": [], "render": []})
+    sample["rerun"].append(elapsed * 1000)
+    sample["parse"].append(timings.current["parse"] * 1000)
+    sample["render"].append(timings.current["render"] * 1000)
+
+
+def button(at, label):
+    return next(b for b in at.button if label in b.label)
+
+
+def app_session(timings, results, timeout):
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    measure(timings, results, "app.load", at.run)
+    measure(timings, results, "app.generate", lambda: at.sidebar.button[0].click().run())
+
+
+def chatbot_session(timings, results, timeout, history):
+    at = AppTest.from_file(CHATBOT_PATH, default_timeout=timeout)
+    measure(timings, results, "chatbot.load", at.run)
+    measure(timings, results, "chatbot.profile_save", lambda: at.sidebar.button[0].click().run())
+    measure(timings, results, "chatbot.meal_plan", lambda: button(at, "Meal Plan").click().run())
+    measure(timings, results, "chatbot.workout_plan", lambda: button(at, "Workout Plan").click().run())
+    measure(timings, results, "chatbot.chat_turn", lambda: at.chat_input[0].set_value("What should I eat before a workout?").run())
+    at.session_state["messages"] = history
+    measure(timings, results, "chatbot.rerun_long_history", at.run)
+    return at
+
+
+def percentiles(values):
+    ordered = sorted(values)
+
+    def pick(q):
+        index = min(len(ordered) - 1, max(0, round(q * len(ordered) + 0.5) - 1))
+        return round(ordered[index], 3)
+
+    return {"n": len(ordered), "mean": round(statistics.fmean(ordered), 3),
+            "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def peak_memory(sessions, timeout, history):
+    """Peak traced memory in MB of each app and chatbot session, and the chatbot's session state size."""
+    peaks = {"app": [], "chatbot": []}
+    timings = Timings()
+    state = None
+    for _ in range(sessions):
+        for name, run in (("app", lambda: app_session(timings, {}, timeout)),
+                          ("chatbot", lambda: chatbot_session(timings, {}, timeout, history))):
+            tracemalloc.start()
+            at = run()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks[name].append(peak / 1024 / 1024)
+            if name == "chatbot":
+                state = session_memory_report(at.session_state, ["messages", "chat_memory", "user_profile"])
+    report = {name: {"per_session_mb": [round(p, 2) for p in values], "max_mb": round(max(values), 2)}
+              for name, values in peaks.items()}
+    report["chatbot"]["session_state_kb"] = {key: round(size / 1024, 1) for key, size in state.items()}
+    return report
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print("=" * 78)
+    print(f"END-TO-END BENCHMARK ({report['meta']['sessions']} sessions, latency {report['meta']['latency']})")
+    print("=" * 78)
+    print(f"{'interaction':<30}{'metric':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'vs base':>10}")
+    print("-" * 78)
+    for name, metrics in report["interactions"].items():
+        for metric, stats in metrics.items():
+            delta = ""
+            base = (baseline or {}).get("interactions", {}).get(name, {}).get(metric)
+            if base and base["p50"] > 0:
+                delta = f"{(stats['p50'] / base['p50'] - 1) * 100:+.0f}%"
+            print(f"{name:<30}{metric:<8}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}{delta:>10}")
+    print("-" * 78)
+    for name, memory in report["peak_memory"].items():
+        print(f"Peak memory per {name} session: max {memory['max_mb']:.1f} MB")
+    state = report["peak_memory"]["chatbot"]["session_state_kb"]
+    print(f"Chatbot session state after {report['meta']['history_turns']} turns: {state['total']:.1f} KB "
+          f"(messages {state['messages']:.1f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions per app")
+    parser.add_argument("--memory-sessions", type=int, default=3, help="Sessions per app for the memory pass")
+    parser.add_argument("--history-turns", type=int, default=50, help="Turns in the long-history rerun")
+    parser.add_argument("--latency", default="fixed:0", help="Replay latency spec, e.g. lognormal:0.5,2.0")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results" / "e2e.json"))
+    parser.add_argument("--compare", help="Previous results file to compare p50s against")
+    args = parser.parse_args()
+
+    os.environ["FITSYNC_LLM_BACKEND"] = "replay"
+    os.environ["FITSYNC_CASSETTE"] = str(CASSETTE)
+    os.environ["FITSYNC_REPLAY_LATENCY"] = args.latency
+    # Measure the full generation path, not the plan cache or library
+    os.environ["FITSYNC_CACHE_DISABLED"] = "1"
+    os.environ["FITSYNC_PLAN_LIBRARY"] = str(ROOT / "benchmarks" / "results" / "no-plan-library.json")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    history = long_history(args.history_turns, load_fixture_plans())
+    timings = Timings()
+    results = {}
+    patches = instrument(timings)
+    for patch in patches:
+        patch.start()
+    try:
+        # Warm-up session so imports and the cached backend are not counted
+        app_session(timings, {}, args.timeout)
+        chatbot_session(timings, {}, args.timeout, history)
+        for _ in range(args.sessions):
+            app_session(timings, results, args.timeout)
+            chatbot_session(timings, results, args.timeout, history)
+    finally:
+        for patch in patches:
+            patch.stop()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "sessions": args.sessions,
+            "history_turns": args.history_turns,
+            "latency": args.latency,
+        },
+        "interactions": {name: {metric: percentiles(values) for metric, values in metrics.items()}
+                         for name, metrics in results.items()},
+        "peak_memory": peak_memory(args.memory_sessions, args.timeout, history),
+    }
+
+    print_report(report, baseline)
+    if args.output != args.compare:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Import-time report for the app entry points.
+
+Runs each app once in Streamlit's bare mode (plain `python app.py`, which
+executes the script top to bottom like a first page load) under
+`python -X importtime`, and summarizes where the import time goes. Pass
+--baseline REF to run the same measurement against another git revision
+and show the difference.
+
+Usage:
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --baseline d259c05
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINTS = ["app.py", "chatbot_app.py"]
+HEAVY_MODULES = ["streamlit", "google.genai", "pandas", "altair", "numpy", "pyarrow"]
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(tree, entry_point):
+    """Run one entry point and return (wall seconds, top-level import us, {module: cumulative us})."""
+    env = dict(os.environ, GEMINI_API_KEY="stub-key", FITSYNC_CACHE_DISABLED="1")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", entry_point],
+        cwd=tree, env=env, capture_output=True, text=True, timeout=300
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{entry_point} failed:\n{result.stderr[-2000:]}")
+
+    total = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if len(indent) == 1:
+            total += int(cumulative)
+        modules.setdefault(name, int(cumulative))
+    return wall, total, modules
+
+
+def report(tree, runs):
+    results = {}
+    for entry_point in ENTRY_POINTS:
+        samples = [measure(tree, entry_point) for _ in range(runs)]
+        results[entry_point] = {
+            "wall": statistics.median(s[0] for s in samples),
+            "imports": statistics.median(s[1] for s in samples),
+            "modules": samples[-1][2],
+        }
+    return results
+
+
+def print_report(label, results):
+    print(f"\n{label}")
+    print("-" * 60)
+    for entry_point, result in results.items():
+        print(f"{entry_point:<16} wall {result['wall']:6.2f}s   imports {result['imports'] / 1e6:6.2f}s")
+        for module in HEAVY_MODULES:
+            cumulative = result["modules"].get(module)
+            status = f"{cumulative / 1e3:8.1f} ms" if cumulative is not None else "  not loaded"
+            print(f"    {module:<14}{status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    parser.add_argument("--runs", type=int, default=3, help="runs per entry point (median is reported)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ENTRY POINT IMPORT TIME (python -X importtime, bare mode)")
+    print("=" * 60)
+
+    current = report(REPO_ROOT, args.runs)
+    print_report("Working tree", current)
+
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tree:
+            archive = subprocess.run(
+                ["git", "archive", args.baseline], cwd=REPO_ROOT, capture_output=True, check=True
+            ).stdout
+            subprocess.run(["tar", "-x", "-C", tree], input=archive, check=True)
+            baseline = report(tree, args.runs)
+        print_report(f"Baseline ({args.baseline})", baseline)
+
+        print("\nReduction")
+        print("-" * 60)
+        for entry_point in ENTRY_POINTS:
+            before, after = baseline[entry_point], current[entry_point]
+            print(f"{entry_point:<16} wall {before['wall'] - after['wall']:+6.2f}s   "
+                  f"imports {(before['imports'] - after['imports']) / 1e6:+6.2f}s "
+                  f"({1 - after['imports'] / before['imports']:.0%} less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Latency and failure rate of the comprehensive meal plan, one request vs one
+request per meal slot (FITSYNC_MEAL_FAN_OUT).
+
+Plans are generated on the replay backend (benchmarks/fixtures/cassette.jsonl)
+with the plan cache and plan library off. Replay latency is a base latency
+plus generation time per response token, so a response five times longer
+takes about five times longer to generate, as it does live.
+
+To compare robustness, --corrupt gives every response that probability of
+one broken character (a stray quote somewhere in the text). A broken one-shot
+plan fails as a whole, a broken slot is regenerated on its own.
+
+Usage:
+    python benchmarks/bench_meal_fanout.py
+    python benchmarks/bench_meal_fanout.py --plans 40 --latency lognormal:0.6,1.5 --token-seconds 0.005 --corrupt 0.05
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def make_corrupting_backend(inner, rate, seed):
+    from fitsync.llm import LLMBackend
+
+    class CorruptingBackend(LLMBackend):
+        """Inserts a stray quote into a share of the responses."""
+
+        def __init__(self):
+            self.random = random.Random(seed)
+            self.lock = threading.Lock()
+
+        def corrupt_at(self, length):
+            with self.lock:
+                if self.random.random() >= rate:
+                    return None
+                return self.random.randint(length // 4, length * 3 // 4)
+
+        async def agenerate(self, model, contents, config=None, task=None):
+            response = await inner.agenerate(model, contents, config, task)
+            at = self.corrupt_at(len(response.text))
+            if at is not None:
+                response.text = response.text[:at] + '"' + response.text[at:]
+            return response
+
+        async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+            # Every plan and slot response is well over 12 chunks long
+            at = self.corrupt_at(12)
+            index = 0
+            async for chunk in inner.agenerate_stream(model, contents, config, task):
+                yield chunk[:len(chunk) // 2] + '"' + chunk[len(chunk) // 2:] if index == at else chunk
+                index += 1
+
+    return CorruptingBackend()
+
+
+def run(backend, fan_out, plans, concurrency):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fitsync.agents import stream_comprehensive_meal_plan
+    from fitsync.targets import calculate_targets
+
+    def one_plan(index):
+        # A different profile per plan, so identical requests are not coalesced
+        age = 20 + index % 60
+        targets = calculate_targets("Male", age, 178, 80, "Gain Muscle")
+        start = time.perf_counter()
+        first = None
+        stream = stream_comprehensive_meal_plan(backend, targets, "Male", age, "Gain Muscle", "no shellfish", fan_out)
+        try:
+            while True:
+                next(stream)
+                if first is None:
+                    first = time.perf_counter() - start
+        except StopIteration as done:
+            meal_data, _ = done.value
+        return time.perf_counter() - start, first, meal_data is not None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one_plan, range(plans)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=20, help="plans per mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="plans generated at once")
+    parser.add_argument("--latency", default="lognormal:0.6,1.5", help="base replay latency per request")
+    parser.add_argument("--token-seconds", type=float, default=0.005, help="generation time per response token")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="share of responses with a broken character")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["FITSYNC_LLM_BACKEND"] = "replay"
+    os.environ.setdefault("FITSYNC_CASSETTE", str(ROOT / "benchmarks" / "fixtures" / "cassette.jsonl"))
+    os.environ["FITSYNC_REPLAY_LATENCY"] = args.latency
+    os.environ["FITSYNC_REPLAY_TOKEN_SECONDS"] = str(args.token_seconds)
+    os.environ["FITSYNC_CACHE_DISABLED"] = "1"
+    os.environ["FITSYNC_LOG_LEVEL"] = "off"
+
+    from fitsync.llm import create_backend
+
+    backend = create_backend()
+    if args.corrupt:
+        backend = make_corrupting_backend(backend, args.corrupt, args.seed)
+
+    print("=" * 78)
+    print(f"COMPREHENSIVE MEAL PLAN: ONE REQUEST VS PER-SLOT FAN-OUT ({args.plans} plans each)")
+    print(f"latency {args.latency} + {args.token_seconds * 1000:g} ms/token, "
+          f"{args.concurrency} concurrent plans, corrupt rate {args.corrupt:.0%}")
+    print("=" * 78)
+    print(f"{'mode':<12}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'first meal p50':>16}{'failed':>9}")
+    print("-" * 78)
+    results = {}
+    for name, fan_out in (("one-shot", False), ("fan-out", True)):
+        rows = run(backend, fan_out, args.plans, args.concurrency)
+        totals = [total for total, _, _ in rows]
+        firsts = [first for _, first, _ in rows if first is not None]
+        failed = sum(1 for _, _, ok in rows if not ok)
+        results[name] = statistics.median(totals)
+        print(f"{name:<12}{statistics.median(totals):>8.2f}{percentile(totals, 0.95):>8.2f}{max(totals):>8.2f}"
+              f"{statistics.median(firsts) if firsts else float('nan'):>16.2f}{failed:>9}")
+    print(f"p50 speedup: {results['one-shot'] / results['fan-out']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
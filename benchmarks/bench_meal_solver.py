@@ -0,0 +1,82 @@
+"""
+Latency and target accuracy of the local meal planner (fitsync/mealsolver.py).
+
+Solves the comprehensive meal plan for a grid of profiles (gender x age x
+weight x goal) under a few dietary preferences and reports, per
+preference, the solve time and how far each plan lands from the targets:
+the daily totals (average option of each meal, summed, as in the plan's
+daily_totals) and the worst single option against its meal's share. Meals
+get fewer than 3 options when the table has nothing else close enough.
+
+Usage:
+    python benchmarks/bench_meal_solver.py
+    python benchmarks/bench_meal_solver.py --preferences "" vegan "no dairy, nut allergy"
+"""
+
+import argparse
+import itertools
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PREFERENCES = ["", "vegetarian", "vegan", "pescatarian, gluten-free", "no dairy, nut allergy"]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def profiles():
+    from fitsync.library import GENDERS, GOALS
+    from fitsync.targets import calculate_targets
+
+    for gender, age, weight_kg, goal in itertools.product(GENDERS, (20, 35, 50, 70), (50, 70, 90, 120), GOALS):
+        height_cm = 178 if gender == "Male" else 165
+        yield calculate_targets(gender, age, height_cm, weight_kg, goal)
+
+
+def error(value, target):
+    return abs(value - target) / target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preferences", nargs="+", default=PREFERENCES, help="dietary preferences to solve for")
+    args = parser.parse_args()
+
+    from fitsync.agents import MEAL_SLOTS, daily_totals
+    from fitsync.mealsolver import get_food_table, solve_meals
+
+    get_food_table()
+    grid = list(profiles())
+    print("=" * 100)
+    print(f"LOCAL MEAL PLANNER ({len(grid)} profiles per preference)")
+    print("=" * 100)
+    print(f"{'preferences':<28}{'p50 ms':>8}{'p95 ms':>8}{'kcal err p50':>14}{'kcal err max':>14}"
+          f"{'protein err p50':>17}{'worst option':>14}{'options':>9}")
+    print("-" * 100)
+    for preferences in args.preferences:
+        times, calorie_errors, protein_errors, option_errors = [], [], [], []
+        for targets in grid:
+            start = time.perf_counter()
+            meals = solve_meals(targets, MEAL_SLOTS, preferences)
+            times.append(time.perf_counter() - start)
+            totals = daily_totals(meals)
+            calorie_errors.append(error(totals["total_calories"], targets["daily_calories"]))
+            protein_errors.append(error(totals["total_protein_g"], targets["daily_protein_g"]))
+            for meal, (_, share) in zip(meals, MEAL_SLOTS):
+                for option in meal["options"]:
+                    option_errors.append(error(option["calories"], targets["daily_calories"] * share))
+        print(f"{preferences or '(none)':<28}{statistics.median(times) * 1000:>8.1f}{percentile(times, 0.95) * 1000:>8.1f}"
+              f"{statistics.median(calorie_errors):>14.1%}{max(calorie_errors):>14.1%}"
+              f"{statistics.median(protein_errors):>17.1%}{max(option_errors):>14.1%}"
+              f"{len(option_errors) / len(grid) / len(MEAL_SLOTS):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
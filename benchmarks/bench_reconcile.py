@@ -0,0 +1,100 @@
+"""
+Accuracy and cost of meal plan reconciliation (fitsync/reconcile.py).
+
+Reconciles every comprehensive meal plan in the replay cassette against a
+grid of profiles (gender x age x weight x goal) and reports how far the
+plan's daily totals are from the targets as the model stated them, as its
+foods add up, and after rescaling, plus the time per plan. Foods the table
+cannot read are listed once at the end.
+
+Usage:
+    python benchmarks/bench_reconcile.py
+    python benchmarks/bench_reconcile.py --cassette benchmarks/fixtures/cassette.jsonl
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_CASSETTE = ROOT / "benchmarks" / "fixtures" / "cassette.jsonl"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def profiles():
+    from fitsync.library import GENDERS, GOALS
+    from fitsync.targets import calculate_targets
+
+    for gender, age, weight_kg, goal in itertools.product(GENDERS, (20, 35, 50, 70), (50, 70, 90, 120), GOALS):
+        height_cm = 178 if gender == "Male" else 165
+        yield calculate_targets(gender, age, height_cm, weight_kg, goal)
+
+
+def drift(totals, targets):
+    """Larger relative miss of the calorie and protein targets."""
+    return max(
+        abs(totals["total_calories"] / targets["daily_calories"] - 1),
+        abs(totals["total_protein_g"] / targets["daily_protein_g"] - 1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cassette", default=str(DEFAULT_CASSETTE), help="replay cassette with meal plans")
+    args = parser.parse_args()
+
+    from fitsync.agents import daily_totals
+    from fitsync.foods import get_food_table
+    from fitsync.reconcile import reconcile_meal, reconcile_meal_plan
+
+    plans = []
+    with open(args.cassette, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["task"] == "comprehensive_meal_plan":
+                plans.append(json.loads(entry["text"]))
+    if not plans:
+        sys.exit(f"No comprehensive meal plans in {args.cassette}")
+
+    get_food_table()
+    grid = list(profiles())
+    stated, foods, reconciled, times, unknown = [], [], [], [], set()
+    for plan, targets in itertools.product(plans, grid):
+        meal_data = copy.deepcopy(plan)
+        stated.append(drift(daily_totals(meal_data["meals"]), targets))
+        start = time.perf_counter()
+        for meal in meal_data["meals"]:
+            reconcile_meal(meal)
+        reconcile_meal_plan(meal_data, targets)
+        meal_data["daily_totals"] = daily_totals(meal_data["meals"])
+        times.append(time.perf_counter() - start)
+        foods.append(drift(meal_data["reconciliation"]["food_totals"], targets))
+        reconciled.append(drift(meal_data["daily_totals"], targets))
+        unknown.update(meal_data["reconciliation"]["unknown_foods"])
+
+    print("=" * 80)
+    print(f"MEAL PLAN RECONCILIATION ({len(plans)} plans x {len(grid)} profiles)")
+    print("=" * 80)
+    print(f"{'daily totals':<28}{'drift p50':>12}{'drift p95':>12}{'within 5%':>12}")
+    print("-" * 80)
+    for label, values in (("as stated by the model", stated), ("as the foods add up", foods), ("reconciled", reconciled)):
+        within = sum(value <= 0.05 for value in values) / len(values)
+        print(f"{label:<28}{statistics.median(values):>12.1%}{percentile(values, 0.95):>12.1%}{within:>12.0%}")
+    print("-" * 80)
+    print(f"time per plan: p50 {statistics.median(times) * 1000:.2f} ms, p95 {percentile(times, 0.95) * 1000:.2f} ms")
+    print(f"foods kept as stated: {', '.join(sorted(unknown)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
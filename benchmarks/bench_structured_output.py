@@ -0,0 +1,160 @@
+"""
+Prompt size and parse outcomes for the schema-enforced plan agents.
+
+Prompt size: characters of each plan prompt for a reference profile, plus
+the response schema sent alongside it (Gemini counts the schema as input
+too). Pass --baseline REF to compare against the prompts of another git
+revision, e.g. the one with hand-written JSON examples.
+
+Parse outcomes: every recorded plan response in the replay cassette, plus
+copies broken the way model output typically breaks (wrapped in a code
+fence or prose, trailing commas, cut off mid-response), is parsed with
+plain json.loads and with fitsync.schemas.parse_plan (typed validation with
+the local repair pass). The failure rate is the share that would have
+needed another model call.
+
+Usage:
+    python benchmarks/bench_structured_output.py
+    python benchmarks/bench_structured_output.py --baseline HEAD~1
+"""
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fitsync import prompts  # noqa: E402
+from fitsync.schemas import SCHEMAS, PlanParseError, parse_plan, response_schema  # noqa: E402
+from fitsync.targets import calculate_targets  # noqa: E402
+
+CASSETTE = ROOT / "benchmarks" / "fixtures" / "cassette.jsonl"
+
+
+def build_prompts(module):
+    targets = calculate_targets("Male", 30, 178, 80, "Gain Muscle")
+    return {
+        "meal_plan": module.build_meal_plan_prompt(targets, "Male", 30, "Gain Muscle"),
+        "workout_plan": module.build_workout_plan_prompt("Male", 30, "Gain Muscle"),
+        "comprehensive_meal_plan": module.build_comprehensive_meal_plan_prompt(targets, "Male", 30, "Gain Muscle"),
+        "detailed_workout_plan": module.build_detailed_workout_plan_prompt("Male", 30, "Gain Muscle", "Intermediate"),
+    }
+
+
+def load_baseline_prompts(revision):
+    source = subprocess.run(
+        ["git", "show", f"{revision}:fitsync/prompts.py"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    namespace = {}
+    exec(compile(source, f"{revision}:fitsync/prompts.py", "exec"), namespace)
+    return build_prompts(type("BaselinePrompts", (), {k: staticmethod(v) for k, v in namespace.items() if callable(v)}))
+
+
+def report_prompt_sizes(baseline_revision):
+    current = build_prompts(prompts)
+    baseline = load_baseline_prompts(baseline_revision) if baseline_revision else None
+    print("=" * 78)
+    print("PLAN PROMPT SIZE (characters)")
+    print("=" * 78)
+    header = f"{'kind':<26}{'prompt':>9}{'schema':>9}{'total':>9}"
+    if baseline:
+        header += f"{'baseline':>10}{'prompt':>9}{'total':>8}"
+    print(header)
+    print("-" * 78)
+    for kind, prompt in current.items():
+        schema = len(json.dumps(response_schema(kind), separators=(",", ":")))
+        total = len(prompt) + schema
+        line = f"{kind:<26}{len(prompt):>9}{schema:>9}{total:>9}"
+        if baseline:
+            before = len(baseline[kind])
+            line += f"{before:>10}{(len(prompt) - before) / before:>+9.0%}{(total - before) / before:>+8.0%}"
+        print(line)
+    if baseline:
+        print("(baseline prompts carried their JSON examples inline and sent no schema)")
+
+
+def corrupt(text, rng):
+    """Yield (name, text) copies of a response broken the way model output breaks."""
+    yield "clean", text
+    yield "code fence", f"```json\n{text}\n```"
+    yield "prose around", f"Here is your plan:\n{text}\nLet me know if you want changes!"
+    yield "trailing commas", text.replace("}", ",}").replace("]", ",]")
+    for _ in range(3):
+        yield "truncated", text[:rng.randint(len(text) // 2, len(text) - 1)]
+    # Cut off in the closing brackets only, nothing of the plan lost
+    yield "truncated tail", text.rstrip("}] \n")
+
+
+def best_time(fn, *args, repeat=200):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report_parse_outcomes(seed):
+    rng = random.Random(seed)
+    responses = []
+    with open(CASSETTE, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["task"] in SCHEMAS:
+                responses.append((entry["task"], entry["text"]))
+
+    rows = {}
+    timings = {"json.loads": [], "parse_plan": []}
+    for kind, text in responses:
+        for name, broken in corrupt(text, rng):
+            row = rows.setdefault(name, {"total": 0, "json_failed": 0, "failed": 0, "repaired": 0})
+            row["total"] += 1
+            try:
+                json.loads(broken)
+            except json.JSONDecodeError:
+                row["json_failed"] += 1
+            try:
+                _, repaired = parse_plan(kind, broken)
+                row["repaired"] += repaired
+            except PlanParseError:
+                row["failed"] += 1
+        timings["json.loads"].append(best_time(json.loads, text))
+        timings["parse_plan"].append(best_time(parse_plan, kind, text))
+
+    print()
+    print("=" * 78)
+    print(f"PARSE OUTCOMES ({len(responses)} recorded plans, seed {seed})")
+    print("=" * 78)
+    print(f"{'response':<18}{'count':>7}{'json.loads failed':>20}{'repaired':>10}{'still failed':>14}")
+    print("-" * 78)
+    total = {"total": 0, "json_failed": 0, "failed": 0, "repaired": 0}
+    for name, row in rows.items():
+        print(f"{name:<18}{row['total']:>7}{row['json_failed']:>20}{row['repaired']:>10}{row['failed']:>14}")
+        for key in total:
+            total[key] += row[key]
+    print("-" * 78)
+    print(f"{'all':<18}{total['total']:>7}{total['json_failed']:>20}{total['repaired']:>10}{total['failed']:>14}")
+    print(f"Failure rate: json.loads {total['json_failed'] / total['total']:.0%}, "
+          f"schema + repair {total['failed'] / total['total']:.0%}")
+    print(f"Time per clean plan: json.loads {statistics.mean(timings['json.loads']) * 1e6:.0f} us, "
+          f"parse_plan {statistics.mean(timings['parse_plan']) * 1e6:.0f} us (typed validation included)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="git revision whose prompts to compare against")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the truncation points")
+    args = parser.parse_args()
+
+    report_prompt_sizes(args.baseline)
+    report_parse_outcomes(args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Latency and volume accuracy of the local workout planner (fitsync/workoutgen.py).
+
+Builds the detailed workout plan for every goal x fitness level x age and
+reports, per equipment setup, the build time, how many plans hit every
+muscle group's weekly set target exactly, the sets and estimated minutes of
+the longest training day, and the share of exercises repeated within a
+week.
+
+Usage:
+    python benchmarks/bench_workout_generator.py
+    python benchmarks/bench_workout_generator.py --repeat 200
+"""
+
+import argparse
+import itertools
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Equipment setups: everything, a home gym, no equipment but a bench
+SETUPS = {
+    "full gym": None,
+    "dumbbells + bodyweight": ("dumbbell", "bodyweight", "kettlebell"),
+    "bodyweight only": ("bodyweight",),
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="builds per profile, for the timings")
+    args = parser.parse_args()
+
+    from fitsync.library import FITNESS_LEVELS, GOALS
+    from fitsync.workoutgen import build_workout_plan, get_exercise_library, volume_targets
+
+    library = get_exercise_library()
+    muscle_of = {row["exercise"]: row["muscle"] for row in library.rows}
+    grid = list(itertools.product(GOALS, FITNESS_LEVELS, (25, 60)))
+    print("=" * 96)
+    print(f"LOCAL WORKOUT PLANNER ({len(grid)} profiles per setup)")
+    print("=" * 96)
+    print(f"{'equipment':<26}{'p50 ms':>8}{'p95 ms':>8}{'on target':>11}{'max day sets':>14}"
+          f"{'max day min':>13}{'repeats':>9}{'failed':>8}")
+    print("-" * 96)
+    for setup, equipment in SETUPS.items():
+        times, on_target, day_sets, day_minutes, repeats, failed = [], 0, [], [], [], 0
+        for goal, level, age in grid:
+            try:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    plan = build_workout_plan(goal, level, age, equipment)
+                    times.append(time.perf_counter() - start)
+            except ValueError:
+                failed += 1
+                continue
+            sets = {}
+            names = []
+            for day in plan["weekly_plan"]:
+                day_sets.append(day["total_sets"])
+                day_minutes.append(day["estimated_duration_minutes"])
+                for exercise in day["exercises"]:
+                    muscle = muscle_of[exercise["exercise_name"]]
+                    sets[muscle] = sets.get(muscle, 0) + exercise["sets"]
+                    names.append(exercise["exercise_name"])
+            targets = {muscle: value for muscle, value in volume_targets(goal, level, age).items() if value}
+            on_target += sets == targets
+            repeats.append(1 - len(set(names)) / len(names))
+        if not times:
+            print(f"{setup:<26}{'':>8}{'':>8}{'':>11}{'':>14}{'':>13}{'':>9}{failed:>8}")
+            continue
+        print(f"{setup:<26}{statistics.median(times) * 1000:>8.2f}{percentile(times, 0.95) * 1000:>8.2f}"
+              f"{on_target:>6}/{len(grid) - failed:<4}{max(day_sets):>14}{max(day_minutes):>13}"
+              f"{statistics.mean(repeats):>9.0%}{failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
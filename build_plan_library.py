@@ -0,0 +1,110 @@
+"""
+Pre-generate meal and workout plans for every cell of the common profile grid.
+
+The result is written to the plan library artifact that both apps consult
+before calling Gemini (see fitsync/library.py). Responses go through the plan
+cache, so re-running after a partial failure only pays for the missing cells.
+
+Usage:
+    python build_plan_library.py --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from fitsync.agents import MODEL, json_config
+from fitsync.cache import cached_generate_content
+from fitsync.library import DEFAULT_PATH, LIBRARY_VERSION, MEAL_KINDS, WORKOUT_KINDS, iter_cells
+from fitsync.llm import api_key_required, create_backend
+from fitsync.prompts import (
+    build_comprehensive_meal_plan_prompt,
+    build_detailed_workout_plan_prompt,
+    build_meal_plan_prompt,
+    build_workout_plan_prompt,
+)
+from fitsync.schemas import parse_plan, parse_stats, plan_validator
+
+load_dotenv()
+
+
+def build_prompt(kind, profile):
+    if kind == "meal_plan":
+        return build_meal_plan_prompt(profile["targets"], profile["gender"], profile["age"], profile["goal"])
+    if kind == "comprehensive_meal_plan":
+        return build_comprehensive_meal_plan_prompt(profile["targets"], profile["gender"], profile["age"], profile["goal"])
+    if kind == "workout_plan":
+        return build_workout_plan_prompt(profile["gender"], profile["age"], profile["goal"])
+    return build_detailed_workout_plan_prompt(profile["gender"], profile["age"], profile["goal"], profile["fitness_level"])
+
+
+def generate_cell(backend, kind, profile):
+    raw_json = cached_generate_content(
+        backend,
+        model=MODEL,
+        contents=build_prompt(kind, profile),
+        config=json_config(kind),
+        validate=plan_validator(kind),
+        task=kind
+    )
+    return parse_plan(kind, raw_json)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.getenv("FITSYNC_PLAN_LIBRARY", DEFAULT_PATH))
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Gemini requests")
+    parser.add_argument("--kinds", nargs="+", default=list(MEAL_KINDS + WORKOUT_KINDS),
+                        choices=list(MEAL_KINDS + WORKOUT_KINDS))
+    args = parser.parse_args()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key_required() and not api_key:
+        print("❌ ERROR: GEMINI_API_KEY not found in .env file")
+        return 1
+    backend = create_backend(api_key)
+
+    cells = list(iter_cells(args.kinds))
+    plans = {kind: {} for kind in args.kinds}
+    failures = 0
+    start = time.perf_counter()
+    print(f"Generating {len(cells)} plans with {args.workers} workers...")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(generate_cell, backend, kind, profile): (kind, key, profile)
+            for kind, key, profile in cells
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            kind, key, profile = futures[future]
+            try:
+                plan = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"❌ {kind} {key}: {e}")
+                continue
+            if kind in MEAL_KINDS:
+                plans[kind].setdefault(key, []).append({"targets": profile["targets"], "plan": plan})
+            else:
+                plans[kind][key] = {"plan": plan}
+            if done % 25 == 0:
+                print(f"  {done}/{len(cells)} done")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": LIBRARY_VERSION, "plans": plans}, f)
+    os.replace(tmp_path, args.output)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Wrote {len(cells) - failures} plans to {args.output} in {elapsed:.1f}s ({failures} failed)")
+    print(f"Fresh responses: {parse_stats()}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
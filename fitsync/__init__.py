@@ -0,0 +1,61 @@
+"""
+Shared core for the FitSync Pro apps: target calculator, prompt builders,
+LLM backends, Gemini agents and Streamlit renderers.
+
+Everything is importable from the package root, e.g.
+``from fitsync import calculate_targets``. Submodules are loaded on first
+attribute access, and heavy dependencies (the genai SDK, pandas, altair)
+only when a function that needs them is called.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "calculate_targets": "fitsync.targets",
+    "calculate_targets_arrays": "fitsync.targets",
+    "calculate_targets_frame": "fitsync.targets",
+    "build_chat_prompt": "fitsync.prompts",
+    "build_chat_summary_prompt": "fitsync.prompts",
+    "build_chat_system_prompt": "fitsync.prompts",
+    "build_comprehensive_meal_plan_prompt": "fitsync.prompts",
+    "build_detailed_workout_plan_prompt": "fitsync.prompts",
+    "build_meal_plan_prompt": "fitsync.prompts",
+    "build_workout_plan_prompt": "fitsync.prompts",
+    "create_backend": "fitsync.llm",
+    "generate_meal_plan": "fitsync.agents",
+    "generate_workout_plan": "fitsync.agents",
+    "agenerate_meal_plan": "fitsync.agents",
+    "agenerate_workout_plan": "fitsync.agents",
+    "generate_comprehensive_meal_plan": "fitsync.agents",
+    "generate_detailed_workout_plan": "fitsync.agents",
+    "stream_comprehensive_meal_plan": "fitsync.agents",
+    "stream_detailed_workout_plan": "fitsync.agents",
+    "chat_with_ai": "fitsync.agents",
+    "achat_with_ai": "fitsync.agents",
+    "chat_with_ai_stream": "fitsync.agents",
+    "solve_meals": "fitsync.mealsolver",
+    "build_workout_plan": "fitsync.workoutgen",
+    "render_meal_plan": "fitsync.render",
+    "render_workout_plan": "fitsync.render",
+    "display_meal": "fitsync.render",
+    "display_meal_plan": "fitsync.render",
+    "display_meal_plan_summary": "fitsync.render",
+    "display_workout_day": "fitsync.render",
+    "display_workout_plan": "fitsync.render",
+    "display_workout_plan_summary": "fitsync.render",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'fitsync' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
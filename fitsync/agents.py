@@ -0,0 +1,708 @@
+"""
+Gemini-backed agents shared by app.py and chatbot_app.py.
+
+Every generator takes an LLM backend (see fitsync/llm.py) as its first
+argument. The one-shot agents are coroutines (agenerate_meal_plan,
+agenerate_workout_plan, achat_with_ai) run on the shared event loop, with
+synchronous wrappers of the original names for the Streamlit scripts. The
+genai SDK and the plan schemas (pydantic) are only imported when a backend,
+request config or plan response is first needed, so importing this module
+does not pay for them.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from fitsync.aio import run_sync, submit
+from fitsync.cache import acached_generate_content, cached_generate_content_stream
+from fitsync.conversation import (
+    build_chat_contents,
+    chat_config,
+    contents_tokens,
+    estimate_tokens,
+    new_memory,
+    to_content,
+)
+from fitsync.jsonstream import JSONArrayStreamer, consume_plan_stream, map_plan_stream
+from fitsync.library import find_meal_plan, find_workout_plan
+from fitsync.prompts import (
+    build_chat_prompt,
+    build_chat_system_prompt,
+    build_comprehensive_meal_plan_prompt,
+    build_detailed_workout_plan_prompt,
+    build_meal_option_names_prompt,
+    build_meal_plan_prompt,
+    build_meal_slot_prompt,
+    build_workout_notes_prompt,
+    build_workout_plan_prompt,
+)
+from fitsync.reconcile import reconcile_meal, reconcile_meal_plan, reconcile_simple_meal_plan, reconciliation_enabled
+from fitsync.tracing import get_logger, span
+
+log = get_logger(__name__)
+
+MODEL = "gemini-2.5-flash"
+
+# Meal times of the comprehensive meal plan and their share of the daily targets
+MEAL_SLOTS = (
+    ("Breakfast", 0.22),
+    ("Mid-Morning Snack", 0.12),
+    ("Lunch", 0.28),
+    ("Evening Snack", 0.10),
+    ("Dinner", 0.28),
+)
+# Meals of app.py's one-screen meal plan when it is solved locally
+SIMPLE_MEAL_SLOTS = (
+    ("Breakfast", 0.25),
+    ("Lunch", 0.35),
+    ("Snack", 0.10),
+    ("Dinner", 0.30),
+)
+# Tries per meal slot when its response does not validate
+SLOT_ATTEMPTS = 3
+HYDRATION_TIP = "Drink 3-4 liters of water throughout the day, and an extra 500 ml for every hour of training"
+MEAL_TIMING_TIPS = [
+    "Eat breakfast within 1 hour of waking",
+    "Space meals 3-4 hours apart",
+    "Have your last meal 2-3 hours before bed",
+]
+
+
+def json_config(kind):
+    """Generation config asking Gemini for a JSON response in the schema for kind."""
+    from google.genai import types
+
+    from fitsync.schemas import response_schema
+
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=response_schema(kind)
+    )
+
+
+def local_meal_planner_enabled():
+    """Whether meal plan foods are picked by the local solver instead of the model (FITSYNC_MEAL_PLANNER=local)."""
+    return os.getenv("FITSYNC_MEAL_PLANNER") == "local"
+
+
+def meal_phrasing_enabled():
+    """Whether the model names the options of locally solved meal plans (FITSYNC_MEAL_PHRASING=1)."""
+    return os.getenv("FITSYNC_MEAL_PHRASING") == "1"
+
+
+def local_meal_plan(targets):
+    """app.py's 1-day meal plan from the local solver, as (meal_data, raw_json) or (None, error)."""
+    from fitsync.mealsolver import solve_meals
+
+    try:
+        with span("meal_solver", task="meal_plan"):
+            meals = solve_meals(targets, SIMPLE_MEAL_SLOTS, options=1)
+    except ValueError as e:
+        log.error("❌ Meal plan failed: %s", e)
+        return None, str(e)
+    meal_data = {"meals": []}
+    for meal in meals:
+        option = meal["options"][0]
+        meal_data["meals"].append({
+            "meal": meal["meal_time"],
+            "food": ", ".join(f"{food['item']} ({food['quantity']})" for food in option["foods"]),
+            **{name: option[name] for name in ("calories", "protein_g", "carbs_g", "fats_g")},
+        })
+    return meal_data, json.dumps(meal_data)
+
+
+def reconciled_simple_meal_plan(meal_data, targets, raw_json=None):
+    """app.py's 1-day meal plan checked against its macros and targets, as (meal_data, raw_json)."""
+    if not reconciliation_enabled():
+        return meal_data, raw_json if raw_json is not None else json.dumps(meal_data)
+    with span("reconcile", task="meal_plan"):
+        reconcile_simple_meal_plan(meal_data, targets)
+    return meal_data, json.dumps(meal_data)
+
+
+# Agent 1: Nutritionist
+async def agenerate_meal_plan(backend, targets, gender, age, goal):
+    """Generate a 1-day meal plan using Gemini with structured JSON output."""
+    if local_meal_planner_enabled():
+        # CPU-bound: solved in a worker thread so the shared event loop keeps serving
+        return await asyncio.to_thread(local_meal_plan, targets)
+
+    # Serve from the precomputed plan library when the profile is covered
+    meal_data = find_meal_plan("meal_plan", targets, gender, age, goal)
+    if meal_data is not None:
+        return reconciled_simple_meal_plan(meal_data, targets)
+    
+    from fitsync.schemas import parse_plan, plan_validator
+
+    with span("prompt_build", task="meal_plan") as step:
+        prompt = build_meal_plan_prompt(targets, gender, age, goal)
+        step.set(chars=len(prompt))
+
+    try:
+        raw_json = await acached_generate_content(
+            backend,
+            model=MODEL,
+            contents=prompt,
+            config=json_config("meal_plan"),
+            validate=plan_validator("meal_plan"),
+            task="meal_plan"
+        )
+        
+        with span("parse", task="meal_plan", chars=len(raw_json)):
+            meal_data, _ = parse_plan("meal_plan", raw_json)
+        return reconciled_simple_meal_plan(meal_data, targets, raw_json)
+    except Exception as e:
+        # Runs on the event loop, so the caller reports the error in the UI
+        log.error("❌ Meal plan failed: %s", e)
+        return None, str(e)
+
+
+def generate_meal_plan(backend, targets, gender, age, goal):
+    """Blocking wrapper around agenerate_meal_plan."""
+    return run_sync(agenerate_meal_plan(backend, targets, gender, age, goal))
+
+
+# Agent 2: Fitness Coach
+def local_workout_planner_enabled():
+    """Whether workout plans are built from the local exercise library instead of the model (FITSYNC_WORKOUT_PLANNER=local)."""
+    return os.getenv("FITSYNC_WORKOUT_PLANNER") == "local"
+
+
+def workout_notes_enabled():
+    """Whether the model writes the exercise notes of locally built workout plans (FITSYNC_WORKOUT_NOTES=1)."""
+    return os.getenv("FITSYNC_WORKOUT_NOTES") == "1"
+
+
+def local_workout_plan(age, goal):
+    """app.py's 7-day split from the local workout planner, as (workout_data, raw_json) or (None, error)."""
+    from fitsync.workoutgen import build_workout_plan
+
+    try:
+        with span("workout_generator", task="workout_plan"):
+            plan = build_workout_plan(goal, age=age)
+    except ValueError as e:
+        log.error("❌ Workout plan failed: %s", e)
+        return None, str(e)
+    workout_data = {"workouts": [
+        {name: day[name] for name in ("day", "focus", "total_sets", "intensity_score")}
+        for day in plan["weekly_plan"]
+    ]}
+    return workout_data, json.dumps(workout_data)
+
+
+async def agenerate_workout_plan(backend, gender, age, goal):
+    """Generate a 7-day workout split using Gemini with structured JSON output."""
+    if local_workout_planner_enabled():
+        # Off the shared event loop, like the local meal solver
+        return await asyncio.to_thread(local_workout_plan, age, goal)
+
+    workout_data = find_workout_plan("workout_plan", gender, age, goal)
+    if workout_data is not None:
+        return workout_data, json.dumps(workout_data)
+    
+    from fitsync.schemas import parse_plan, plan_validator
+
+    with span("prompt_build", task="workout_plan") as step:
+        prompt = build_workout_plan_prompt(gender, age, goal)
+        step.set(chars=len(prompt))
+
+    try:
+        raw_json = await acached_generate_content(
+            backend,
+            model=MODEL,
+            contents=prompt,
+            config=json_config("workout_plan"),
+            validate=plan_validator("workout_plan"),
+            task="workout_plan"
+        )
+        
+        with span("parse", task="workout_plan", chars=len(raw_json)):
+            workout_data, _ = parse_plan("workout_plan", raw_json)
+        return workout_data, raw_json
+    except Exception as e:
+        # Runs on the event loop, so the caller reports the error in the UI
+        log.error("❌ Workout plan failed: %s", e)
+        return None, str(e)
+
+
+def generate_workout_plan(backend, gender, age, goal):
+    """Blocking wrapper around agenerate_workout_plan."""
+    return run_sync(agenerate_workout_plan(backend, gender, age, goal))
+
+
+def meal_fan_out_enabled():
+    """Whether comprehensive meal plans are generated one meal slot per request (FITSYNC_MEAL_FAN_OUT=1)."""
+    return os.getenv("FITSYNC_MEAL_FAN_OUT") == "1"
+
+
+async def agenerate_meal_slot(backend, meal_time, slot_targets, gender, age, goal, dietary_preferences=""):
+    """
+    Generate the options for one meal of the comprehensive meal plan.
+
+    A response that does not validate is regenerated, up to SLOT_ATTEMPTS
+    tries, without touching the other slots. Raises PlanParseError after that.
+    """
+    from fitsync.schemas import PlanParseError, parse_plan, plan_validator
+
+    with span("prompt_build", task="meal_slot", meal_time=meal_time) as step:
+        prompt = build_meal_slot_prompt(meal_time, slot_targets, gender, age, goal, dietary_preferences)
+        step.set(chars=len(prompt))
+
+    for attempt in range(1, SLOT_ATTEMPTS + 1):
+        try:
+            raw_json = await acached_generate_content(
+                backend,
+                model=MODEL,
+                contents=prompt,
+                config=json_config("meal_slot"),
+                validate=plan_validator("meal_slot"),
+                task="meal_slot"
+            )
+            with span("parse", task="meal_slot", chars=len(raw_json)):
+                meal, _ = parse_plan("meal_slot", raw_json)
+        except PlanParseError as e:
+            if attempt == SLOT_ATTEMPTS:
+                raise
+            log.warning("🔁 Regenerating %s after an invalid response: %s", meal_time, e)
+            continue
+        # The slot names the meal, whatever the model called it
+        meal["meal_time"] = meal_time
+        return meal
+
+
+def daily_totals(meals):
+    """Daily totals of a meal plan, counting the average option of each meal."""
+    totals = {"calories": 0, "protein_g": 0, "carbs_g": 0, "fats_g": 0}
+    for meal in meals:
+        options = meal.get("options") or []
+        for name in totals:
+            totals[name] += sum(option.get(name, 0) for option in options) / max(len(options), 1)
+    return {f"total_{name}": round(value) for name, value in totals.items()}
+
+
+def stream_meal_slots(backend, targets, gender, age, goal, dietary_preferences=""):
+    """
+    Generate the comprehensive meal plan one meal slot per request, all slots
+    in parallel on the shared event loop, each with its share of the daily
+    targets (MEAL_SLOTS). Yields the meals in order as they complete and
+    returns (meal_data, raw_json) like stream_comprehensive_meal_plan, with
+    the daily totals computed locally.
+    """
+    futures = [
+        submit(agenerate_meal_slot(
+            backend,
+            meal_time,
+            {"calories": round(targets["daily_calories"] * share), "protein_g": round(targets["daily_protein_g"] * share)},
+            gender,
+            age,
+            goal,
+            dietary_preferences
+        ))
+        for meal_time, share in MEAL_SLOTS
+    ]
+    log.info("🔍 Requesting %d meal slots in parallel (model: %s)", len(futures), MODEL)
+
+    from fitsync.schemas import PlanParseError
+
+    meals = []
+    try:
+        for (meal_time, _), future in zip(MEAL_SLOTS, futures):
+            meal = future.result()
+            log.debug("🍽️ Received %s", meal_time)
+            meals.append(meal)
+            yield meal
+    except PlanParseError as e:
+        log.error("❌ JSON parsing error: %s", e)
+        return None, f"JSON Error: {str(e)}"
+    except Exception as e:
+        log.error("❌ API Error: %s", e)
+        return None, str(e)
+    finally:
+        # Stop the remaining slots if one failed or the caller went away. A slot
+        # request other sessions joined keeps running for them (SingleFlight.do_async)
+        for future in futures:
+            future.cancel()
+
+    meal_data = {
+        "meals": meals,
+        "daily_totals": daily_totals(meals),
+        "hydration_tip": HYDRATION_TIP,
+        "meal_timing_tips": list(MEAL_TIMING_TIPS),
+    }
+    log.info("✅ Meal plan assembled from %d slots", len(meals))
+    return meal_data, json.dumps(meal_data)
+
+
+async def aname_meal_options(backend, meals):
+    """
+    Name the options of a locally solved meal plan with the model, in place.
+    Only the names change; if the request fails the solver's names stay.
+    """
+    from fitsync.schemas import parse_plan, plan_validator
+
+    options = [option for meal in meals for option in meal["options"]]
+    with span("prompt_build", task="meal_option_names") as step:
+        prompt = build_meal_option_names_prompt(meals)
+        step.set(chars=len(prompt))
+
+    try:
+        raw_json = await acached_generate_content(
+            backend,
+            model=MODEL,
+            contents=prompt,
+            config=json_config("meal_option_names"),
+            validate=plan_validator("meal_option_names"),
+            task="meal_option_names"
+        )
+        with span("parse", task="meal_option_names", chars=len(raw_json)):
+            names = parse_plan("meal_option_names", raw_json)[0]["option_names"]
+    except Exception as e:
+        log.warning("❌ Keeping the solver's option names: %s", e)
+        return meals
+    if len(names) != len(options):
+        log.warning("❌ Keeping the solver's option names: got %d names for %d options", len(names), len(options))
+        return meals
+    for meal in meals:
+        for number, option in enumerate(meal["options"], 1):
+            option["option_name"] = f"Option {number}: {names.pop(0).strip()}"
+    return meals
+
+
+def stream_local_meal_plan(backend, targets, dietary_preferences="", phrasing=None):
+    """
+    The comprehensive meal plan from the local solver (fitsync/mealsolver.py):
+    foods and quantities picked to hit the targets, in milliseconds and
+    without the model. With phrasing (default: FITSYNC_MEAL_PHRASING) the
+    model then names the options. Yields the meals and returns
+    (meal_data, raw_json) like stream_comprehensive_meal_plan.
+    """
+    from fitsync.mealsolver import solve_meals
+
+    try:
+        with span("meal_solver", task="comprehensive_meal_plan") as step:
+            meals = solve_meals(targets, MEAL_SLOTS, dietary_preferences)
+            step.set(options=sum(len(meal["options"]) for meal in meals))
+    except ValueError as e:
+        log.error("❌ Meal plan failed: %s", e)
+        return None, str(e)
+    if phrasing is None:
+        phrasing = meal_phrasing_enabled()
+    if phrasing:
+        meals = run_sync(aname_meal_options(backend, meals))
+
+    yield from meals
+    meal_data = {
+        "meals": meals,
+        "daily_totals": daily_totals(meals),
+        "hydration_tip": HYDRATION_TIP,
+        "meal_timing_tips": list(MEAL_TIMING_TIPS),
+    }
+    log.info("✅ Meal plan solved locally: %d meals", len(meals))
+    return meal_data, json.dumps(meal_data)
+
+
+# Generate comprehensive meal plan with multiple food options
+def stream_comprehensive_meal_plan(backend, targets, gender, age, goal, dietary_preferences="", fan_out=None):
+    """
+    Generate detailed meal plan with multiple food options per meal.
+
+    Yields each meal as soon as it is complete in the response stream and
+    returns (meal_data, raw_json), or (None, error message) on failure.
+    With fan_out (default: FITSYNC_MEAL_FAN_OUT) every meal is a separate
+    request, see stream_meal_slots. With FITSYNC_MEAL_PLANNER=local the
+    plan is solved locally instead, see stream_local_meal_plan.
+
+    Model-written plans (library, fan-out or one request) are reconciled
+    with their foods (fitsync/reconcile.py) unless FITSYNC_MEAL_RECONCILE=0:
+    every meal is yielded with its options recomputed, and the returned plan
+    is rescaled to the targets when it drifts from them.
+    """
+    if local_meal_planner_enabled():
+        return (yield from stream_local_meal_plan(backend, targets, dietary_preferences))
+
+    if fan_out is None:
+        fan_out = meal_fan_out_enabled()
+    plan_stream = _stream_model_meal_plan(backend, targets, gender, age, goal, dietary_preferences, fan_out)
+    if not reconciliation_enabled():
+        return (yield from plan_stream)
+    meal_data, raw_json = yield from map_plan_stream(plan_stream, reconcile_meal)
+    if meal_data is None:
+        return meal_data, raw_json
+    with span("reconcile", task="comprehensive_meal_plan") as step:
+        # Fan-out plans sum their daily totals locally, the model never states them
+        reconcile_meal_plan(meal_data, targets, stated_totals=not fan_out)
+        meal_data["daily_totals"] = daily_totals(meal_data.get("meals", []))
+        step.set(scaled=meal_data["reconciliation"]["scale"] is not None,
+                 unknown=len(meal_data["reconciliation"]["unknown_foods"]))
+    return meal_data, json.dumps(meal_data)
+
+
+def _stream_model_meal_plan(backend, targets, gender, age, goal, dietary_preferences="", fan_out=None):
+    """The comprehensive meal plan as the plan library or the model writes it."""
+    # Custom dietary preferences are not covered by the precomputed plan library
+    if not dietary_preferences:
+        meal_data = find_meal_plan("comprehensive_meal_plan", targets, gender, age, goal)
+        if meal_data is not None:
+            log.info("⚡ Served meal plan from plan library")
+            yield from meal_data.get("meals", [])
+            return meal_data, json.dumps(meal_data)
+    
+    if fan_out is None:
+        fan_out = meal_fan_out_enabled()
+    if fan_out:
+        return (yield from stream_meal_slots(backend, targets, gender, age, goal, dietary_preferences))
+    
+    from fitsync.schemas import PlanParseError, parse_plan, plan_validator
+
+    with span("prompt_build", task="comprehensive_meal_plan") as step:
+        prompt = build_comprehensive_meal_plan_prompt(targets, gender, age, goal, dietary_preferences)
+        step.set(chars=len(prompt))
+
+    try:
+        log.info("🔍 Streaming meal plan request (model: %s, prompt: %d characters)", MODEL, len(prompt))
+        
+        parser = JSONArrayStreamer("meals")
+        for text in cached_generate_content_stream(
+            backend,
+            model=MODEL,
+            contents=prompt,
+            config=json_config("comprehensive_meal_plan"),
+            validate=plan_validator("comprehensive_meal_plan"),
+            task="comprehensive_meal_plan"
+        ):
+            for meal in parser.feed(text):
+                log.debug("🍽️ Received %s", meal.get("meal_time", "meal"))
+                yield meal
+        
+        raw_json = parser.buffer
+        with span("parse", task="comprehensive_meal_plan", chars=len(raw_json)):
+            meal_data, _ = parse_plan("comprehensive_meal_plan", raw_json)
+        log.info("✅ Meal plan received and validated: %d meals, %d characters",
+                 len(meal_data.get("meals", [])), len(raw_json))
+        # Meals held back from the first one the stream could not parse, in order
+        yield from meal_data.get("meals", [])[parser.streamed:]
+        return meal_data, raw_json
+    except PlanParseError as e:
+        log.error("❌ JSON parsing error: %s", e)
+        log.debug("📄 Raw response: %s...", e.doc[:500])
+        return None, f"JSON Error: {str(e)}"
+    except Exception as e:
+        log.error("❌ API Error: %s", e)
+        return None, str(e)
+
+
+def generate_comprehensive_meal_plan(backend, targets, gender, age, goal, dietary_preferences="", fan_out=None):
+    """Generate detailed meal plan with multiple food options per meal."""
+    return consume_plan_stream(
+        stream_comprehensive_meal_plan(backend, targets, gender, age, goal, dietary_preferences, fan_out)
+    )
+
+
+async def anote_workout_exercises(backend, gender, age, goal, fitness_level, weekly_plan):
+    """
+    Write the notes of a locally built workout plan's exercises with the
+    model, in place. Only the notes change; if the request fails the
+    library's notes stay.
+    """
+    from fitsync.schemas import parse_plan, plan_validator
+
+    exercises = [exercise for day in weekly_plan for exercise in day["exercises"]]
+    with span("prompt_build", task="workout_notes") as step:
+        prompt = build_workout_notes_prompt(gender, age, goal, fitness_level, weekly_plan)
+        step.set(chars=len(prompt))
+
+    try:
+        raw_json = await acached_generate_content(
+            backend,
+            model=MODEL,
+            contents=prompt,
+            config=json_config("workout_notes"),
+            validate=plan_validator("workout_notes"),
+            task="workout_notes"
+        )
+        with span("parse", task="workout_notes", chars=len(raw_json)):
+            notes = parse_plan("workout_notes", raw_json)[0]["exercise_notes"]
+    except Exception as e:
+        log.warning("❌ Keeping the library's exercise notes: %s", e)
+        return weekly_plan
+    if len(notes) != len(exercises):
+        log.warning("❌ Keeping the library's exercise notes: got %d notes for %d exercises", len(notes), len(exercises))
+        return weekly_plan
+    for exercise, note in zip(exercises, notes):
+        exercise["notes"] = note.strip()
+    return weekly_plan
+
+
+def stream_local_workout_plan(backend, gender, age, goal, fitness_level="Intermediate", notes=None):
+    """
+    The detailed workout plan from the local workout planner
+    (fitsync/workoutgen.py): a split template filled from the exercise
+    library to meet weekly set targets, in milliseconds and without the
+    model. With notes (default: FITSYNC_WORKOUT_NOTES) the model then writes
+    the exercise notes. Yields the days and returns (workout_data, raw_json)
+    like stream_detailed_workout_plan.
+    """
+    from fitsync.workoutgen import build_workout_plan
+
+    try:
+        with span("workout_generator", task="detailed_workout_plan") as step:
+            workout_data = build_workout_plan(goal, fitness_level, age)
+            step.set(sets=workout_data["weekly_summary"]["total_sets_per_week"])
+    except ValueError as e:
+        log.error("❌ Workout plan failed: %s", e)
+        return None, str(e)
+    if notes is None:
+        notes = workout_notes_enabled()
+    if notes:
+        run_sync(anote_workout_exercises(backend, gender, age, goal, fitness_level, workout_data["weekly_plan"]))
+
+    yield from workout_data["weekly_plan"]
+    log.info("✅ Workout plan built locally: %d sets per week", workout_data["weekly_summary"]["total_sets_per_week"])
+    return workout_data, json.dumps(workout_data)
+
+
+# Generate detailed workout plan with reps and sets
+def stream_detailed_workout_plan(backend, gender, age, goal, fitness_level="Intermediate"):
+    """
+    Generate comprehensive workout plan with exercises, sets, reps, and rest periods.
+
+    Yields each training day as soon as it is complete in the response stream
+    and returns (workout_data, raw_json), or (None, error message) on failure.
+    With FITSYNC_WORKOUT_PLANNER=local the plan is built locally instead, see
+    stream_local_workout_plan.
+    """
+    if local_workout_planner_enabled():
+        return (yield from stream_local_workout_plan(backend, gender, age, goal, fitness_level))
+
+    workout_data = find_workout_plan("detailed_workout_plan", gender, age, goal, fitness_level)
+    if workout_data is not None:
+        log.info("⚡ Served workout plan from plan library")
+        yield from workout_data.get("weekly_plan", [])
+        return workout_data, json.dumps(workout_data)
+    
+    from fitsync.schemas import PlanParseError, parse_plan, plan_validator
+
+    with span("prompt_build", task="detailed_workout_plan") as step:
+        prompt = build_detailed_workout_plan_prompt(gender, age, goal, fitness_level)
+        step.set(chars=len(prompt))
+
+    try:
+        log.info("🔍 Streaming workout plan request (model: %s, prompt: %d characters)", MODEL, len(prompt))
+        
+        parser = JSONArrayStreamer("weekly_plan")
+        for text in cached_generate_content_stream(
+            backend,
+            model=MODEL,
+            contents=prompt,
+            config=json_config("detailed_workout_plan"),
+            validate=plan_validator("detailed_workout_plan"),
+            task="detailed_workout_plan"
+        ):
+            for day_plan in parser.feed(text):
+                log.debug("📅 Received %s", day_plan.get("day", "day"))
+                yield day_plan
+        
+        raw_json = parser.buffer
+        with span("parse", task="detailed_workout_plan", chars=len(raw_json)):
+            workout_data, _ = parse_plan("detailed_workout_plan", raw_json)
+        log.info("✅ Workout plan received and validated: %d days, %d characters",
+                 len(workout_data.get("weekly_plan", [])), len(raw_json))
+        # Days held back from the first one the stream could not parse, in order
+        yield from workout_data.get("weekly_plan", [])[parser.streamed:]
+        return workout_data, raw_json
+    except PlanParseError as e:
+        log.error("❌ JSON parsing error: %s", e)
+        log.debug("📄 Raw response: %s...", e.doc[:500])
+        return None, f"JSON Error: {str(e)}"
+    except Exception as e:
+        log.error("❌ API Error: %s", e)
+        return None, str(e)
+
+
+def generate_detailed_workout_plan(backend, gender, age, goal, fitness_level="Intermediate"):
+    """Generate comprehensive workout plan with exercises, sets, reps, and rest periods."""
+    return consume_plan_stream(
+        stream_detailed_workout_plan(backend, gender, age, goal, fitness_level)
+    )
+
+
+async def prepare_chat(backend, user_message, user_profile, history=None, memory=None):
+    """
+    Contents and config for one multi-turn chat turn (see fitsync.conversation).
+
+    Estimated input tokens for the turn are stored in memory["last_turn_tokens"]
+    and logged next to what the single-turn prompt and the full history
+    would have cost.
+    """
+    history = history or []
+    memory = memory if memory is not None else new_memory()
+    with span("prompt_build", task="chat", history=len(history)):
+        system_prompt = build_chat_system_prompt(user_profile)
+        contents = await build_chat_contents(backend, MODEL, history, user_message, memory)
+        config, cached = await chat_config(backend, MODEL, system_prompt)
+
+    system_tokens = estimate_tokens(system_prompt)
+    tokens = {
+        "single_turn": estimate_tokens(build_chat_prompt(user_message, user_profile)),
+        "full_history": system_tokens + contents_tokens([to_content(m) for m in history]) + estimate_tokens(user_message),
+        "sent": contents_tokens(contents) + (0 if cached else system_tokens),
+        "cached": system_tokens if cached else 0,
+    }
+    memory["last_turn_tokens"] = tokens
+    log.info("📉 Chat input tokens: ~%d sent, ~%d from cache (single-turn prompt ~%d, full history ~%d)",
+             tokens["sent"], tokens["cached"], tokens["single_turn"], tokens["full_history"])
+    return contents, config
+
+
+# Chat with AI about fitness
+async def achat_with_ai(backend, user_message, user_profile, history=None, memory=None, raise_errors=False):
+    """
+    Chat with AI about fitness, nutrition, and workouts.
+
+    history is the earlier chat messages and memory the session's running
+    summary state, both as kept in st.session_state by chatbot_app.py.
+    A failure is returned as an "Error: ..." reply, or raised with
+    raise_errors (for callers that must tell it apart from an answer).
+    """
+    try:
+        contents, config = await prepare_chat(backend, user_message, user_profile, history, memory)
+        log.info("🤖 Calling Gemini AI (model: %s)", MODEL)
+        response = await backend.agenerate(MODEL, contents, config, task="chat")
+        return response.text
+    except Exception as e:
+        log.error("❌ API Error: %s", e)
+        if raise_errors:
+            raise
+        return f"Error: {str(e)}"
+
+
+def chat_with_ai(backend, user_message, user_profile, history=None, memory=None, raise_errors=False):
+    """Blocking wrapper around achat_with_ai."""
+    return run_sync(achat_with_ai(backend, user_message, user_profile, history, memory, raise_errors))
+
+
+# Stream the chat answer chunk by chunk
+def chat_with_ai_stream(backend, user_message, user_profile, latency, history=None, memory=None):
+    """
+    Yield the AI's answer as text chunks as soon as Gemini produces them.
+
+    Time to first token and total latency (seconds) are written into the
+    latency dict once known. history and memory are as for achat_with_ai.
+    """
+    start = time.perf_counter()
+    try:
+        contents, config = run_sync(prepare_chat(backend, user_message, user_profile, history, memory))
+        log.info("🤖 Streaming chat response (model: %s)", MODEL)
+        for chunk in backend.generate_stream(MODEL, contents, config, task="chat"):
+            if not chunk:
+                continue
+            if "ttft" not in latency:
+                latency["ttft"] = time.perf_counter() - start
+            yield chunk
+    except Exception as e:
+        log.error("❌ API Error: %s", e)
+        yield f"Error: {str(e)}"
+    latency["total"] = time.perf_counter() - start
+    log.info("⏱️ Chat latency: first token %.2fs, total %.2fs", latency.get("ttft", latency["total"]), latency["total"])
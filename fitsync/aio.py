@@ -0,0 +1,75 @@
+"""
+Shared asyncio event loop for LLM calls.
+
+Upstream requests run as coroutines on one event loop per process, owned by
+a daemon thread, instead of each tying up a thread for the whole request.
+A semaphore on that loop bounds how many requests are in flight upstream at
+once. Synchronous code (the Streamlit scripts) calls in through run_sync and
+iterate_sync, or submit for a concurrent.futures.Future.
+
+Configuration (environment variables):
+    FITSYNC_LLM_CONCURRENCY   Max concurrent upstream requests (default: 16)
+"""
+
+import asyncio
+import os
+import threading
+
+_loop = None
+_loop_thread = None
+_semaphore = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the shared event loop, starting its thread on first use."""
+    global _loop, _loop_thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name="fitsync-aio", daemon=True)
+            _loop_thread.start()
+        return _loop
+
+
+def get_semaphore():
+    """Return the semaphore bounding upstream concurrency. Call from the shared loop."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.getenv("FITSYNC_LLM_CONCURRENCY", 16)))
+    return _semaphore
+
+
+def submit(coro):
+    """Schedule coro on the shared loop and return a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run_sync(coro):
+    """Run coro on the shared loop and block until it returns."""
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync called from the shared event loop, await the coroutine instead")
+    return submit(coro).result()
+
+
+async def _next(iterator):
+    try:
+        return False, await iterator.__anext__()
+    except StopAsyncIteration:
+        return True, None
+
+
+def iterate_sync(async_iterable):
+    """Iterate an async iterable from synchronous code, one item at a time."""
+    iterator = async_iterable.__aiter__()
+    finished = False
+    try:
+        while True:
+            finished, item = run_sync(_next(iterator))
+            if finished:
+                return
+            yield item
+    finally:
+        if not finished and hasattr(iterator, "aclose"):
+            run_sync(iterator.aclose())
@@ -0,0 +1,335 @@
+"""
+Headless HTTP API for the target calculator and the agents.
+
+Serves the same code as the Streamlit apps to clients without a browser
+session (mobile apps, batch jobs), as JSON over HTTP:
+
+    GET  /health         {"status": "ok", ...pool stats}
+    POST /targets        profile                      -> calculate_targets()
+    POST /meal-plan      profile, dietary_preferences -> {"targets", "plan"}
+    POST /workout-plan   gender, age, goal, fitness_level -> {"plan"}
+    POST /chat           message, profile, history, memory -> {"reply", "memory"}
+
+A profile is {"gender", "age", "height_cm", "weight_kg", "goal"} with the
+same choices and ranges as the app sidebars. The plan endpoints return the
+chatbot's detailed plans, or app.py's one-screen plans with
+"detail": "simple". Chat is stateless: clients send the full history
+([{"role": "user"|"assistant", "text"}]) and the memory returned by the
+previous turn.
+
+Plans and chat turns run on a bounded worker pool. Once every worker is busy
+and the queue is full, requests are turned away with 503 instead of piling
+up; a request not answered within the timeout gets 504 (a plan still being
+generated then lands in the plan cache, so a retry is usually a hit).
+/targets is computed on the connection thread, so it stays available while
+the pool is saturated.
+
+Usage:
+    python -m fitsync.api --port 8000
+
+Configuration (environment variables, overridden by the flags):
+    FITSYNC_API_HOST      Interface to bind (default: 0.0.0.0)
+    FITSYNC_API_PORT      Port (default: 8000)
+    FITSYNC_API_WORKERS   Worker threads for plans and chat (default: 8)
+    FITSYNC_API_QUEUE     Requests allowed to wait for a worker (default: 32)
+    FITSYNC_API_TIMEOUT   Seconds before a request gets 504 (default: 120)
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from fitsync.agents import (
+    chat_with_ai,
+    generate_comprehensive_meal_plan,
+    generate_detailed_workout_plan,
+    generate_meal_plan,
+    generate_workout_plan,
+)
+from fitsync.conversation import new_memory
+from fitsync.metrics import register_collector
+from fitsync.records import ChatMessage
+from fitsync.targets import calculate_targets
+from fitsync.tracing import get_logger, span
+
+log = get_logger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+# Idle keep-alive connections are closed after this many seconds
+READ_TIMEOUT = 30
+# Seconds a client turned away with 503 is asked to wait
+RETRY_AFTER = 1
+
+
+# Request bodies, with the choices and ranges of the app sidebars
+class Person(BaseModel):
+    gender: Literal["Male", "Female"]
+    age: int = Field(ge=15, le=100)
+    goal: Literal["Lose Weight", "Maintain", "Gain Muscle"]
+
+
+class Profile(Person):
+    height_cm: float = Field(ge=120, le=250)
+    weight_kg: float = Field(ge=30, le=200)
+
+
+class MealPlanRequest(Profile):
+    dietary_preferences: str = ""
+    detail: Literal["full", "simple"] = "full"
+
+
+class WorkoutPlanRequest(Person):
+    fitness_level: Literal["Beginner", "Intermediate", "Advanced"] = "Intermediate"
+    detail: Literal["full", "simple"] = "full"
+
+
+class ChatTurn(BaseModel):
+    role: Literal["user", "assistant"]
+    text: str
+
+
+class ChatMemory(BaseModel):
+    summary: str = ""
+    summarized: int = Field(default=0, ge=0)
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(min_length=1)
+    profile: Optional[Profile] = None
+    history: list[ChatTurn] = []
+    memory: Optional[ChatMemory] = None
+
+
+def profile_targets(profile):
+    return calculate_targets(profile.gender, profile.age, profile.height_cm, profile.weight_kg, profile.goal)
+
+
+def handle_targets(backend, request):
+    return 200, profile_targets(request)
+
+
+def handle_meal_plan(backend, request):
+    targets = profile_targets(request)
+    if request.detail == "simple":
+        data, raw = generate_meal_plan(backend, targets, request.gender, request.age, request.goal)
+    else:
+        data, raw = generate_comprehensive_meal_plan(
+            backend, targets, request.gender, request.age, request.goal, request.dietary_preferences
+        )
+    if data is None:
+        return 502, {"error": raw}
+    return 200, {"targets": targets, "plan": data}
+
+
+def handle_workout_plan(backend, request):
+    if request.detail == "simple":
+        data, raw = generate_workout_plan(backend, request.gender, request.age, request.goal)
+    else:
+        data, raw = generate_detailed_workout_plan(
+            backend, request.gender, request.age, request.goal, request.fitness_level
+        )
+    if data is None:
+        return 502, {"error": raw}
+    return 200, {"plan": data}
+
+
+def handle_chat(backend, request):
+    profile = None
+    if request.profile:
+        profile = request.profile.model_dump()
+        profile["targets"] = profile_targets(request.profile)
+    history = [ChatMessage(turn.role, turn.text) for turn in request.history]
+    memory = request.memory.model_dump() if request.memory else new_memory()
+    try:
+        reply = chat_with_ai(backend, request.message, profile, history, memory, raise_errors=True)
+    except Exception as e:
+        return 502, {"error": str(e)}
+    return 200, {"reply": reply, "memory": memory}
+
+
+# path: (request model, handler, runs on the worker pool)
+ROUTES = {
+    "/targets": (Profile, handle_targets, False),
+    "/meal-plan": (MealPlanRequest, handle_meal_plan, True),
+    "/workout-plan": (WorkoutPlanRequest, handle_workout_plan, True),
+    "/chat": (ChatRequest, handle_chat, True),
+}
+
+
+class PlanService:
+    """Runs handlers on a bounded worker pool with a per-request timeout."""
+
+    def __init__(self, backend, workers=8, queue_size=32, timeout=120.0):
+        self.backend = backend
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fitsync-api")
+        # One slot per running or queued request
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "rejected": 0, "timed_out": 0, "errors": 0}
+        self._pending = 0
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def run(self, handler, request, pooled=True):
+        """Return (HTTP status, JSON payload) for one validated request."""
+        self._count("requests")
+        if not pooled:
+            return handler(self.backend, request)
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            return 503, {"error": "Server busy, retry later"}
+        with self._lock:
+            self._pending += 1
+        # Run in the caller's context so the handler's spans nest under the request span
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, handler, self.backend, request)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Dropped if still queued, otherwise left to finish into the plan cache
+            future.cancel()
+            self._count("timed_out")
+            return 504, {"error": f"Request timed out after {self.timeout:g}s"}
+        except Exception as e:
+            self._count("errors")
+            log.error("❌ API handler failed: %s", e)
+            return 500, {"error": str(e)}
+
+    def stats(self):
+        """Return request counters and how many requests are running or queued."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = self._pending
+        stats["workers"] = self.workers
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = READ_TIMEOUT
+    # Headers and body go out in separate writes, don't let them wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", str(RETRY_AFTER))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        header = self.headers.get("Content-Length") or "0"
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            if length > MAX_BODY_BYTES:
+                raise ValueError(f"Request body over {MAX_BODY_BYTES} bytes")
+            raise ValueError(f"Invalid Content-Length {header!r}")
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/health":
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        self._send(200, {"status": "ok", **self.server.service.stats()})
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        route = ROUTES.get(path)
+        with span("api_request", path=path) as step:
+            try:
+                # Read the body first, even for a 404, so the connection can be reused
+                body = self._read_json()
+                if route is None:
+                    status, payload = 404, {"error": f"Unknown endpoint {path}"}
+                else:
+                    model, handler, pooled = route
+                    status, payload = self.server.service.run(handler, model.model_validate(body), pooled)
+            except ValidationError as e:
+                status, payload = 400, {"error": "Invalid request", "details": e.errors(include_url=False, include_context=False)}
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            step.set(status=status)
+        self._send(status, payload)
+
+    def log_message(self, format, *args):
+        log.debug("🌐 %s %s", self.address_string(), format % args)
+
+
+class APIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for bursts of new connections (the default backlog is 5)
+    request_queue_size = 128
+
+    def __init__(self, address, service):
+        super().__init__(address, _APIHandler)
+        self.service = service
+
+
+def create_server(backend, host="0.0.0.0", port=8000, workers=8, queue_size=32, timeout=120.0):
+    """An APIServer bound to host:port; call serve_forever() to start it. Port 0 picks a free port."""
+    service = PlanService(backend, workers, queue_size, timeout)
+    register_collector("api", service.stats, counters=("requests", "rejected", "timed_out", "errors"))
+    return APIServer((host, port), service)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FitSync Pro HTTP API")
+    parser.add_argument("--host", default=os.getenv("FITSYNC_API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("FITSYNC_API_PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("FITSYNC_API_WORKERS", 8)))
+    parser.add_argument("--queue", type=int, default=int(os.getenv("FITSYNC_API_QUEUE", 32)))
+    parser.add_argument("--timeout", type=float, default=float(os.getenv("FITSYNC_API_TIMEOUT", 120)))
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    from fitsync.llm import api_key_required, create_backend
+
+    load_dotenv()
+    if api_key_required() and not os.getenv("GEMINI_API_KEY"):
+        parser.error("GEMINI_API_KEY not found. Please set it in your .env file.")
+    server = create_server(
+        create_backend(os.getenv("GEMINI_API_KEY")), args.host, args.port, args.workers, args.queue, args.timeout
+    )
+    print(f"Serving FitSync API on http://{args.host}:{server.server_port} "
+          f"({args.workers} workers, queue {args.queue}, timeout {args.timeout:g}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Persistent, content-addressed cache for Gemini plan responses.
+
+Responses are stored in a SQLite database in WAL mode so several Streamlit
+processes on the same host can read and write it at once. Entries are keyed
+by a hash of the model name, prompt and generation config, expire after a
+TTL and are evicted least-recently-used once the cache grows past its size
+limit.
+
+Configuration (environment variables):
+    FITSYNC_CACHE_PATH        Database file (default: ~/.cache/fitsync/plan_cache.sqlite3)
+    FITSYNC_CACHE_TTL         Entry lifetime in seconds (default: 7 days)
+    FITSYNC_CACHE_MAX_BYTES   Total size of cached responses (default: 256 MB)
+    FITSYNC_CACHE_DISABLED    Set to 1 to bypass the cache entirely
+
+Inspect or reset the shared cache with:
+    python -m fitsync.cache stats
+    python -m fitsync.cache clear
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from fitsync.metrics import record_cache_lookup, register_collector
+from fitsync.singleflight import get_single_flight
+from fitsync.tracing import get_logger
+
+log = get_logger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "fitsync", "plan_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Seconds to wait for the write lock: writes, and the LRU/counter update after a read
+LOCK_TIMEOUT = 30
+BOOKKEEPING_TIMEOUT = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+
+def make_key(model, contents, config=None):
+    """Hash the model name, prompt (text or a list of chat contents) and config into a cache key."""
+    if not isinstance(contents, str):
+        contents = json.dumps(contents, sort_keys=True, default=str)
+    if config is None:
+        config_repr = ""
+    elif hasattr(config, "model_dump_json"):
+        config_repr = config.model_dump_json(exclude_none=True)
+    else:
+        config_repr = json.dumps(config, sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    for part in (model, contents, config_repr):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class PlanCache:
+    """SQLite-backed response cache with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, path=DEFAULT_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None on a miss. The lookup takes
+        no write lock, only the LRU and counter update after it does. A
+        database error (locked, corrupt) is logged and treated as a miss.
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.warning("⚠️ Plan cache read failed, treating as a miss: %s", e)
+            return None
+        expired = row is not None and now - row[1] > self.ttl_seconds
+        if expired:
+            row = None
+        try:
+            # A busy database skips the update rather than holding up the read
+            conn.execute(f"PRAGMA busy_timeout = {BOOKKEEPING_TIMEOUT * 1000}")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if expired:
+                    # Unless another process refreshed it in the meantime
+                    conn.execute("DELETE FROM entries WHERE key = ? AND created_at < ?", (key, now - self.ttl_seconds))
+                if row is None:
+                    conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'misses'")
+                else:
+                    conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                    conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Only the LRU order and the counters are lost
+            log.warning("⚠️ Plan cache bookkeeping failed: %s", e)
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {LOCK_TIMEOUT * 1000}")
+        return None if row is None else row[0]
+
+    def set(self, key, value):
+        """Store value under key and evict old entries if over the size limit."""
+        conn = self._connect()
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn, now):
+        evicted = conn.execute(
+            "DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        if evicted:
+            conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = 'evictions'", (evicted,)
+            )
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size, shared by all processes."""
+        conn = self._connect()
+        stats = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "entries": entries,
+            "bytes": total,
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        })
+        return stats
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        conn = self._connect()
+        conn.execute("DELETE FROM entries")
+        conn.execute("UPDATE counters SET value = 0")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_plan_cache():
+    """Return the process-wide PlanCache, or None when caching is disabled."""
+    global _cache
+    if os.getenv("FITSYNC_CACHE_DISABLED") == "1":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = PlanCache(
+                path=os.getenv("FITSYNC_CACHE_PATH", DEFAULT_PATH),
+                ttl_seconds=float(os.getenv("FITSYNC_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                max_bytes=int(os.getenv("FITSYNC_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            )
+            # Shared by every process using the database, not just this one
+            register_collector("plan_cache", _cache.stats)
+        return _cache
+
+
+def cached_generate_content(backend, model, contents, config=None, validate=None, task=None):
+    """
+    Return the response text for a model request, serving it from the cache when possible.
+
+    If validate is given it is called with the fresh response text, and the
+    response is only cached when it does not raise (so malformed JSON is never
+    stored). validate may return a cleaned-up text (e.g. repaired JSON), which
+    is cached and returned instead. Concurrent misses for the same request
+    share one upstream call.
+    """
+    cache = get_plan_cache()
+    key = make_key(model, contents, config)
+    if cache:
+        cached = cache.get(key)
+        record_cache_lookup(task, cached is not None)
+        if cached is not None:
+            return cached
+
+    def fetch():
+        text = backend.generate(model, contents, config, task).text
+        if validate is not None:
+            text = validate(text) or text
+        if cache:
+            cache.set(key, text)
+        return text
+
+    return get_single_flight().do(key, fetch)
+
+
+async def acached_generate_content(backend, model, contents, config=None, validate=None, task=None):
+    """
+    Async version of cached_generate_content, for coroutines on the shared event loop.
+
+    The SQLite reads and writes run in a worker thread so a slow disk does not
+    stall every other request on the loop.
+    """
+    cache = get_plan_cache()
+    key = make_key(model, contents, config)
+    if cache:
+        cached = await asyncio.to_thread(cache.get, key)
+        record_cache_lookup(task, cached is not None)
+        if cached is not None:
+            return cached
+
+    async def fetch():
+        text = (await backend.agenerate(model, contents, config, task)).text
+        if validate is not None:
+            text = validate(text) or text
+        if cache:
+            await asyncio.to_thread(cache.set, key, text)
+        return text
+
+    return await get_single_flight().do_async(key, fetch)
+
+
+def cached_generate_content_stream(backend, model, contents, config=None, validate=None, task=None):
+    """
+    Yield the response text for a model request chunk by chunk.
+
+    A cache hit is yielded as a single chunk. A fresh response is streamed
+    from the backend as is and cached once complete, subject to validate as
+    in cached_generate_content (the cleaned-up text is what gets cached). Concurrent misses for the same request follow
+    one upstream stream.
+    """
+    cache = get_plan_cache()
+    key = make_key(model, contents, config)
+    if cache:
+        cached = cache.get(key)
+        record_cache_lookup(task, cached is not None)
+        if cached is not None:
+            yield cached
+            return
+
+    def fetch():
+        chunks = []
+        for chunk in backend.generate_stream(model, contents, config, task):
+            chunks.append(chunk)
+            yield chunk
+        text = "".join(chunks)
+        if validate is not None:
+            text = validate(text) or text
+        if cache:
+            cache.set(key, text)
+
+    yield from get_single_flight().stream(key, fetch)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = get_plan_cache()
+    if cache is None:
+        print("Plan cache is disabled (FITSYNC_CACHE_DISABLED=1)")
+    elif command == "clear":
+        cache.clear()
+        print(f"Cleared plan cache at {cache.path}")
+    else:
+        print(f"Plan cache: {cache.path}")
+        for name, value in cache.stats().items():
+            print(f"  {name}: {value}")
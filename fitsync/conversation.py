@@ -0,0 +1,162 @@
+"""
+Token-budgeted multi-turn chat history.
+
+Each chat turn sends the most recent messages that fit in a token budget,
+preceded by a running summary of everything older, instead of only the
+current question. The static system prompt (persona plus profile) goes in
+the request config: as Gemini cached content when it is long enough to be
+cached, otherwise as a plain system instruction, so it is never part of
+the per-turn contents. The helpers are coroutines for the shared event
+loop (see fitsync.aio).
+
+history is a list of fitsync.records.ChatMessage. The running summary
+lives in a memory dict the caller keeps per session
+(st.session_state.chat_memory in chatbot_app.py):
+
+    {"summary": str, "summarized": number of messages folded into it}
+
+Configuration (environment variables):
+    FITSYNC_CHAT_HISTORY_TOKENS   Budget for history sent per turn (default: 2000)
+    FITSYNC_CHAT_CACHE_TTL        Lifetime of cached system prompts, seconds (default: 3600)
+    FITSYNC_CHAT_CACHE_MIN_TOKENS Smallest system prompt worth caching (default: 1024,
+                                  Gemini's minimum for cached content)
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from fitsync.prompts import build_chat_summary_prompt
+from fitsync.tracing import get_logger
+
+log = get_logger(__name__)
+
+# Gemini only caches content above a minimum size, smaller prompts go inline
+DEFAULT_MIN_CACHE_TOKENS = 1024
+
+_context_caches = {}
+_context_lock = threading.Lock()
+
+
+def new_memory():
+    return {"summary": "", "summarized": 0}
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), used for budgeting."""
+    return (len(text) + 3) // 4
+
+
+def message_text(message):
+    """Plain text for a ChatMessage, with plans reduced to their one-line note."""
+    return message.plan.note if message.plan else message.text
+
+
+def to_content(message):
+    role = "user" if message.role == "user" else "model"
+    return {"role": role, "parts": [{"text": message_text(message)}]}
+
+
+def window_start(history, budget):
+    """Index of the oldest message that still fits, newest first, in the token budget."""
+    used = 0
+    start = len(history)
+    while start > 0:
+        cost = estimate_tokens(message_text(history[start - 1]))
+        if used + cost > budget:
+            break
+        used += cost
+        start -= 1
+    # Start the window on a user turn so the roles alternate
+    while start < len(history) and history[start].role != "user":
+        start += 1
+    return start
+
+
+def transcript(messages):
+    speaker = {"user": "User", "assistant": "Coach"}
+    return "\n".join(f"{speaker[m.role]}: {message_text(m)}" for m in messages)
+
+
+async def update_summary(backend, model, history, memory, upto):
+    """Fold history[memory['summarized']:upto] into the running summary."""
+    if upto <= memory["summarized"]:
+        return
+    prompt = build_chat_summary_prompt(memory["summary"], transcript(history[memory["summarized"]:upto]))
+    try:
+        memory["summary"] = (await backend.agenerate(model, prompt, task="chat_summary")).text.strip()
+        log.info("📝 Summarized %d older chat messages", upto - memory["summarized"])
+    except Exception as e:
+        # Without a summary the older turns are simply dropped
+        log.error("❌ Chat summary failed: %s", e)
+    memory["summarized"] = upto
+
+
+async def build_chat_contents(backend, model, history, user_message, memory, budget=None):
+    """
+    Contents for one chat turn: the running summary, the windowed history
+    and the new question. When the history outgrows the budget, the older
+    half is folded into the summary first.
+    """
+    if budget is None:
+        budget = int(os.getenv("FITSYNC_CHAT_HISTORY_TOKENS", 2000))
+    available = max(budget - estimate_tokens(user_message), 0)
+    start = min(memory["summarized"], len(history))
+    if window_start(history, available) > start:
+        # Summarize in batches: shrink the window to half the budget so the
+        # next few turns fit again without another summary call
+        start = window_start(history, available // 2)
+        await update_summary(backend, model, history, memory, start)
+
+    contents = []
+    if memory["summary"]:
+        contents.append({"role": "user", "parts": [{"text": f"Summary of our earlier conversation:\n{memory['summary']}"}]})
+        contents.append({"role": "model", "parts": [{"text": "Thanks, I have the context."}]})
+    contents.extend(to_content(message) for message in history[start:])
+    contents.append({"role": "user", "parts": [{"text": user_message}]})
+    return contents
+
+
+def contents_tokens(contents):
+    return sum(estimate_tokens(part["text"]) for content in contents for part in content["parts"])
+
+
+async def chat_config(backend, model, system_prompt):
+    """
+    Generation config carrying the system prompt, and whether it was cached.
+
+    Prompts long enough for Gemini context caching are cached once per
+    process and referenced by name on later turns. Shorter ones, or any
+    backend that cannot cache, get an inline system instruction.
+    """
+    from google.genai import types
+
+    min_tokens = int(os.getenv("FITSYNC_CHAT_CACHE_MIN_TOKENS", DEFAULT_MIN_CACHE_TOKENS))
+    if estimate_tokens(system_prompt) >= min_tokens:
+        name = await cached_context(backend, model, system_prompt)
+        if name:
+            return types.GenerateContentConfig(cached_content=name), True
+    return types.GenerateContentConfig(system_instruction=system_prompt), False
+
+
+async def cached_context(backend, model, system_prompt):
+    """Name of a live context cache for system_prompt, creating one if needed."""
+    key = hashlib.sha256(f"{model}\x00{system_prompt}".encode("utf-8")).hexdigest()
+    ttl = int(os.getenv("FITSYNC_CHAT_CACHE_TTL", 3600))
+    now = time.time()
+    with _context_lock:
+        entry = _context_caches.get(key)
+        # Leave a margin so a cache does not expire mid-request
+        if entry and entry[1] - 60 > now:
+            return entry[0]
+    try:
+        name = await backend.acache_context(model, system_prompt, ttl)
+        expires = now + ttl
+    except Exception as e:
+        log.warning("❌ Context caching failed, sending system prompt inline: %s", e)
+        # Retry caching after a few minutes rather than on every turn
+        name, expires = None, now + 300
+    with _context_lock:
+        _context_caches[key] = (name, expires)
+    return name
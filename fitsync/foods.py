@@ -0,0 +1,227 @@
+"""
+The bundled food and nutrient table (fitsync/data/foods.csv).
+
+Every row is one food with its macros per serving and the serving's weight
+in grams, plus the weight of a piece or a cup where the serving does not
+give it. The local meal planner (fitsync/mealsolver.py) picks foods from
+the rows that list the meals they suit; the other rows are only there to
+recognize foods in model-written plans (fitsync/reconcile.py).
+
+Foods in free text are found by name or alias ("Grilled chicken breast",
+"jasmine rice"), quantities like "1 cup cooked", "150g", "1 1/2 tbsp" or
+"4 eggs" are converted to grams with the food's own serving, a standard
+volume or a piece weight.
+"""
+
+import csv
+import os
+import re
+import threading
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "foods.csv")
+
+MACROS = ("calories", "protein_g", "carbs_g", "fats_g")
+
+# Grams per unit of weight, millilitres per unit of volume
+MASS_UNITS = {"g": 1, "gram": 1, "kg": 1000, "oz": 28.35, "ounce": 28.35, "lb": 453.6, "pound": 453.6}
+VOLUME_UNITS = {
+    "ml": 1, "l": 1000, "liter": 1000, "litre": 1000,
+    "cup": 240, "tbsp": 15, "tablespoon": 15, "tsp": 5, "teaspoon": 5,
+}
+# Counted units, weighed with the food's own count serving or its piece weight
+COUNT_UNITS = {
+    "piece", "slice", "scoop", "wrap", "cake", "stick", "bar", "whole", "serving", "fillet", "breast", "spear", "can",
+}
+SIZES = {"small": 0.75, "medium": 1.0, "large": 1.25}
+# Units written in the plural for more than one
+PLURAL_UNITS = {"cup", "slice", "wrap", "scoop", "cake", "stick"}
+
+FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75}
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "half": 0.5, "half a": 0.5}
+_AMOUNT = re.compile(
+    r"^\s*(?P<amount>\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?|[½⅓⅔¼¾]|(?:half a|half|an?|one|two|three)\b)"
+    r"(?:\s*(?:-|to)\s*(?P<upper>\d+(?:\.\d+)?))?\s*(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+
+
+def normalize(text):
+    """Lowercase words without punctuation or plural s, padded with spaces for whole-word matching."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return " " + " ".join(word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words) + " "
+
+
+def unit_name(word):
+    """Canonical unit for a word of a quantity ("cups" -> "cup"), or None."""
+    word = word.lower().rstrip(".")
+    for name in (word, word[:-1] if word.endswith("s") else word, word[:-2] if word.endswith("es") else word):
+        if name in MASS_UNITS or name in VOLUME_UNITS or name in COUNT_UNITS or name in SIZES:
+            return name
+    return None
+
+
+def _number(text):
+    text = text.lower().strip()
+    if text in WORD_NUMBERS:
+        return WORD_NUMBERS[text]
+    if text in FRACTIONS:
+        return FRACTIONS[text]
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            top, bottom = part.split("/")
+            total += float(top) / float(bottom) if float(bottom) else 0
+        else:
+            total += float(part)
+    return total
+
+
+def parse_quantity(text):
+    """
+    Split a quantity into (amount, unit, rest): "1 cup cooked" is
+    (1.0, "cup", "cooked"), "150g" (150.0, "g", ""), "2-3 eggs"
+    (2.5, None, "eggs"). unit is None for a bare count. Returns None
+    without a leading amount.
+    """
+    match = _AMOUNT.match(text or "")
+    if not match:
+        return None
+    amount = _number(match["amount"])
+    if match["upper"]:
+        amount = (amount + float(match["upper"])) / 2
+    rest = match["rest"].strip()
+    first, _, after = rest.partition(" ")
+    unit = unit_name(first) if first else None
+    if unit is None:
+        return amount, None, rest
+    return amount, unit, after.strip()
+
+
+def format_amount(amount):
+    return f"{round(amount, 2):g}"
+
+
+def with_amount(text, amount, factor=1.0):
+    """
+    A quantity with its leading amount (or range) replaced by amount, e.g.
+    "2-3 slices (60g)" -> "4 slices (80g)". Weights in parentheses are
+    multiplied by factor.
+    """
+    match = _AMOUNT.match(text)
+    rest = re.sub(
+        r"\((\d+(?:\.\d+)?)\s*(g|ml)\)",
+        lambda weight: f"({round(float(weight[1]) * factor):g}{weight[2]})",
+        match["rest"]
+    )
+    space = "" if match.end("upper" if match["upper"] else "amount") == match.start("rest") else " "
+    # "1 cup" -> "1.5 cups", "2 cups" -> "1 cup"
+    first, _, after = rest.partition(" ")
+    if first.lower() in PLURAL_UNITS and amount > 1:
+        rest = f"{first}s {after}".strip()
+    elif first.lower().rstrip("s") in PLURAL_UNITS and first.lower().endswith("s") and amount <= 1:
+        rest = f"{first[:-1]} {after}".strip()
+    return f"{text[:match.start('amount')]}{format_amount(amount)}{space}{rest}"
+
+
+class FoodTable:
+    """The bundled foods, with their macros as an array and indexed by group and name."""
+
+    def __init__(self, rows):
+        import numpy as np
+
+        self.items = [row["item"] for row in rows]
+        self.groups = [row["group"] for row in rows]
+        self.meals = [row["meals"] for row in rows]
+        self.servings = [row["serving"] for row in rows]
+        self.grams = np.array([float(row["grams"]) for row in rows])
+        self.piece_grams = [float(row["piece_grams"]) if row["piece_grams"] else None for row in rows]
+        self.cup_grams = [float(row["cup_grams"]) if row["cup_grams"] else None for row in rows]
+        self.tags = [set(row["tags"].split()) for row in rows]
+        self.max_servings = np.array([int(row["max_servings"]) for row in rows])
+        self.macros = np.array([[float(row[name]) for name in MACROS] for row in rows])
+        self.by_group = {}
+        for index, group in enumerate(self.groups):
+            self.by_group.setdefault(group, []).append(index)
+        # Names and aliases, longest first so "brown rice" wins over "rice"
+        names = {}
+        for index, row in enumerate(rows):
+            for name in [row["item"], *row["aliases"].split(";")]:
+                if name.strip():
+                    names.setdefault(normalize(re.sub(r"\(.*?\)", "", name)), index)
+        self.names = sorted(names.items(), key=lambda pair: -len(pair[0]))
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, encoding="utf-8", newline="") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def candidates(self, group, code, exclude):
+        """Indices of the foods of group listed for the meal code that exclude() lets through."""
+        return [
+            index for index in self.by_group.get(group, [])
+            if code in self.meals[index] and not exclude(index)
+        ]
+
+    def find(self, item):
+        """Index of the food an item name refers to, or None."""
+        text = normalize(item)
+        for name, index in self.names:
+            if name in text:
+                return index
+        return None
+
+    def serving_parts(self, index):
+        """(amount, unit, rest) of a food's serving, e.g. (0.5, "cup", "cooked")."""
+        return parse_quantity(self.servings[index])
+
+    def grams_of(self, index, quantity):
+        """Weight in grams of a quantity of a food, or None if the quantity cannot be read."""
+        parsed = parse_quantity(quantity)
+        if parsed is None:
+            return None
+        amount, unit, _ = parsed
+        serving_amount, serving_unit, _ = self.serving_parts(index)
+        if unit in MASS_UNITS:
+            return amount * MASS_UNITS[unit]
+        if unit in VOLUME_UNITS:
+            # The food's own density from its serving or cup weight, water otherwise
+            density = 1.0
+            if serving_unit in VOLUME_UNITS:
+                density = self.grams[index] / (serving_amount * VOLUME_UNITS[serving_unit])
+            elif self.cup_grams[index]:
+                density = self.cup_grams[index] / VOLUME_UNITS["cup"]
+            return amount * VOLUME_UNITS[unit] * density
+        piece = self.piece_grams[index]
+        if serving_unit not in MASS_UNITS and serving_unit not in VOLUME_UNITS:
+            piece = self.grams[index] / serving_amount
+        if piece is None:
+            return None
+        if unit in SIZES and serving_unit in SIZES:
+            piece *= SIZES[unit] / SIZES[serving_unit]
+        return amount * piece
+
+    def macros_of(self, index, grams):
+        """Calories, protein, carbs and fats (MACROS order) of grams of a food."""
+        return self.macros[index] * (grams / self.grams[index])
+
+    def quantity(self, index, count):
+        """Human-readable quantity of count servings of a food, e.g. '1.5 cups cooked'."""
+        amount, unit = self.servings[index].split(" ", 1)
+        total = float(amount) * count
+        first, _, rest = unit.partition(" ")
+        if first in PLURAL_UNITS and total > 1:
+            unit = f"{first}s {rest}".strip()
+        return f"{total:g} {unit}"
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_food_table():
+    """Return the process-wide FoodTable, loaded on first use."""
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = FoodTable.load()
+        return _table
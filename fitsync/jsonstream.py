@@ -0,0 +1,128 @@
+"""
+Incremental JSON parsing for streamed plan responses.
+
+Gemini streams a plan as a series of text chunks that only form valid JSON
+once the last one arrives. JSONArrayStreamer scans the chunks as they come
+in and hands back each element of one top-level array (for example
+"meals" or "weekly_plan") as soon as its closing brace is seen, so the UI
+can render Breakfast or Monday while the rest of the plan is still being
+generated.
+
+An element that is not valid JSON even after repair_json does not fail the
+stream: it and every element after it are held back, so elements are only
+ever handed out in order. streamed counts the elements handed out; the
+caller sends the rest from the fully parsed (and repaired) plan at the end.
+"""
+
+import json
+
+
+class JSONArrayStreamer:
+    """Yield completed elements of a top-level array from a stream of JSON text."""
+
+    def __init__(self, array_key):
+        self.array_key = array_key
+        self.buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._current_key = None
+        self._in_target = False
+        self._item_start = None
+        self._held_back = False
+        self.streamed = 0
+
+    def _parse_item(self, text):
+        """The element as a dict, or None if it cannot be parsed."""
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+        from fitsync.schemas import repair_json
+
+        try:
+            return json.loads(repair_json(text))
+        except ValueError:
+            return None
+
+    def feed(self, text):
+        """Add a chunk of text and return the list of array elements it completed."""
+        self.buffer += text
+        items = []
+        buffer = self.buffer
+        stack = self._stack
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(stack) == 1:
+                        self._last_string = buffer[self._string_start + 1:pos]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ":" and len(stack) == 1:
+                self._current_key = self._last_string
+            elif char in "{[":
+                if char == "[" and stack == ["{"] and self._current_key == self.array_key:
+                    self._in_target = True
+                elif self._in_target and len(stack) == 2 and self._item_start is None:
+                    self._item_start = pos
+                stack.append(char)
+            elif char in "}]":
+                if not stack:
+                    # Unbalanced closer: nothing open to close, the final parse reports it
+                    continue
+                stack.pop()
+                if self._in_target and len(stack) == 2 and self._item_start is not None:
+                    if not self._held_back:
+                        item = self._parse_item(buffer[self._item_start:pos + 1])
+                        if item is None:
+                            self._held_back = True
+                        else:
+                            items.append(item)
+                            self.streamed += 1
+                    self._item_start = None
+                elif self._in_target and len(stack) == 1:
+                    self._in_target = False
+        self._pos = len(buffer)
+        return items
+
+
+def consume_plan_stream(plan_stream, on_item=None):
+    """
+    Drive a plan generator to completion and return its final value.
+
+    Plan generators yield each completed item (a meal or a training day) and
+    return (plan_data, raw_json) when done. on_item, if given, is called with
+    every yielded item as it arrives.
+    """
+    while True:
+        try:
+            item = next(plan_stream)
+        except StopIteration as done:
+            return done.value
+        if on_item is not None:
+            on_item(item)
+
+
+def map_plan_stream(plan_stream, fn):
+    """
+    Pass a plan generator through, yielding fn(item) for every item it
+    yields, and return its final value.
+    """
+    while True:
+        try:
+            item = next(plan_stream)
+        except StopIteration as done:
+            return done.value
+        yield fn(item)
@@ -0,0 +1,178 @@
+"""
+Pre-generated plan library for the common profile grid.
+
+Most profiles fall into a small grid of gender x age band x goal x fitness
+level, crossed with a few BMI bands. build_plan_library.py generates a plan
+for every cell of that grid ahead of time and writes them to a JSON artifact
+indexed by cell key. At request time the apps look up the nearest cell and
+rescale its calorie and protein numbers to the user's exact targets, so the
+live model is only called for profiles outside the grid (for example custom
+dietary preferences).
+
+Configuration (environment variables):
+    FITSYNC_PLAN_LIBRARY   Artifact path (default: fitsync/data/plan_library.json)
+"""
+
+import copy
+import json
+import os
+import threading
+
+from fitsync.targets import calculate_targets
+
+LIBRARY_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "plan_library.json")
+
+# The sidebar choices in chatbot_app.py
+GENDERS = ["Male", "Female"]
+GOALS = ["Lose Weight", "Maintain", "Gain Muscle"]
+FITNESS_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+AGE_BANDS = [(15, 24), (25, 34), (35, 44), (45, 54), (55, 64), (65, 100)]
+BMI_BANDS = [(15.0, 18.5), (18.5, 25.0), (25.0, 30.0), (30.0, 40.0)]
+REFERENCE_HEIGHT_CM = {"Male": 176, "Female": 163}
+
+# Plans are only rescaled this far (+/-) before falling back to the live model
+MAX_RESCALE = 0.25
+
+# Meal plans are indexed by BMI band as well, workout plans are not
+MEAL_KINDS = ("meal_plan", "comprehensive_meal_plan")
+WORKOUT_KINDS = ("workout_plan", "detailed_workout_plan")
+
+CALORIE_KEYS = {"calories": ("protein_g", "carbs_g", "fats_g"),
+                "total_calories": ("total_protein_g", "total_carbs_g", "total_fats_g")}
+
+
+def age_band(age):
+    """Return the label of the age band containing age, clamped to the grid."""
+    for low, high in AGE_BANDS:
+        if age <= high:
+            return f"{low}-{high}"
+    low, high = AGE_BANDS[-1]
+    return f"{low}-{high}"
+
+
+def cell_key(*parts):
+    return "|".join(str(part) for part in parts)
+
+
+def iter_cells(kinds=MEAL_KINDS + WORKOUT_KINDS):
+    """Yield (kind, key, profile) for every cell of the grid."""
+    for kind in kinds:
+        for gender in GENDERS:
+            height_cm = REFERENCE_HEIGHT_CM[gender]
+            for low, high in AGE_BANDS:
+                age = (low + high) // 2
+                for goal in GOALS:
+                    if kind in MEAL_KINDS:
+                        for bmi_low, bmi_high in BMI_BANDS:
+                            bmi = (bmi_low + bmi_high) / 2
+                            weight_kg = round(bmi * (height_cm / 100) ** 2, 1)
+                            profile = {
+                                "gender": gender, "age": age, "height_cm": height_cm,
+                                "weight_kg": weight_kg, "goal": goal,
+                                "targets": calculate_targets(gender, age, height_cm, weight_kg, goal),
+                            }
+                            yield kind, cell_key(gender, f"{low}-{high}", goal), profile
+                    elif kind == "detailed_workout_plan":
+                        for level in FITNESS_LEVELS:
+                            profile = {"gender": gender, "age": age, "goal": goal, "fitness_level": level}
+                            yield kind, cell_key(gender, f"{low}-{high}", goal, level), profile
+                    else:
+                        profile = {"gender": gender, "age": age, "goal": goal}
+                        yield kind, cell_key(gender, f"{low}-{high}", goal), profile
+
+
+def rescale_plan(plan, calorie_ratio, protein_ratio):
+    """
+    Return a copy of plan with calories and protein scaled by the given ratios.
+
+    Carbs and fats are scaled so each item's energy still adds up
+    (4 kcal/g protein) after the protein change.
+    """
+    if isinstance(plan, list):
+        return [rescale_plan(item, calorie_ratio, protein_ratio) for item in plan]
+    if not isinstance(plan, dict):
+        return plan
+
+    scaled = {key: rescale_plan(value, calorie_ratio, protein_ratio) for key, value in plan.items()}
+    for calorie_key, (protein_key, carbs_key, fats_key) in CALORIE_KEYS.items():
+        calories = plan.get(calorie_key)
+        protein = plan.get(protein_key)
+        if not isinstance(calories, (int, float)) or not isinstance(protein, (int, float)):
+            continue
+        new_calories = calories * calorie_ratio
+        new_protein = protein * protein_ratio
+        old_rest = calories - 4 * protein
+        rest_ratio = max(new_calories - 4 * new_protein, 0) / old_rest if old_rest > 0 else calorie_ratio
+        scaled[calorie_key] = round(new_calories)
+        scaled[protein_key] = round(new_protein)
+        for key in (carbs_key, fats_key):
+            if isinstance(plan.get(key), (int, float)):
+                scaled[key] = round(plan[key] * rest_ratio)
+    return scaled
+
+
+class PlanLibrary:
+    """In-memory index over a plan library artifact."""
+
+    def __init__(self, plans):
+        self.plans = plans
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != LIBRARY_VERSION:
+            raise ValueError(f"Unsupported plan library version: {data.get('version')}")
+        return cls(data["plans"])
+
+    def lookup_meal_plan(self, kind, targets, gender, age, goal):
+        """Return the nearest meal plan rescaled to targets, or None if not covered."""
+        entries = self.plans.get(kind, {}).get(cell_key(gender, age_band(age), goal))
+        if not entries:
+            return None
+        entry = min(entries, key=lambda e: abs(e["targets"]["daily_calories"] - targets["daily_calories"]))
+        calorie_ratio = targets["daily_calories"] / entry["targets"]["daily_calories"]
+        protein_ratio = targets["daily_protein_g"] / entry["targets"]["daily_protein_g"]
+        if abs(calorie_ratio - 1) > MAX_RESCALE or abs(protein_ratio - 1) > MAX_RESCALE:
+            return None
+        return rescale_plan(entry["plan"], calorie_ratio, protein_ratio)
+
+    def lookup_workout_plan(self, kind, gender, age, goal, fitness_level=None):
+        """Return the workout plan for the profile's cell, or None if not covered."""
+        parts = [gender, age_band(age), goal]
+        if fitness_level is not None:
+            parts.append(fitness_level)
+        entry = self.plans.get(kind, {}).get(cell_key(*parts))
+        if entry is None:
+            return None
+        return copy.deepcopy(entry["plan"])
+
+
+_library = None
+_library_loaded = False
+_library_lock = threading.Lock()
+
+
+def get_plan_library():
+    """Return the process-wide PlanLibrary, or None if no artifact has been built."""
+    global _library, _library_loaded
+    with _library_lock:
+        if not _library_loaded:
+            path = os.getenv("FITSYNC_PLAN_LIBRARY", DEFAULT_PATH)
+            _library = PlanLibrary.load(path) if os.path.exists(path) else None
+            _library_loaded = True
+        return _library
+
+
+def find_meal_plan(kind, targets, gender, age, goal):
+    """Serve a precomputed meal plan for the profile, or None to call the live model."""
+    library = get_plan_library()
+    return library.lookup_meal_plan(kind, targets, gender, age, goal) if library else None
+
+
+def find_workout_plan(kind, gender, age, goal, fitness_level=None):
+    """Serve a precomputed workout plan for the profile, or None to call the live model."""
+    library = get_plan_library()
+    return library.lookup_workout_plan(kind, gender, age, goal, fitness_level) if library else None
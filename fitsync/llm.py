@@ -0,0 +1,289 @@
+"""
+Pluggable LLM backends behind every Gemini call site.
+
+The agents talk to an LLMBackend instead of a genai Client, so the model
+can be swapped for a local stand-in:
+
+    GeminiBackend     calls the live Gemini API (default)
+    RecordingBackend  calls Gemini and appends every exchange to a JSONL cassette
+    ReplayBackend     serves responses from a cassette with a configurable
+                      latency distribution, no network or API key needed
+
+Configuration (environment variables):
+    FITSYNC_LLM_BACKEND      gemini | record | replay (default: gemini)
+    FITSYNC_CASSETTE         Cassette path (default: fitsync_cassette.jsonl)
+    FITSYNC_REPLAY_LATENCY   Replay latency per call, one of:
+                               fixed:SECONDS
+                               uniform:LOW,HIGH
+                               lognormal:P50,P95
+                             (default: no added latency)
+    FITSYNC_REPLAY_TOKEN_SECONDS  Replay generation time per response token, added to
+                             the latency above so long responses take longer
+                             (default: 0)
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+
+from fitsync.aio import get_semaphore, iterate_sync, run_sync
+from fitsync.cache import make_key
+from fitsync.conversation import estimate_tokens
+from fitsync.metrics import MeteredBackend, register_collector, start_exporter_from_env
+from fitsync.resilience import resilient_from_env
+
+DEFAULT_CASSETTE = "fitsync_cassette.jsonl"
+
+
+class LLMResponse:
+    """Text of a model response plus its usage metadata, if the backend reports it."""
+
+    __slots__ = ("text", "usage")
+
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage = usage
+
+
+class LLMBackend:
+    """
+    Interface for generating text from a model.
+
+    Backends implement the async methods, which run on the shared event loop
+    (see fitsync.aio). The sync methods are wrappers for the Streamlit scripts.
+    """
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        """Return an LLMResponse for the prompt. task names the calling agent."""
+        raise NotImplementedError
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        """
+        Yield the response text in chunks. Defaults to one chunk.
+
+        on_usage, if given, is called with the usage metadata once the
+        stream has ended.
+        """
+        response = await self.agenerate(model, contents, config, task)
+        yield response.text
+        if on_usage is not None:
+            on_usage(response.usage)
+
+    async def acache_context(self, model, system_instruction, ttl_seconds):
+        """Cache a system instruction upstream and return its name, or None if unsupported."""
+        return None
+
+    def generate(self, model, contents, config=None, task=None):
+        return run_sync(self.agenerate(model, contents, config, task))
+
+    def generate_stream(self, model, contents, config=None, task=None):
+        return iterate_sync(self.agenerate_stream(model, contents, config, task))
+
+    def cache_context(self, model, system_instruction, ttl_seconds):
+        return run_sync(self.acache_context(model, system_instruction, ttl_seconds))
+
+
+class GeminiBackend(LLMBackend):
+    """Live Gemini API backend, using the SDK's async client."""
+
+    def __init__(self, api_key):
+        from google.genai import Client
+
+        self.client = Client(api_key=api_key)
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        async with get_semaphore():
+            response = await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+        return LLMResponse(response.text, getattr(response, "usage_metadata", None))
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        usage = None
+        async with get_semaphore():
+            stream = await self.client.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+            async for chunk in stream:
+                # The final chunk carries the totals for the whole response
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    yield chunk.text
+        if on_usage is not None:
+            on_usage(usage)
+
+    async def acache_context(self, model, system_instruction, ttl_seconds):
+        from google.genai import types
+
+        cache = await self.client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(system_instruction=system_instruction, ttl=f"{int(ttl_seconds)}s"),
+        )
+        return cache.name
+
+
+class RecordingBackend(LLMBackend):
+    """Pass requests through to another backend and record each exchange to a cassette."""
+
+    def __init__(self, inner, cassette_path):
+        self.inner = inner
+        self.cassette_path = cassette_path
+        self._lock = threading.Lock()
+
+    def _record(self, model, contents, config, task, text):
+        entry = {
+            "key": make_key(model, contents, config),
+            "task": task,
+            "model": model,
+            "contents": contents,
+            "text": text,
+        }
+        with self._lock, open(self.cassette_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        response = await self.inner.agenerate(model, contents, config, task)
+        self._record(model, contents, config, task, response.text)
+        return response
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        chunks = []
+        async for chunk in self.inner.agenerate_stream(model, contents, config, task, on_usage):
+            chunks.append(chunk)
+            yield chunk
+        self._record(model, contents, config, task, "".join(chunks))
+
+    async def acache_context(self, model, system_instruction, ttl_seconds):
+        return await self.inner.acache_context(model, system_instruction, ttl_seconds)
+
+
+class LatencyModel:
+    """Samples per-call latency from a fixed, uniform or lognormal distribution."""
+
+    def __init__(self, spec=None, seed=None):
+        self.spec = spec or "fixed:0"
+        self._random = random.Random(seed)
+        kind, _, args = self.spec.partition(":")
+        values = [float(v) for v in args.split(",")] if args else [0.0]
+        if kind == "fixed" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: self._random.uniform(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2:
+            mu = math.log(values[0])
+            sigma = (math.log(values[1]) - mu) / 1.645
+            self._sample = lambda: self._random.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"Invalid latency spec: {self.spec!r}")
+
+    def sample(self):
+        return max(self._sample(), 0.0)
+
+
+def estimated_usage(contents, text):
+    """Usage metadata for a replayed response, estimated at four characters per token."""
+    if not isinstance(contents, str):
+        contents = json.dumps(contents, default=str)
+    return {"prompt_token_count": estimate_tokens(contents), "candidates_token_count": estimate_tokens(text)}
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Serve recorded responses from a JSONL cassette.
+
+    Usage metadata is estimated from the prompt and response length, so
+    token metrics (see fitsync.metrics) work offline too.
+
+    A request is matched on its exact model/prompt/config key first. When the
+    prompt was never recorded (for example a new profile), a recorded
+    response for the same task is served instead, round-robin.
+    """
+
+    def __init__(self, cassette_path, latency=None, chunk_size=64, first_chunk_share=0.2, token_seconds=0.0):
+        self.latency = latency or LatencyModel()
+        self.token_seconds = token_seconds
+        self.chunk_size = chunk_size
+        self.first_chunk_share = first_chunk_share
+        self.by_key = {}
+        self.by_task = {}
+        with open(cassette_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("key"):
+                    self.by_key[entry["key"]] = entry["text"]
+                self.by_task.setdefault(entry.get("task"), []).append(entry["text"])
+        self._cursor = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, model, contents, config=None, task=None):
+        text = self.by_key.get(make_key(model, contents, config))
+        if text is not None:
+            return text
+        texts = self.by_task.get(task)
+        if not texts:
+            raise LookupError(f"No recorded response for task {task!r}")
+        with self._lock:
+            index = self._cursor.get(task, 0)
+            self._cursor[task] = index + 1
+        return texts[index % len(texts)]
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        text = self.lookup(model, contents, config, task)
+        async with get_semaphore():
+            await asyncio.sleep(self.latency.sample() + estimate_tokens(text) * self.token_seconds)
+        return LLMResponse(text, estimated_usage(contents, text))
+
+    async def acache_context(self, model, system_instruction, ttl_seconds):
+        # Stands in for Gemini context caching, so cached chat configs replay too
+        return "cachedContents/replay-" + make_key(model, system_instruction)[:16]
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        text = self.lookup(model, contents, config, task)
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        total = self.latency.sample()
+        # Generation time is spread over the chunks, the first one waits for its share of the latency only
+        per_chunk = (total * (1 - self.first_chunk_share) + estimate_tokens(text) * self.token_seconds) / len(chunks)
+        async with get_semaphore():
+            await asyncio.sleep(total * self.first_chunk_share)
+            for index, chunk in enumerate(chunks):
+                if index:
+                    await asyncio.sleep(per_chunk)
+                yield chunk
+        if on_usage is not None:
+            on_usage(estimated_usage(contents, text))
+
+
+def backend_kind():
+    return os.getenv("FITSYNC_LLM_BACKEND", "gemini").lower()
+
+
+def api_key_required():
+    """Whether the configured backend needs GEMINI_API_KEY."""
+    return backend_kind() != "replay"
+
+
+def create_backend(api_key=None):
+    """
+    Create the backend selected by FITSYNC_LLM_BACKEND, wrapped with
+    retries, a deadline and optional hedging (see fitsync.resilience) and
+    metered per call and per upstream attempt (see fitsync.metrics).
+    """
+    kind = backend_kind()
+    cassette = os.getenv("FITSYNC_CASSETTE", DEFAULT_CASSETTE)
+    if kind == "replay":
+        backend = ReplayBackend(
+            cassette,
+            LatencyModel(os.getenv("FITSYNC_REPLAY_LATENCY")),
+            token_seconds=float(os.getenv("FITSYNC_REPLAY_TOKEN_SECONDS", 0)),
+        )
+    elif kind == "record":
+        backend = RecordingBackend(GeminiBackend(api_key), cassette)
+    elif kind == "gemini":
+        backend = GeminiBackend(api_key)
+    else:
+        raise ValueError(f"Unknown FITSYNC_LLM_BACKEND: {kind!r}")
+    resilient = resilient_from_env(MeteredBackend(backend, "attempt"))
+    register_collector("resilience", resilient.stats, counters=resilient.stats().keys())
+    start_exporter_from_env()
+    return MeteredBackend(resilient, "call")
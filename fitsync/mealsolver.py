@@ -0,0 +1,258 @@
+"""
+Deterministic local meal planner over a bundled nutrient table.
+
+The bundled food table (fitsync/foods.py) lists common foods with their
+macros per serving, where a serving is the step a quantity moves in (50 g
+of chicken, half a cup of rice, one egg). A meal is planned from templates
+of food groups (a protein, a carb and a fat plus a vegetable side for lunch
+and dinner, a protein and a fruit for a snack, ...): every combination of
+foods that fits the templates is scored at every whole number of servings
+against the meal's calorie, protein, carb and fat targets, and the best
+combinations become the meal's options. That is the whole integer
+program, solved exhaustively with NumPy in a few milliseconds per plan.
+
+Dietary preferences exclude foods by tag (vegetarian, vegan, pescatarian,
+no meat, dairy-free, gluten-free, nut, peanut, egg, soy, shellfish or fish
+allergies, no pork, halal, kosher) or by name ("no salmon"). A food is only
+excluded by a diet ("vegetarian", but not "non-vegetarian") or negated
+phrasing ("no fish", "gluten-free", "nut allergy"), so "I love fish" keeps
+fish. Anything else in them is ignored.
+"""
+
+import itertools
+import re
+
+from fitsync.foods import MACROS, get_food_table
+
+# Score weights of the squared relative errors, in MACROS order
+WEIGHTS = (4.0, 4.0, 1.0, 1.0)
+# Share of the calories planned as fat; carbs get what protein and fat leave
+FAT_SHARE = 0.27
+# Added to the score for every food already used by an earlier meal, for variety
+REUSE_PENALTY = 0.005
+OPTIONS_PER_MEAL = 3
+# Options beyond the first are only offered this close to the calorie and protein targets
+MAX_OPTION_ERROR = 0.15
+
+# Food groups of a meal's options, by kind of meal
+TEMPLATES = {
+    "breakfast": (("protein", "carb", "fruit"), ("protein", "carb", "fat")),
+    "main": (("protein", "carb", "fat"),),
+    "snack": (("protein", "fruit"), ("protein", "fat"), ("protein", "carb"), ("fruit", "fat")),
+}
+# A serving of a side from this group goes with every option, rotated for
+# variety instead of searched over: it barely moves the macros
+SIDES = {"main": "veg"}
+# Letter of each kind in the meals column of the food table
+MEAL_CODES = {"breakfast": "b", "main": "m", "snack": "s"}
+
+# Tags excluded by a word in the dietary preferences
+DIET_EXCLUSIONS = {
+    "vegan": {"meat", "pork", "fish", "shellfish", "dairy", "egg"},
+    "vegetarian": {"meat", "pork", "fish", "shellfish"},
+    "pescatarian": {"meat", "pork"},
+    "meat": {"meat", "pork"},
+    "dairy": {"dairy"},
+    "lactose": {"dairy"},
+    "gluten": {"gluten"},
+    "nut": {"nuts", "peanut"},
+    "nuts": {"nuts", "peanut"},
+    "peanut": {"peanut"},
+    "peanuts": {"peanut"},
+    "egg": {"egg"},
+    "eggs": {"egg"},
+    "soy": {"soy"},
+    "shellfish": {"shellfish"},
+    "fish": {"fish"},
+    "seafood": {"fish", "shellfish"},
+    "sesame": {"sesame"},
+    "pork": {"pork"},
+    "halal": {"pork"},
+    "kosher": {"pork", "shellfish"},
+}
+
+
+# Diet keywords that exclude on their own, unless negated ("non-vegetarian")
+DIETS = {"vegan", "vegetarian", "pescatarian", "halal", "kosher"}
+# Words that turn the keywords after them in the same clause into exclusions
+NEGATIONS = {"no", "not", "never", "without", "avoid", "exclude", "excluding", "dont", "cant", "allergic"}
+# Words that turn the keywords just before them into exclusions ("gluten-free", "nut allergy")
+SUFFIXES = {"free", "allergy", "allergies", "allergic", "intolerance", "intolerant"}
+
+
+def _before_suffix(tokens, position):
+    """Whether the keyword at position is followed by a suffix, past other keywords and and/or."""
+    for token in tokens[position + 1:]:
+        if token in SUFFIXES:
+            return True
+        if token not in DIET_EXCLUSIONS and token not in ("and", "or"):
+            return False
+    return False
+
+
+def parse_exclusions(dietary_preferences):
+    """
+    Return (excluded tags, excluded item words) for free-text dietary
+    preferences, e.g. "vegetarian, no mushrooms, nut allergy".
+    """
+    text = (dietary_preferences or "").lower().replace("'", "")
+    tags = set()
+    words = set()
+    for clause in re.split(r"[,;.\n]|\bbut\b", text):
+        tokens = re.findall(r"[a-z]+", clause)
+        for position, token in enumerate(tokens):
+            if token not in DIET_EXCLUSIONS:
+                continue
+            if token in DIETS:
+                excludes = position == 0 or tokens[position - 1] not in ("non", "not")
+            else:
+                excludes = bool(NEGATIONS.intersection(tokens[:position])) or _before_suffix(tokens, position)
+            if excludes:
+                tags |= DIET_EXCLUSIONS[token]
+        # "no salmon", "without white rice", "avoid mushrooms and tuna": excluded by name
+        for phrase in re.findall(r"\b(?:no|without|avoid|exclude)\s+([a-z ]+)", clause):
+            # A phrase ends at the next and/or or negation ("no dairy and no eggs")
+            for part in re.split(r"\b(?:and|or|" + "|".join(sorted(NEGATIONS)) + r")\b", phrase):
+                part = " ".join(word for word in part.split() if word not in DIET_EXCLUSIONS)
+                if part:
+                    words.add(part[:-1] if part.endswith("s") and len(part) > 3 else part)
+    return tags, words
+
+
+def excluded(table, index, exclusions):
+    """Whether parse_exclusions() output rules out a food."""
+    tags, words = exclusions
+    item = table.items[index].lower()
+    # Whole words only, plural or not: "no" must not rule out Quinoa
+    return bool(table.tags[index] & tags) or any(re.search(rf"\b{re.escape(word)}(?:e?s)?\b", item) for word in words)
+
+
+def meal_kind(meal_time):
+    name = meal_time.lower()
+    if "snack" in name:
+        return "snack"
+    if "breakfast" in name:
+        return "breakfast"
+    return "main"
+
+
+def meal_targets(calories, protein_g):
+    """Calories, protein, carbs and fats (MACROS order) for a meal's calorie and protein targets."""
+    import numpy as np
+
+    fats_g = calories * FAT_SHARE / 9
+    carbs_g = max(calories - protein_g * 4 - fats_g * 9, 0) / 4
+    return np.array([calories, protein_g, carbs_g, fats_g], dtype=float)
+
+
+def _score_template(table, foods, target, used):
+    """
+    Best servings for every combination of foods (one list of candidates per
+    group). Returns (combinations, servings, totals, scores), one row per
+    combination.
+    """
+    import numpy as np
+
+    combos = np.array(list(itertools.product(*foods)))
+    limits = table.max_servings[combos]
+    # Every whole number of servings up to the largest limit of each group
+    grid = np.array(list(itertools.product(*(range(1, limit + 1) for limit in limits.max(axis=0)))))
+    totals = np.einsum("gk,nkm->ngm", grid, table.macros[combos])
+    errors = (totals - target) / np.maximum(target, 1)
+    scores = (errors ** 2 * np.array(WEIGHTS)).sum(axis=2)
+    scores[(grid[None, :, :] > limits[:, None, :]).any(axis=2)] = np.inf
+    best = scores.argmin(axis=1)
+    rows = np.arange(len(combos))
+    scores = scores[rows, best] + REUSE_PENALTY * used[combos].sum(axis=1)
+    return combos, grid[best], totals[rows, best], scores
+
+
+def solve_meal(table, meal_time, calories, protein_g, exclusions, options=OPTIONS_PER_MEAL, used=None):
+    """
+    Plan one meal: up to options distinct options, each close to the meal's
+    calorie and protein targets. used counts the foods of earlier meals and
+    is updated with this one. Raises ValueError if the exclusions leave no
+    food for the meal.
+    """
+    import numpy as np
+
+    if used is None:
+        used = np.zeros(len(table.items))
+    kind = meal_kind(meal_time)
+    target = meal_targets(calories, protein_g)
+    sides = table.candidates(SIDES[kind], MEAL_CODES[kind], lambda index: excluded(table, index, exclusions)) if kind in SIDES else []
+    if sides:
+        # Leave room for the average side
+        target = np.maximum(target - table.macros[sides].mean(axis=0), 0)
+
+    scored = []
+    for groups in TEMPLATES[kind]:
+        foods = [
+            table.candidates(group, MEAL_CODES[kind], lambda index: excluded(table, index, exclusions))
+            for group in groups
+        ]
+        if all(foods):
+            scored.append(_score_template(table, foods, target, used))
+    if not scored:
+        raise ValueError(f"No foods left for {meal_time} after the dietary exclusions")
+    combos = [combo for result in scored for combo in result[0]]
+    servings = [row for result in scored for row in result[1]]
+    totals = np.concatenate([result[2] for result in scored])
+    scores = np.concatenate([result[3] for result in scored])
+
+    # Best first, each option led by a different food
+    misses = (np.abs(totals[:, :2] - target[:2]) / np.maximum(target[:2], 1)).max(axis=1)
+    chosen = []
+    leads = set()
+    for index in np.argsort(scores, kind="stable"):
+        if len(chosen) == options:
+            break
+        if combos[index][0] in leads or (chosen and misses[index] > MAX_OPTION_ERROR):
+            continue
+        leads.add(combos[index][0])
+        chosen.append(index)
+
+    meal_options = []
+    for number, index in enumerate(chosen, 1):
+        picked = list(zip(combos[index], servings[index]))
+        total = totals[index]
+        if sides:
+            # The least used side so far, in table order on ties
+            side = min(sides, key=lambda food: used[food])
+            picked.append((side, 1))
+            total = total + table.macros[side]
+        foods = [{"item": table.items[food], "quantity": table.quantity(food, count)} for food, count in picked]
+        for food, _ in picked:
+            used[food] += 1
+        second = foods[1]["item"]
+        meal_options.append({
+            "option_name": f"Option {number}: {foods[0]['item']} with {second[0].lower()}{second[1:]}",
+            "foods": foods,
+            **{name: int(round(value)) for name, value in zip(MACROS, total)},
+        })
+    return {"meal_time": meal_time, "options": meal_options}
+
+
+def solve_meals(targets, slots, dietary_preferences="", options=OPTIONS_PER_MEAL):
+    """
+    Plan every meal of slots ((meal_time, share of the daily targets), ...)
+    for calculate_targets() output. Returns the meals in the shape of the
+    comprehensive meal plan's "meals".
+    """
+    import numpy as np
+
+    table = get_food_table()
+    exclusions = parse_exclusions(dietary_preferences)
+    used = np.zeros(len(table.items))
+    return [
+        solve_meal(
+            table,
+            meal_time,
+            targets["daily_calories"] * share,
+            targets["daily_protein_g"] * share,
+            exclusions,
+            options,
+            used
+        )
+        for meal_time, share in slots
+    ]
@@ -0,0 +1,437 @@
+"""
+Per-call LLM metrics in the Prometheus text format.
+
+create_backend() wraps the backend twice with MeteredBackend:
+
+    call      every agent call as the app sees it, across retries and hedges:
+              outcome, end-to-end latency and time to first chunk
+    attempt   every upstream request, retries and hedges included: outcome,
+              latency, prompt/response tokens from usage_metadata and the
+              cost they add up to
+
+All series are labelled by agent (nutritionist, coach or chat, derived from
+the task) and model. Plan cache lookups are counted per agent by
+fitsync.cache, and other modules register snapshot collectors (resilience,
+single-flight, plan cache and parse counters) that are read at scrape time.
+
+The registry is per process. Expose it with either (environment variables):
+    FITSYNC_METRICS_PORT      Serve /metrics over HTTP on this port
+    FITSYNC_METRICS_HOST      Interface to bind (default: 0.0.0.0)
+    FITSYNC_METRICS_FILE      Write the metrics to this file instead (for a
+                              node_exporter textfile collector)
+    FITSYNC_METRICS_INTERVAL  Seconds between file writes (default: 15)
+    FITSYNC_LLM_PRICES        JSON {"model": [input, output, cached input]}
+                              in USD per million tokens, overriding PRICES
+"""
+
+import asyncio
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fitsync.aio import iterate_sync, run_sync
+from fitsync.tracing import get_logger, span
+
+log = get_logger(__name__)
+
+AGENTS = {
+    "meal_plan": "nutritionist",
+    "comprehensive_meal_plan": "nutritionist",
+    "meal_slot": "nutritionist",
+    "meal_option_names": "nutritionist",
+    "workout_plan": "coach",
+    "detailed_workout_plan": "coach",
+    "workout_notes": "coach",
+    "chat": "chat",
+    "chat_summary": "chat",
+}
+
+# USD per million tokens (input, output, cached input), Gemini API paid tier
+PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50, 0.075),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def agent_for_task(task):
+    return AGENTS.get(task, task or "unknown")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed set of labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name + _labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + "_bucket" + _labels(self.labelnames, key, [("le", _number(bound))]), cumulative
+            yield self.name + "_sum" + _labels(self.labelnames, key), total
+            yield self.name + "_count" + _labels(self.labelnames, key), cumulative
+
+
+class Registry:
+    """The process's metrics plus collectors read at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix, collect, counters=()):
+        """
+        Publish collect()'s dict as fitsync_<prefix>_<key> samples on every scrape.
+
+        Keys in counters are exposed as counters (with a _total suffix), the
+        rest as gauges. Non-numeric values are skipped. Registering a
+        prefix again replaces its collector (e.g. a newly created backend).
+        """
+        with self._lock:
+            self._collectors[prefix] = (collect, set(counters))
+
+    def render(self):
+        """The whole registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors.items())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {_number(value)}" for name, value in metric.samples())
+        for prefix, (collect, counters) in collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                log.error("❌ Metrics collector %s failed: %s", prefix, e)
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"fitsync_{prefix}_{key}" + ("_total" if key in counters else "")
+                lines.append(f"# TYPE {name} {'counter' if key in counters else 'gauge'}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_REQUESTS = REGISTRY.counter(
+    "fitsync_llm_requests_total", "Agent LLM calls by outcome, counted once across retries and hedges",
+    ["agent", "model", "outcome"])
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "fitsync_llm_request_seconds", "End-to-end agent LLM call latency, retries and hedges included",
+    ["agent", "model"])
+LLM_FIRST_CHUNK_SECONDS = REGISTRY.histogram(
+    "fitsync_llm_first_chunk_seconds", "Time to the first chunk of streamed LLM calls",
+    ["agent", "model"])
+LLM_ATTEMPTS = REGISTRY.counter(
+    "fitsync_llm_attempts_total", "Upstream LLM requests by outcome, retries and hedges included",
+    ["agent", "model", "outcome"])
+LLM_ATTEMPT_SECONDS = REGISTRY.histogram(
+    "fitsync_llm_attempt_seconds", "Latency of single upstream LLM requests",
+    ["agent", "model"])
+LLM_TOKENS = REGISTRY.counter(
+    "fitsync_llm_tokens_total", "Tokens reported in usage_metadata (prompt includes cached)",
+    ["agent", "model", "type"])
+LLM_COST = REGISTRY.counter(
+    "fitsync_llm_cost_usd_total", "Estimated spend from token usage and PRICES",
+    ["agent", "model"])
+PLAN_CACHE_LOOKUPS = REGISTRY.counter(
+    "fitsync_plan_cache_lookups_total", "Plan cache lookups by result",
+    ["agent", "result"])
+
+STAGES = {
+    "call": (LLM_REQUESTS, LLM_REQUEST_SECONDS),
+    "attempt": (LLM_ATTEMPTS, LLM_ATTEMPT_SECONDS),
+}
+
+
+def register_collector(prefix, collect, counters=()):
+    REGISTRY.register_collector(prefix, collect, counters)
+
+
+def record_cache_lookup(task, hit):
+    PLAN_CACHE_LOOKUPS.inc(agent=agent_for_task(task), result="hit" if hit else "miss")
+
+
+def prices():
+    table = dict(PRICES)
+    override = os.getenv("FITSYNC_LLM_PRICES")
+    if override:
+        table.update({model: tuple(values) for model, values in json.loads(override).items()})
+    return table
+
+
+def usage_counts(usage):
+    """Token counts from a usage_metadata object (or an equivalent dict)."""
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        get = usage.get
+    else:
+        def get(name):
+            return getattr(usage, name, None)
+    return {
+        "prompt": get("prompt_token_count") or 0,
+        "cached": get("cached_content_token_count") or 0,
+        "response": get("candidates_token_count") or 0,
+        "thoughts": get("thoughts_token_count") or 0,
+    }
+
+
+def record_usage(task, model, usage):
+    counts = usage_counts(usage)
+    if counts is None:
+        return
+    agent = agent_for_task(task)
+    for kind, count in counts.items():
+        if count:
+            LLM_TOKENS.inc(count, agent=agent, model=model, type=kind)
+    price = prices().get(model)
+    if price:
+        input_price, output_price, cached_price = price
+        cost = ((counts["prompt"] - counts["cached"]) * input_price + counts["cached"] * cached_price
+                + (counts["response"] + counts["thoughts"]) * output_price) / 1e6
+        LLM_COST.inc(cost, agent=agent, model=model)
+
+
+def _outcome(error):
+    from fitsync.resilience import DeadlineExceeded
+
+    if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+        return "cancelled"
+    if isinstance(error, DeadlineExceeded):
+        return "deadline"
+    return "error"
+
+
+class MeteredBackend:
+    """
+    Backend wrapper recording each call's outcome and latency.
+
+    stage is "call" (outermost, what the agent sees) or "attempt" (innermost,
+    each upstream request, where token usage is recorded too).
+    """
+
+    def __init__(self, inner, stage):
+        self.inner = inner
+        self.stage = stage
+        self.requests, self.seconds = STAGES[stage]
+
+    def _observe(self, task, model, outcome, seconds):
+        agent = agent_for_task(task)
+        self.requests.inc(agent=agent, model=model, outcome=outcome)
+        self.seconds.observe(seconds, agent=agent, model=model)
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        start = time.perf_counter()
+        with span(f"llm_{self.stage}", task=task, model=model) as step:
+            try:
+                response = await self.inner.agenerate(model, contents, config, task)
+            except BaseException as e:
+                self._observe(task, model, _outcome(e), time.perf_counter() - start)
+                step.set(outcome=_outcome(e))
+                raise
+            self._observe(task, model, "ok", time.perf_counter() - start)
+            if self.stage == "attempt":
+                record_usage(task, model, response.usage)
+                step.set(tokens=usage_counts(response.usage))
+        return response
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        start = time.perf_counter()
+        # Not activated: the span stays open across yields to the consumer
+        step = span(f"llm_{self.stage}", activate=False, task=task, model=model, stream=True)
+
+        def record(usage):
+            record_usage(task, model, usage)
+            step.set(tokens=usage_counts(usage))
+            if on_usage is not None:
+                on_usage(usage)
+
+        if self.stage == "attempt":
+            chunks = self.inner.agenerate_stream(model, contents, config, task, on_usage=record)
+        else:
+            chunks = self.inner.agenerate_stream(model, contents, config, task, on_usage=on_usage)
+        first = True
+        with step:
+            try:
+                async for chunk in chunks:
+                    if first:
+                        step.set(first_chunk_ms=round((time.perf_counter() - start) * 1000, 3))
+                        if self.stage == "call":
+                            LLM_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - start, agent=agent_for_task(task), model=model)
+                    first = False
+                    yield chunk
+            except BaseException as e:
+                self._observe(task, model, _outcome(e), time.perf_counter() - start)
+                step.set(outcome=_outcome(e))
+                raise
+            finally:
+                await chunks.aclose()
+            self._observe(task, model, "ok", time.perf_counter() - start)
+
+    async def acache_context(self, model, system_instruction, ttl_seconds):
+        return await self.inner.acache_context(model, system_instruction, ttl_seconds)
+
+    def generate(self, model, contents, config=None, task=None):
+        return run_sync(self.agenerate(model, contents, config, task))
+
+    def generate_stream(self, model, contents, config=None, task=None):
+        return iterate_sync(self.agenerate_stream(model, contents, config, task))
+
+    def cache_context(self, model, system_instruction, ttl_seconds):
+        return run_sync(self.acache_context(model, system_instruction, ttl_seconds))
+
+    def stats(self):
+        return self.inner.stats()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host="0.0.0.0"):
+    """Serve the registry at http://host:port/metrics from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fitsync-metrics", daemon=True).start()
+    return server
+
+
+def write_file(path):
+    """Write the registry to path atomically."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+
+def _write_periodically(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_file(path)
+        except OSError as e:
+            log.error("❌ Writing metrics to %s failed: %s", path, e)
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter_from_env():
+    """Start the HTTP endpoint and/or file writer configured in the environment, once per process."""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+    port = os.getenv("FITSYNC_METRICS_PORT")
+    if port:
+        host = os.getenv("FITSYNC_METRICS_HOST", "0.0.0.0")
+        try:
+            serve(int(port), host)
+            log.info("📈 Serving metrics on http://%s:%s/metrics", host, port)
+        except OSError as e:
+            # Another process on the host already has the port
+            log.error("❌ Metrics endpoint on port %s not started: %s", port, e)
+    path = os.getenv("FITSYNC_METRICS_FILE")
+    if path:
+        interval = float(os.getenv("FITSYNC_METRICS_INTERVAL", 15))
+        threading.Thread(target=_write_periodically, args=(path, interval),
+                         name="fitsync-metrics-file", daemon=True).start()
+        atexit.register(write_file, path)
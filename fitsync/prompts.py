@@ -0,0 +1,176 @@
+"""
+Prompt builders shared by the Streamlit apps and the offline batch jobs.
+
+The plan prompts only describe the task. The JSON shape of each plan is
+enforced with a response schema (see fitsync/schemas.py).
+"""
+
+
+def build_meal_plan_prompt(targets, gender, age, goal):
+    """Prompt for the 1-day meal plan in app.py."""
+    return f"""You are a professional nutritionist. Create a detailed 1-day meal plan for:
+- Gender: {gender}
+- Age: {age}
+- Goal: {goal}
+- Daily Calorie Target: {targets['daily_calories']} kcal
+- Daily Protein Target: {targets['daily_protein_g']}g
+
+Generate a meal plan with 4 meals (Breakfast, Lunch, Snack, Dinner).
+
+Ensure the total calories and protein match the targets closely."""
+
+
+def build_workout_plan_prompt(gender, age, goal):
+    """Prompt for the 7-day workout split in app.py."""
+    return f"""You are a professional fitness coach. Create a 7-day workout split for:
+- Gender: {gender}
+- Age: {age}
+- Goal: {goal}
+
+Generate a balanced weekly workout plan with varied focus areas.
+
+Include all 7 days. Intensity score should be 1-10. Total sets should vary between 12-24."""
+
+
+def build_comprehensive_meal_plan_prompt(targets, gender, age, goal, dietary_preferences=""):
+    """Prompt for the multi-option meal plan in chatbot_app.py."""
+    return f"""You are a professional nutritionist. Create a comprehensive meal plan for:
+- Gender: {gender}
+- Age: {age}
+- Goal: {goal}
+- Daily Calorie Target: {targets['daily_calories']} kcal
+- Daily Protein Target: {targets['daily_protein_g']}g
+{f"- Dietary Preferences: {dietary_preferences}" if dietary_preferences else ""}
+
+Generate a detailed meal plan with 5 meals (Breakfast, Mid-Morning Snack, Lunch, Evening Snack, Dinner).
+For EACH meal, provide 3-4 different food options so the user has variety and choices.
+Include daily totals, a hydration tip and meal timing tips.
+
+Make sure to provide diverse, realistic food options with specific quantities."""
+
+
+def build_meal_slot_prompt(meal_time, slot_targets, gender, age, goal, dietary_preferences=""):
+    """Prompt for one meal of the comprehensive meal plan, when the meals are generated in parallel."""
+    return f"""You are a professional nutritionist. Create the {meal_time} of a daily meal plan for:
+- Gender: {gender}
+- Age: {age}
+- Goal: {goal}
+- {meal_time} Calorie Target: {slot_targets['calories']} kcal
+- {meal_time} Protein Target: {slot_targets['protein_g']}g
+{f"- Dietary Preferences: {dietary_preferences}" if dietary_preferences else ""}
+
+Provide 3-4 different food options for this meal so the user has variety and choices.
+Each option should come close to the calorie and protein targets above.
+
+Make sure to provide diverse, realistic food options with specific quantities."""
+
+
+def build_meal_option_names_prompt(meals):
+    """Prompt asking for dish names for the options of a meal plan whose foods are already chosen."""
+    options = "\n".join(
+        f"{number}. {meal['meal_time']}: "
+        + ", ".join(f"{food['item']} ({food['quantity']})" for food in option["foods"])
+        for number, (meal, option) in enumerate(
+            ((meal, option) for meal in meals for option in meal["options"]), 1
+        )
+    )
+    return f"""You are a professional nutritionist. The foods of each meal option below are fixed:
+
+{options}
+
+Give every option a short, appetizing dish name (2-5 words) that describes how these foods are eaten together.
+Return exactly one name per option, in the same order, without numbering."""
+
+
+def build_detailed_workout_plan_prompt(gender, age, goal, fitness_level="Intermediate"):
+    """Prompt for the detailed 7-day workout plan in chatbot_app.py."""
+    return f"""You are a professional fitness coach. Create a detailed 7-day workout split for:
+- Gender: {gender}
+- Age: {age}
+- Goal: {goal}
+- Fitness Level: {fitness_level}
+
+Generate a complete weekly workout plan with specific exercises, sets, reps, rest periods, and tempo.
+Include a weekly summary, progression tips and recovery tips.
+
+Include all 7 days with varied exercises. Tempo format: eccentric-pause-concentric-pause (in seconds)."""
+
+
+def build_workout_notes_prompt(gender, age, goal, fitness_level, weekly_plan):
+    """Prompt asking for coaching notes for the exercises of a workout plan whose exercises are already chosen."""
+    exercises = "\n".join(
+        f"{number}. {day['day']} ({day['focus']}): {exercise['exercise_name']}, "
+        f"{exercise['sets']} x {exercise['reps']}"
+        for number, (day, exercise) in enumerate(
+            ((day, exercise) for day in weekly_plan for exercise in day["exercises"]), 1
+        )
+    )
+    return f"""You are a professional fitness coach. The exercises, sets and reps of this weekly plan are fixed:
+
+{exercises}
+
+The trainee: {gender}, age {age}, goal {goal}, fitness level {fitness_level}.
+Write one short coaching note (at most 12 words) per exercise: a form cue or how to progress it for this trainee.
+Return exactly one note per exercise, in the same order, without numbering."""
+
+
+def build_chat_prompt(user_message, user_profile):
+    """Prompt for a single chat turn, personalized with the saved profile."""
+    context = ""
+    if user_profile:
+        context = f"""User Profile:
+- Gender: {user_profile['gender']}
+- Age: {user_profile['age']}
+- Height: {user_profile['height_cm']} cm
+- Weight: {user_profile['weight_kg']} kg
+- Goal: {user_profile['goal']}
+- Daily Calorie Target: {user_profile['targets']['daily_calories']} kcal
+- Daily Protein Target: {user_profile['targets']['daily_protein_g']}g
+"""
+
+    return f"""{context}
+
+You are FitSync Pro AI, an expert fitness and nutrition coach. Answer the user's question with:
+- Specific, actionable advice
+- Scientific backing when relevant
+- Personalized recommendations based on their profile
+- Encouragement and motivation
+
+User Question: {user_message}
+
+Provide a helpful, detailed response."""
+
+
+def build_chat_system_prompt(user_profile):
+    """Static system instruction for multi-turn chat: the coach persona plus the saved profile."""
+    context = ""
+    if user_profile:
+        context = f"""
+
+User Profile:
+- Gender: {user_profile['gender']}
+- Age: {user_profile['age']}
+- Height: {user_profile['height_cm']} cm
+- Weight: {user_profile['weight_kg']} kg
+- Goal: {user_profile['goal']}
+- Daily Calorie Target: {user_profile['targets']['daily_calories']} kcal
+- Daily Protein Target: {user_profile['targets']['daily_protein_g']}g"""
+
+    return f"""You are FitSync Pro AI, an expert fitness and nutrition coach. Answer the user's questions with:
+- Specific, actionable advice
+- Scientific backing when relevant
+- Personalized recommendations based on their profile
+- Encouragement and motivation
+
+Use the earlier conversation for context on follow-up questions. Provide helpful, detailed responses.{context}"""
+
+
+def build_chat_summary_prompt(previous_summary, transcript):
+    """Prompt to fold older chat turns into a running summary."""
+    earlier = f"Summary so far:\n{previous_summary}\n\n" if previous_summary else ""
+    return f"""Summarize this conversation between a user and their AI fitness coach so the coach can continue it.
+Keep facts about the user (injuries, preferences, schedule, equipment, progress), questions asked, and advice given.
+Write at most 150 words of plain text.
+
+{earlier}New turns:
+{transcript}"""
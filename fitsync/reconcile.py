@@ -0,0 +1,209 @@
+"""
+Reconcile the numbers of model-written meal plans with their foods.
+
+The calories and macros the model states for an option are often not what
+its own foods add up to, and its daily totals drift from the targets.
+reconcile_meal_plan() recomputes every option from its foods and
+quantities with the bundled nutrient table (fitsync/foods.py). When the
+plan then misses the calorie or protein target by more than
+DRIFT_TOLERANCE, it rescales the quantities (protein foods by one factor,
+everything else by another, solved so both targets are met) and recomputes
+from the rounded quantities. No model call is involved.
+
+Foods the table does not know, and quantities it cannot read, keep their
+share of the option as the model stated it.
+
+app.py's one-screen plan names its foods without quantities, so
+reconcile_simple_meal_plan() can only check each meal's calories against
+its macros and scale the portions of the whole plan to the calorie target.
+
+Configuration (environment variables):
+    FITSYNC_MEAL_RECONCILE   Set to 0 to keep the model's numbers as returned
+"""
+
+import os
+
+from fitsync.foods import MACROS, MASS_UNITS, VOLUME_UNITS, get_food_table, parse_quantity, with_amount
+
+# Plans closer than this to the calorie and protein targets are not rescaled
+DRIFT_TOLERANCE = 0.05
+# Quantities are never scaled further than this
+SCALE_LIMITS = (0.5, 2.0)
+# Stated calories this far from 4/4/9 kcal per gram of protein, carbs and fat are recomputed
+CALORIE_MISMATCH = 0.10
+# Step a rescaled amount is rounded to, by unit (counted foods: 1, or 0.5 below 2)
+ROUNDING = {"g": 5, "ml": 5, "kg": 0.05, "l": 0.05, "oz": 0.5, "lb": 0.1, "cup": 0.25}
+
+
+def reconciliation_enabled():
+    """Whether model-written meal plans are reconciled (FITSYNC_MEAL_RECONCILE, default on)."""
+    return os.getenv("FITSYNC_MEAL_RECONCILE", "1") != "0"
+
+
+def _stated(option):
+    import numpy as np
+
+    return np.array([float(option.get(name) or 0) for name in MACROS])
+
+
+def _parts(table, option):
+    """
+    Split an option into (protein food macros, other food macros, the rest
+    as stated, unknown items, [(food, index, grams)] of the known foods).
+    """
+    import numpy as np
+
+    protein, other = np.zeros(len(MACROS)), np.zeros(len(MACROS))
+    known, unknown = [], []
+    for food in option.get("foods") or []:
+        index = table.find(food.get("item", ""))
+        grams = table.grams_of(index, food.get("quantity", "")) if index is not None else None
+        if not grams:
+            unknown.append(food.get("item", ""))
+            continue
+        known.append((food, index, grams))
+        if table.groups[index] == "protein":
+            protein += table.macros_of(index, grams)
+        else:
+            other += table.macros_of(index, grams)
+    rest = np.maximum(_stated(option) - protein - other, 0) if unknown else np.zeros(len(MACROS))
+    return protein, other, rest, unknown, known
+
+
+def _set_macros(option, values):
+    for name, value in zip(MACROS, values):
+        option[name] = int(round(value))
+
+
+def reconcile_meal(meal):
+    """Recompute the numbers of every option of one meal from its foods, in place."""
+    table = get_food_table()
+    for option in meal.get("options") or []:
+        protein, other, rest, _, _ = _parts(table, option)
+        _set_macros(option, protein + other + rest)
+    return meal
+
+
+def _rounding_step(unit, amount):
+    if unit in ROUNDING:
+        return ROUNDING[unit]
+    if unit in MASS_UNITS or unit in VOLUME_UNITS:
+        return 0.5
+    return 1 if amount >= 2 else 0.5
+
+
+def _rescale(table, food, index, factor):
+    """Multiply a food's quantity by about factor, rounded to a sensible step. Returns its new weight."""
+    amount, unit, _ = parse_quantity(food["quantity"])
+    step = _rounding_step(unit, amount * factor)
+    scaled = max(round(amount * factor / step) * step, step)
+    food["quantity"] = with_amount(food["quantity"], scaled, scaled / amount)
+    return table.grams_of(index, food["quantity"])
+
+
+def _scale_factors(protein, other, rest, targets):
+    """
+    (protein food factor, other food factor) within SCALE_LIMITS that bring
+    the daily calories and protein closest to the targets.
+    """
+    import numpy as np
+
+    steps = np.linspace(*SCALE_LIMITS, 151)
+    a, b = np.meshgrid(steps, steps, indexing="ij")
+    calories = a * protein[0] + b * other[0] + rest[0]
+    protein_g = a * protein[1] + b * other[1] + rest[1]
+    error = (calories / targets["daily_calories"] - 1) ** 2 + (protein_g / targets["daily_protein_g"] - 1) ** 2
+    best = np.unravel_index(error.argmin(), error.shape)
+    return float(a[best]), float(b[best])
+
+
+def _totals(values):
+    return {f"total_{name}": int(round(value)) for name, value in zip(MACROS, values)}
+
+
+def reconcile_meal_plan(meal_data, targets=None, stated_totals=True):
+    """
+    Recompute a comprehensive meal plan's options from their foods and, given
+    calculate_targets() output, rescale the quantities when the plan misses
+    the targets. Updates meal_data in place (daily_totals are left to the
+    caller) and stores what was done under meal_data["reconciliation"].
+
+    stated_totals says whether daily_totals were written by the model; only
+    then are they reported as model_totals (fan-out plans sum them locally).
+    """
+    import numpy as np
+
+    table = get_food_table()
+    meals = meal_data.get("meals") or []
+    parts = [[_parts(table, option) for option in meal.get("options") or []] for meal in meals]
+    # Daily totals count the average option of each meal
+    daily = np.zeros((3, len(MACROS)))
+    for meal_parts in parts:
+        if meal_parts:
+            daily += np.mean([[protein, other, rest] for protein, other, rest, _, _ in meal_parts], axis=0)
+    report = {
+        "model_totals": meal_data.get("daily_totals") if stated_totals else None,
+        "food_totals": _totals(daily.sum(axis=0)),
+        "scale": None,
+        "unknown_foods": sorted({item for meal_parts in parts for part in meal_parts for item in part[3]}),
+    }
+
+    factors = None
+    if targets:
+        total = daily.sum(axis=0)
+        drift = max(
+            abs(total[0] / targets["daily_calories"] - 1),
+            abs(total[1] / targets["daily_protein_g"] - 1),
+        )
+        if drift > DRIFT_TOLERANCE:
+            factors = _scale_factors(daily[0], daily[1], daily[2], targets)
+            report["scale"] = {"protein_foods": round(factors[0], 2), "other_foods": round(factors[1], 2)}
+
+    for meal, meal_parts in zip(meals, parts):
+        for option, (protein, other, rest, _, known) in zip(meal.get("options") or [], meal_parts):
+            if factors is not None:
+                protein, other = np.zeros(len(MACROS)), np.zeros(len(MACROS))
+                for food, index, _ in known:
+                    is_protein = table.groups[index] == "protein"
+                    grams = _rescale(table, food, index, factors[0] if is_protein else factors[1])
+                    if is_protein:
+                        protein += table.macros_of(index, grams)
+                    else:
+                        other += table.macros_of(index, grams)
+            _set_macros(option, protein + other + rest)
+
+    meal_data["reconciliation"] = report
+    return meal_data
+
+
+def reconcile_simple_meal_plan(meal_data, targets=None):
+    """
+    Reconcile app.py's 1-day meal plan in place: calories that do not match
+    a meal's macros are recomputed from them, and with targets the portions
+    of every meal are scaled to the calorie target when it is missed by
+    more than DRIFT_TOLERANCE.
+    """
+    meals = meal_data.get("meals") or []
+    report = {
+        "model_totals": {f"total_{name}": sum(meal.get(name) or 0 for meal in meals) for name in MACROS},
+        "recomputed_calories": [],
+        "scale": None,
+    }
+    for meal in meals:
+        from_macros = 4 * (meal.get("protein_g") or 0) + 4 * (meal.get("carbs_g") or 0) + 9 * (meal.get("fats_g") or 0)
+        if from_macros and abs((meal.get("calories") or 0) / from_macros - 1) > CALORIE_MISMATCH:
+            meal["calories"] = int(round(from_macros))
+            report["recomputed_calories"].append(meal.get("meal"))
+
+    total = sum(meal["calories"] for meal in meals)
+    if targets and total and abs(total / targets["daily_calories"] - 1) > DRIFT_TOLERANCE:
+        low, high = SCALE_LIMITS
+        factor = min(max(targets["daily_calories"] / total, low), high)
+        for meal in meals:
+            for name in MACROS:
+                meal[name] = int(round((meal.get(name) or 0) * factor))
+            meal["food"] = f"{meal.get('food', '')} (portions ×{factor:.2f})"
+        report["scale"] = round(factor, 2)
+
+    meal_data["reconciliation"] = report
+    return meal_data
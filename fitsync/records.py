@@ -0,0 +1,147 @@
+"""
+Compact session-state records for chat messages and generated plans.
+
+Chat history lives in st.session_state for the whole session, so it is
+stored as __slots__ records rather than free-form dicts:
+
+    ChatMessage   role, text and an optional Plan
+    Plan          kind, content hash (see fitsync.views.plan_key), the
+                  one-line note used for collapsed messages and chat history,
+                  and the plan body
+
+A plan body keeps the parsed JSON losslessly but compactly: every object
+becomes a Row that shares its key tuple with all other objects of the same
+shape, lists become tuples, and short strings (meal times, days, quantities,
+exercise names) are interned so repeats across plans and sessions are
+stored once. Plan.to_dict() rebuilds the original dict when a renderer
+needs it (only on a render-cache miss).
+
+session_memory_report() measures what a session holds, for sizing servers.
+"""
+
+import sys
+
+from fitsync.views import plan_key
+
+# Strings up to this length are interned, longer ones (tips, notes) are rarely repeated
+INTERN_MAX_LEN = 64
+
+_shapes = {}
+
+
+def _shape(keys):
+    keys = tuple(sys.intern(key) for key in keys)
+    return _shapes.setdefault(keys, keys)
+
+
+class Row:
+    """A JSON object stored as a shared key tuple plus a tuple of values."""
+
+    __slots__ = ("shape", "values")
+
+    def __init__(self, shape, values):
+        self.shape = shape
+        self.values = values
+
+    def get(self, key, default=None):
+        try:
+            return self.values[self.shape.index(key)]
+        except ValueError:
+            return default
+
+
+def freeze(value):
+    """Compact form of parsed JSON: Rows, tuples and interned short strings."""
+    if isinstance(value, dict):
+        return Row(_shape(value.keys()), tuple(freeze(item) for item in value.values()))
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
+
+def thaw(value):
+    """Inverse of freeze."""
+    if isinstance(value, Row):
+        return {key: thaw(item) for key, item in zip(value.shape, value.values)}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def plan_note(kind, data):
+    """One-line stand-in for a plan in collapsed messages and chat history."""
+    if kind == "meal_plan":
+        totals = data.get("daily_totals", {})
+        return (f"[Shared a meal plan: {len(data.get('meals', []))} meals, "
+                f"{totals.get('total_calories', '?')} kcal, {totals.get('total_protein_g', '?')}g protein]")
+    days = data.get("weekly_plan", [])
+    focus = ", ".join(f"{day.get('day')}: {day.get('focus')}" for day in days)
+    return f"[Shared a 7-day workout plan. {focus}]"
+
+
+class Plan:
+    """A generated meal or workout plan held in session state."""
+
+    __slots__ = ("kind", "key", "note", "body")
+
+    def __init__(self, kind, data):
+        self.kind = sys.intern(kind)
+        self.key = plan_key(data)
+        self.note = plan_note(kind, data)
+        self.body = freeze(data)
+
+    def to_dict(self):
+        return thaw(self.body)
+
+
+class ChatMessage:
+    """One chat transcript entry: a user or assistant text, or an assistant plan."""
+
+    __slots__ = ("role", "text", "plan")
+
+    def __init__(self, role, text="", plan=None):
+        self.role = sys.intern(role)
+        self.text = text
+        self.plan = plan
+
+    @classmethod
+    def with_plan(cls, kind, data):
+        return cls("assistant", plan=Plan(kind, data))
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes held by obj and everything it references, counting shared objects once."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        for slot in getattr(type(obj), "__slots__", ()):
+            size += deep_sizeof(getattr(obj, slot, None), seen)
+        if hasattr(obj, "__dict__"):
+            size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def session_memory_report(session_state, keys=None):
+    """
+    Bytes held by each session-state entry, plus a "total".
+
+    Objects shared between entries are counted once, against the first
+    entry that holds them.
+    """
+    seen = set()
+    report = {}
+    for key in keys or list(session_state.keys()):
+        if key in session_state:
+            report[key] = deep_sizeof(session_state[key], seen)
+    report["total"] = sum(report.values())
+    return report
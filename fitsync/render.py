@@ -0,0 +1,203 @@
+"""
+Streamlit renderers for generated meal and workout plans.
+
+The renderers only emit widgets. The data work behind them (DataFrames,
+chart specs, formatted strings) is done once per plan by fitsync.views and
+memoized here with st.cache_data under the plan's content hash, so reruns
+skip it. Callers that keep a plan around (chatbot_app.py's chat history)
+pass its plan_key to avoid re-hashing the plan on every rerun.
+"""
+
+import streamlit as st
+
+from fitsync.tracing import span
+from fitsync.views import (
+    VIEW_BUILDERS,
+    meal_plan_summary_view,
+    meal_view,
+    plan_key,
+    workout_day_view,
+    workout_plan_summary_view,
+)
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def cached_view(kind, key, _plan):
+    """
+    Render model of the given kind for a plan, built once per content hash.
+    _plan is a plan dict or a fitsync.records.Plan, only read on a miss.
+    """
+    if hasattr(_plan, "to_dict"):
+        _plan = _plan.to_dict()
+    return VIEW_BUILDERS[kind](_plan)
+
+
+def plan_view(kind, plan, key=None):
+    if key is None:
+        key = plan.key if hasattr(plan, "key") else plan_key(plan)
+    return cached_view(kind, key, plan)
+
+
+def show_metrics(metrics):
+    for col, (label, value) in zip(st.columns(len(metrics)), metrics):
+        col.metric(label, value)
+
+
+# Render the Nutritionist output
+def render_meal_plan(meal_data, meal_raw_json, key=None):
+    """Render the meal table, totals and macro chart. meal_raw_json is only shown on failure."""
+    if meal_data and "meals" in meal_data:
+        view = plan_view("simple_meal_plan", meal_data, key)
+        
+        # Display meal table
+        st.subheader("Daily Meal Breakdown")
+        st.dataframe(view["table"], use_container_width=True)
+        
+        show_metrics(view["totals"])
+        if view["note"]:
+            st.caption(view["note"])
+        
+        # Macro Distribution Pie Chart
+        st.subheader("Macronutrient Distribution")
+        st.vega_lite_chart(spec=view["chart"], use_container_width=True)
+        
+        # Show agent thought process
+        with st.expander("🔍 See Agent Thought Process (Nutritionist)"):
+            st.json(meal_data)
+    else:
+        st.error(f"Error generating meal plan: {meal_raw_json}")
+
+
+# Render the Fitness Coach output
+def render_workout_plan(workout_data, workout_raw_json, key=None):
+    """Render the weekly schedule and volume chart. workout_raw_json is only shown on failure."""
+    if workout_data and "workouts" in workout_data:
+        view = plan_view("simple_workout_plan", workout_data, key)
+        
+        # Display workout table
+        st.subheader("Weekly Workout Schedule")
+        st.dataframe(view["table"], use_container_width=True)
+        
+        # Volume Bar Chart
+        st.subheader("Training Volume by Day")
+        st.vega_lite_chart(spec=view["chart"], use_container_width=True)
+        
+        # Show agent thought process
+        with st.expander("🔍 See Agent Thought Process (Fitness Coach)"):
+            st.json(workout_data)
+    else:
+        st.error(f"Error generating workout plan: {workout_raw_json}")
+
+
+# Chatbot renderers for meal and workout plans
+def show_meal(view):
+    st.markdown(view["heading"])
+    
+    for option in view["options"]:
+        with st.expander(option["label"], expanded=option["expanded"]):
+            st.markdown(option["foods"])
+            show_metrics(option["metrics"])
+    
+    st.divider()
+
+
+def display_meal(meal):
+    """Display one meal time with its food options, as it streams in."""
+    show_meal(meal_view(meal))
+
+
+def show_meal_plan_summary(view):
+    if view["totals"]:
+        st.subheader("📊 Daily Totals")
+        show_metrics(view["totals"])
+    if view["note"]:
+        st.caption(view["note"])
+    if view["hydration"]:
+        st.info(view["hydration"])
+    if view["timing"]:
+        st.success(view["timing"])
+
+
+def display_meal_plan_summary(meal_data):
+    """Display daily totals and tips below the meals."""
+    show_meal_plan_summary(meal_plan_summary_view(meal_data))
+
+
+def display_meal_plan(meal_data, key=None):
+    """Display comprehensive meal plan."""
+    view = plan_view("meal_plan", meal_data, key)
+    with span("render", view="meal_plan", meals=len(view["meals"])):
+        st.subheader("🍽️ Your Personalized Meal Plan")
+        
+        for meal in view["meals"]:
+            show_meal(meal)
+        
+        show_meal_plan_summary(view["summary"])
+
+
+def show_workout_day(view):
+    with st.expander(view["label"], expanded=False):
+        for line in view["details"]:
+            st.markdown(line)
+        
+        st.markdown("---")
+        st.markdown("### Exercises")
+        
+        if view["table"] is not None:
+            st.dataframe(view["table"], use_container_width=True, hide_index=True)
+        
+        st.markdown(view["cool_down"])
+
+
+def display_workout_day(day_plan):
+    """Display one training day with its exercise table, as it streams in."""
+    show_workout_day(workout_day_view(day_plan))
+
+
+def show_workout_plan_summary(view):
+    if view["summary"]:
+        st.subheader("📈 Weekly Summary")
+        show_metrics(view["summary"])
+    if view["progression"]:
+        st.success(view["progression"])
+    if view["recovery"]:
+        st.info(view["recovery"])
+
+
+def display_workout_plan_summary(workout_data):
+    """Display the weekly summary and tips below the training days."""
+    show_workout_plan_summary(workout_plan_summary_view(workout_data))
+
+
+def display_workout_plan(workout_data, key=None):
+    """Display detailed workout plan."""
+    view = plan_view("workout_plan", workout_data, key)
+    with span("render", view="workout_plan", days=len(view["days"])):
+        st.subheader("🏋️ Your Personalized Workout Plan")
+        
+        for day in view["days"]:
+            show_workout_day(day)
+        
+        show_workout_plan_summary(view["summary"])
+
+
+def display_chat_message(message):
+    """Fully render a stored ChatMessage (text, meal plan or workout plan)."""
+    if message.plan and message.plan.kind == "meal_plan":
+        display_meal_plan(message.plan, message.plan.key)
+    elif message.plan and message.plan.kind == "workout_plan":
+        display_workout_plan(message.plan, message.plan.key)
+    else:
+        st.write(message.text)
+
+
+def display_chat_message_summary(message, max_chars=160):
+    """
+    One-line stand-in for an older ChatMessage, cheap enough to render on
+    every rerun. Returns True if the full message has more to show.
+    """
+    text = message.plan.note if message.plan else message.text
+    if len(text) > max_chars:
+        text = text[:max_chars].rstrip() + "…"
+    st.caption(text)
+    return bool(message.plan) or text != message.text
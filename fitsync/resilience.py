@@ -0,0 +1,219 @@
+"""
+Retries, deadlines and hedged requests for LLM backends.
+
+ResilientBackend wraps any LLM backend (see fitsync.llm) so every agent call
+gets the same treatment:
+
+    deadline   each call fails with DeadlineExceeded once this many seconds
+               have passed, across all of its attempts
+    retries    transient errors (429, 5xx, timeouts, dropped connections)
+               are retried with exponential backoff and full jitter
+    hedging    optionally, if a request has not answered by the p95 latency
+               seen for its task, a duplicate is sent and whichever returns
+               first wins
+
+Attempts and hedges are coroutines on the shared event loop (fitsync.aio),
+so a hedge costs no extra thread. Streaming calls are retried and hedged up
+to their first chunk, and the losing streams are closed. Once text has
+been shown to the user the stream is not restarted.
+
+Configuration (environment variables):
+    FITSYNC_LLM_DEADLINE      Seconds per call (default: 120)
+    FITSYNC_LLM_RETRIES       Retries after the first attempt (default: 3)
+    FITSYNC_LLM_BACKOFF       Base backoff in seconds, doubled per retry (default: 0.5)
+    FITSYNC_LLM_HEDGE         Set to 1 to enable hedged requests
+    FITSYNC_LLM_HEDGE_DELAY   Hedge delay until enough latencies are observed (default: 15)
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+from collections import deque
+
+from fitsync.aio import iterate_sync, run_sync
+from fitsync.tracing import get_logger
+
+log = get_logger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Observed latencies kept per task, and how many are needed before the p95 is trusted
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+_END = object()
+
+
+class DeadlineExceeded(TimeoutError):
+    """An LLM call did not complete within its deadline."""
+
+
+def is_retryable(error):
+    """Whether error is a transient failure worth retrying."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code in RETRYABLE_STATUS
+
+
+class ResilientBackend:
+    """Backend wrapper adding a deadline, jittered retries and optional hedging."""
+
+    def __init__(self, inner, deadline=120.0, max_retries=3, backoff=0.5, max_backoff=8.0,
+                 hedge=False, hedge_delay=15.0):
+        self.inner = inner
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "retries": 0, "hedges": 0, "hedges_won": 0,
+                          "deadline_exceeded": 0, "failures": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """Return a snapshot of the call counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def _record_latency(self, key, seconds):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def _hedge_after(self, key):
+        """Seconds to wait before hedging, the observed p95 once there are enough samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return self.hedge_delay
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    async def _race(self, attempt, key, deadline, discard=None):
+        """
+        Await attempt(), hedging with a second copy if it is slow.
+
+        Returns the first successful result. If every copy fails the last
+        error is raised; if the deadline passes first, DeadlineExceeded.
+        Copies still running are cancelled; the results of copies that
+        succeeded too are passed to discard (an async function), if given.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        primary = asyncio.ensure_future(attempt())
+        pending = {primary}
+        hedge_at = start + self._hedge_after(key) if self.hedge else None
+        error = None
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceeded(f"LLM call exceeded its {self.deadline:g}s deadline")
+                timeout = deadline - now
+                if hedge_at is not None:
+                    timeout = min(timeout, max(hedge_at - now, 0))
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                if succeeded:
+                    winner = succeeded[0]
+                    self._record_latency(key, loop.time() - start)
+                    if winner is not primary:
+                        self._count("hedges_won")
+                    # Both copies finished together: release the loser's result
+                    for task in succeeded[1:]:
+                        if discard is not None:
+                            await discard(task.result())
+                    return winner.result()
+                for task in done:
+                    error = task.exception()
+                if hedge_at is not None and loop.time() >= hedge_at and primary in pending:
+                    log.info("🔁 Hedging slow %s request after %.1fs", key[0] or "LLM", hedge_at - start)
+                    self._count("hedges")
+                    pending.add(asyncio.ensure_future(attempt()))
+                    hedge_at = None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, attempt, key, discard=None):
+        """Race attempt() with retries and backoff until it succeeds or the deadline passes."""
+        self._count("calls")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        for retry in range(self.max_retries + 1):
+            try:
+                return await self._race(attempt, key, deadline, discard)
+            except Exception as e:
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+                if not is_retryable(e) or retry == self.max_retries or loop.time() + delay >= deadline:
+                    self._count("failures")
+                    raise
+                log.warning("🔁 Retrying %s request in %.2fs after: %s", key[0] or "LLM", delay, e)
+                self._count("retries")
+                await asyncio.sleep(delay)
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        return await self._call(lambda: self.inner.agenerate(model, contents, config, task), (task, "generate"))
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        async def first_chunk():
+            chunks = self.inner.agenerate_stream(model, contents, config, task, on_usage=on_usage)
+            try:
+                return await chunks.__anext__(), chunks
+            except StopAsyncIteration:
+                return _END, chunks
+            except BaseException:
+                # Failed or cancelled (a losing hedge): close the upstream stream now
+                await chunks.aclose()
+                raise
+
+        async def discard(result):
+            await result[1].aclose()
+
+        first, chunks = await self._call(first_chunk, (task, "stream"), discard)
+        try:
+            if first is _END:
+                return
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    async def acache_context(self, model, system_instruction, ttl_seconds):
+        return await self.inner.acache_context(model, system_instruction, ttl_seconds)
+
+    def generate(self, model, contents, config=None, task=None):
+        return run_sync(self.agenerate(model, contents, config, task))
+
+    def generate_stream(self, model, contents, config=None, task=None):
+        return iterate_sync(self.agenerate_stream(model, contents, config, task))
+
+    def cache_context(self, model, system_instruction, ttl_seconds):
+        return run_sync(self.acache_context(model, system_instruction, ttl_seconds))
+
+
+def resilient_from_env(inner):
+    """Wrap inner in a ResilientBackend configured from the environment."""
+    return ResilientBackend(
+        inner,
+        deadline=float(os.getenv("FITSYNC_LLM_DEADLINE", 120)),
+        max_retries=int(os.getenv("FITSYNC_LLM_RETRIES", 3)),
+        backoff=float(os.getenv("FITSYNC_LLM_BACKOFF", 0.5)),
+        hedge=os.getenv("FITSYNC_LLM_HEDGE") == "1",
+        hedge_delay=float(os.getenv("FITSYNC_LLM_HEDGE_DELAY", 15)),
+    )
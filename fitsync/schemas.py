@@ -0,0 +1,327 @@
+"""
+Typed response schemas for the plan agents.
+
+Every plan request passes its schema (response_schema() below, derived from
+the models) in GenerateContentConfig.response_schema, so Gemini is constrained to the expected shape and the prompts no longer
+carry hand-written JSON examples. Responses are validated straight from text
+into the pydantic models below (pydantic-core parses the JSON itself) and
+handed on as plain dicts.
+
+Trivially broken output (a markdown code fence, prose around the object,
+trailing commas, a response cut off mid-object) goes through a local repair
+pass before being counted as a failure, instead of another round-trip.
+
+plan_validator() is what the plan cache validates fresh responses with; it
+also keeps the process-wide parse counters returned by parse_stats().
+"""
+
+import functools
+import json
+import threading
+
+from pydantic import BaseModel, Field, ValidationError
+
+from fitsync.metrics import register_collector
+
+# Models are declared with their arrays first: Gemini emits properties in
+# declaration order, so streamed meals and days arrive before the tips.
+
+
+# app.py: 1-day meal plan
+class SimpleMeal(BaseModel):
+    meal: str
+    food: str
+    calories: int
+    protein_g: int
+    carbs_g: int
+    fats_g: int
+
+
+class SimpleMealPlan(BaseModel):
+    meals: list[SimpleMeal]
+
+
+# app.py: 7-day split
+class SimpleWorkoutDay(BaseModel):
+    day: str
+    focus: str
+    total_sets: int
+    intensity_score: int
+
+
+class SimpleWorkoutPlan(BaseModel):
+    workouts: list[SimpleWorkoutDay]
+
+
+# chatbot_app.py: meal plan with options per meal
+class Food(BaseModel):
+    item: str
+    quantity: str = Field(description="e.g. '1 cup cooked'")
+
+
+class MealOption(BaseModel):
+    option_name: str
+    foods: list[Food]
+    calories: int
+    protein_g: int
+    carbs_g: int
+    fats_g: int
+
+
+class Meal(BaseModel):
+    meal_time: str
+    options: list[MealOption]
+
+
+class DailyTotals(BaseModel):
+    total_calories: int
+    total_protein_g: int
+    total_carbs_g: int
+    total_fats_g: int
+
+
+class MealPlan(BaseModel):
+    meals: list[Meal]
+    daily_totals: DailyTotals
+    hydration_tip: str
+    meal_timing_tips: list[str]
+
+
+# Names for the options of a locally solved meal plan, in plan order
+class MealOptionNames(BaseModel):
+    option_names: list[str]
+
+
+# chatbot_app.py: detailed 7-day plan
+class Exercise(BaseModel):
+    exercise_name: str
+    sets: int
+    reps: str = Field(description="e.g. '8-10'")
+    rest_seconds: int
+    tempo: str = Field(description="e.g. '2-0-2-0'")
+    notes: str
+
+
+class TrainingDay(BaseModel):
+    day: str
+    focus: str
+    warm_up: str
+    exercises: list[Exercise] = Field(description="Empty on rest days")
+    cool_down: str
+    total_sets: int
+    estimated_duration_minutes: int
+    intensity_score: int
+
+
+class WeeklySummary(BaseModel):
+    total_training_days: int
+    rest_days: int
+    total_sets_per_week: int
+    focus_areas: list[str]
+
+
+class WorkoutPlan(BaseModel):
+    weekly_plan: list[TrainingDay]
+    weekly_summary: WeeklySummary
+    progression_tips: list[str]
+    recovery_tips: list[str]
+
+
+# Coaching notes for the exercises of a locally built workout plan, in plan order
+class WorkoutNotes(BaseModel):
+    exercise_notes: list[str]
+
+
+SCHEMAS = {
+    "meal_plan": SimpleMealPlan,
+    "workout_plan": SimpleWorkoutPlan,
+    "comprehensive_meal_plan": MealPlan,
+    # One meal of comprehensive_meal_plan, when its meals are generated in parallel
+    "meal_slot": Meal,
+    # Dish names for a meal plan solved locally (fitsync/mealsolver.py)
+    "meal_option_names": MealOptionNames,
+    "detailed_workout_plan": WorkoutPlan,
+    # Exercise notes for a workout plan built locally (fitsync/workoutgen.py)
+    "workout_notes": WorkoutNotes,
+}
+
+
+def _inline(node, defs):
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+        return {key: _inline(value, defs) for key, value in node.items() if key not in ("title", "$defs")}
+    if isinstance(node, list):
+        return [_inline(item, defs) for item in node]
+    return node
+
+
+@functools.lru_cache(maxsize=None)
+def _response_schema(kind):
+    schema = SCHEMAS[kind].model_json_schema()
+    return json.dumps(_inline(schema, schema.get("$defs", {})))
+
+
+def response_schema(kind):
+    """
+    JSON schema for kind as sent to Gemini: references inlined and the
+    generated titles dropped, since every property counts as input.
+    """
+    return json.loads(_response_schema(kind))
+
+
+class PlanParseError(ValueError):
+    """A plan response that neither validated nor could be repaired."""
+
+    def __init__(self, kind, message, doc):
+        super().__init__(f"{kind}: {message}")
+        self.doc = doc
+
+
+def _strip_trailing(out, chars):
+    """Drop trailing whitespace from out, then one trailing character from chars."""
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] in chars:
+        out.pop()
+        return True
+    return False
+
+
+def _drop_dangling_key(out):
+    """Remove a key left without a value ('"key":', or '"key"' cut off before the colon) at the end of out."""
+    colon = _strip_trailing(out, ":")
+    while out and out[-1].isspace():
+        out.pop()
+    if not out or out[-1] != '"':
+        return
+    start = len(out) - 2
+    while start > 0 and not (out[start] == '"' and out[start - 1] != "\\"):
+        start -= 1
+    before = start - 1
+    while before >= 0 and out[before].isspace():
+        before -= 1
+    # A string right after "{" or "," is a key; after ":" it is a complete value
+    if colon or (before >= 0 and out[before] in "{,"):
+        del out[start:]
+        _strip_trailing(out, ",")
+
+
+def repair_json(text):
+    """
+    Best-effort fix for trivially broken JSON object text.
+
+    Strips code fences and anything around the top-level object, drops
+    trailing commas and, for a truncated response, closes the open string
+    and brackets after discarding a dangling key. Does not guess at values.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    start = text.find("{")
+    if start < 0:
+        return text
+
+    out = []
+    closers = []
+    in_string = escape = False
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            _strip_trailing(out, ",")
+            out.append(closers.pop() if closers else char)
+            if not closers:
+                break
+            continue
+        out.append(char)
+
+    # Truncated response: finish the open string, then close every bracket
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    while closers:
+        _strip_trailing(out, ",")
+        if closers[-1] == "}":
+            _drop_dangling_key(out)
+        out.append(closers.pop())
+    return "".join(out)
+
+
+def _is_json_error(error):
+    return any(item["type"] == "json_invalid" for item in error.errors())
+
+
+def parse_plan(kind, text):
+    """
+    Validate a plan response into its schema and return (plan dict, repaired).
+
+    Raises PlanParseError if the text does not validate, even after repair.
+    """
+    schema = SCHEMAS[kind]
+    try:
+        return schema.model_validate_json(text).model_dump(exclude_unset=True), False
+    except ValidationError as e:
+        error = e
+    repaired = repair_json(text)
+    if repaired != text:
+        try:
+            return schema.model_validate_json(repaired).model_dump(exclude_unset=True), True
+        except ValidationError as e:
+            error = e
+    problem = "invalid JSON" if _is_json_error(error) else f"{error.error_count()} schema errors"
+    raise PlanParseError(kind, f"{problem}: {error.errors()[0]['msg']}", text)
+
+
+_counters = {"parsed": 0, "repaired": 0, "failed": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def plan_validator(kind):
+    """
+    Validation hook for the plan cache (see fitsync.cache).
+
+    Counts every fresh response as parsed, repaired or failed, and raises
+    for failures so they are never cached. Returns the text to cache: the
+    response itself, or the validated plan as JSON when it only parsed after
+    repair, so cache hits never need repairing again.
+    """
+    def validate(text):
+        try:
+            plan, repaired = parse_plan(kind, text)
+        except PlanParseError:
+            _count("failed")
+            raise
+        _count("repaired" if repaired else "parsed")
+        return json.dumps(plan) if repaired else text
+    return validate
+
+
+def parse_stats():
+    """Return parse outcome counts for fresh plan responses and the failure rate."""
+    with _counters_lock:
+        stats = dict(_counters)
+    total = sum(stats.values())
+    stats["failure_rate"] = round(stats["failed"] / total, 4) if total else 0.0
+    return stats
+
+
+register_collector("plan_parse", parse_stats, counters=("parsed", "repaired", "failed"))
@@ -0,0 +1,241 @@
+"""
+Single-flight coalescing of identical in-flight LLM requests.
+
+When several sessions send the same prompt at the same moment (an
+onboarding cohort with the same profile, for example), only the first one
+goes upstream. The others join its flight and receive the same response:
+plain calls (sync or async) wait for the result, streaming calls replay the
+chunks received so far and then follow the live stream.
+
+Flights are keyed by the plan cache key (model, prompt and config), and
+only live while the upstream request is running. Completed responses are
+served by the plan cache instead.
+"""
+
+import asyncio
+import contextvars
+import threading
+
+from fitsync.metrics import register_collector
+from fitsync.tracing import get_logger
+
+log = get_logger(__name__)
+
+
+class FlightCancelled(Exception):
+    """The request leading a flight was cancelled or interrupted before it answered."""
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Flight:
+    """One upstream request and everything its followers need to read it."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.result = None
+        self.condition = threading.Condition()
+        self.callbacks = []
+        self.followers = 0
+
+    def finish(self, result=None, error=None):
+        with self.condition:
+            self.result = result
+            self.error = error
+            self.done = True
+            self.condition.notify_all()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    async def wait_async(self):
+        """Like wait, for a follower running on an event loop."""
+        loop = asyncio.get_running_loop()
+        landed = loop.create_future()
+        with self.condition:
+            if self.done:
+                landed.set_result(None)
+            else:
+                self.callbacks.append(lambda: loop.call_soon_threadsafe(_resolve, landed))
+        await landed
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def wait(self):
+        with self.condition:
+            while not self.done:
+                self.condition.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def follow(self):
+        """Yield every chunk of the flight, blocking for chunks still to come."""
+        index = 0
+        while True:
+            with self.condition:
+                while index == len(self.chunks) and not self.done:
+                    self.condition.wait()
+                chunks = self.chunks[index:]
+                done, error = self.done, self.error
+            yield from chunks
+            index += len(chunks)
+            if done and index == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight requests with coalescing counters."""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    def _join(self, key):
+        """Return (flight, is_leader) for key, registering a new flight if none is running."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self._counters["coalesced"] += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self._counters["leaders"] += 1
+            return flight, True
+
+    def _land(self, key, flight, result=None, error=None):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(result, error)
+
+    def do(self, key, fn):
+        """Return fn(), sharing one call among concurrent callers with the same key."""
+        flight, leader = self._join(key)
+        if not leader:
+            log.info("🤝 Joined an identical in-flight request")
+            return flight.wait()
+        try:
+            result = fn()
+        except Exception as e:
+            self._land(key, flight, error=e)
+            raise
+        except BaseException:
+            # Followers get an error of their own instead of waiting forever
+            self._land(key, flight, error=FlightCancelled("The identical request this one joined was cancelled"))
+            raise
+        self._land(key, flight, result=result)
+        return result
+
+    def _detach(self, key, flight):
+        """
+        Whether a flight whose leader went away still has followers. If not,
+        it is unregistered so the next identical call starts a new one.
+        """
+        with self._lock:
+            if flight.followers:
+                return True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            return False
+
+    def _land_task(self, key, flight, task):
+        if task.cancelled():
+            self._land(key, flight, error=FlightCancelled("The identical request this one joined was cancelled"))
+        elif task.exception() is not None:
+            self._land(key, flight, error=task.exception())
+        else:
+            self._land(key, flight, result=task.result())
+
+    async def do_async(self, key, fn):
+        """
+        Return await fn(), sharing one call among concurrent callers with the same key.
+
+        If the leader is cancelled while others wait on its call, the call
+        keeps running for them; otherwise it is cancelled too.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            log.info("🤝 Joined an identical in-flight request")
+            return await flight.wait_async()
+        task = asyncio.ensure_future(fn())
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._detach(key, flight):
+                task.add_done_callback(lambda done: self._land_task(key, flight, done))
+            else:
+                task.cancel()
+                flight.finish(error=FlightCancelled("The identical request this one joined was cancelled"))
+            raise
+        except Exception as e:
+            self._land(key, flight, error=e)
+            raise
+        except BaseException:
+            task.cancel()
+            self._land(key, flight, error=FlightCancelled("The identical request this one joined was interrupted"))
+            raise
+        self._land(key, flight, result=result)
+        return result
+
+    def stream(self, key, fn):
+        """
+        Yield the chunks of fn(), sharing one stream among concurrent callers.
+
+        The leader's stream is drained on a background thread, so followers
+        (and the plan cache) still get the full response if the session
+        that started it goes away.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            # Run in the caller's context so the stream's spans keep their parent
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(self._pump, key, flight, fn), daemon=True).start()
+        else:
+            log.info("🤝 Joined an identical in-flight stream")
+        yield from flight.follow()
+
+    def _pump(self, key, flight, fn):
+        try:
+            for chunk in fn():
+                with flight.condition:
+                    flight.chunks.append(chunk)
+                    flight.condition.notify_all()
+        except Exception as e:
+            self._land(key, flight, error=e)
+            return
+        except BaseException:
+            self._land(key, flight, error=FlightCancelled("The identical stream this one joined was interrupted"))
+            raise
+        self._land(key, flight)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self):
+        """Return leader and coalesced call counts and the coalesced share of all calls."""
+        with self._lock:
+            stats = dict(self._counters)
+        total = stats["leaders"] + stats["coalesced"]
+        stats["coalesced_rate"] = round(stats["coalesced"] / total, 4) if total else 0.0
+        stats["in_flight"] = self.in_flight()
+        return stats
+
+
+_single_flight = SingleFlight()
+register_collector("singleflight", _single_flight.stats, counters=("leaders", "coalesced"))
+
+
+def get_single_flight():
+    """Return the process-wide SingleFlight registry."""
+    return _single_flight
@@ -0,0 +1,125 @@
+"""Calorie and protein target calculations."""
+
+
+def calculate_targets(gender, age, height_cm, weight_kg, goal):
+    """
+    Calculate Basal Metabolic Rate (BMR) using Mifflin-St Jeor Equation
+    and daily calorie/protein targets based on fitness goal.
+    """
+    # BMR calculation
+    if gender.lower() == "male":
+        bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age + 5
+    else:
+        bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age - 161
+    
+    # Activity multiplier (assuming moderate activity)
+    tdee = bmr * 1.55
+    
+    # Adjust based on goal
+    if goal == "Lose Weight":
+        daily_calories = tdee - 500
+        protein_g = weight_kg * 2.2  # Higher protein for weight loss
+    elif goal == "Gain Muscle":
+        daily_calories = tdee + 300
+        protein_g = weight_kg * 2.0
+    else:  # Maintain
+        daily_calories = tdee
+        protein_g = weight_kg * 1.8
+    
+    return {
+        "bmr": round(bmr, 1),
+        "tdee": round(tdee, 1),
+        "daily_calories": round(daily_calories, 1),
+        "daily_protein_g": round(protein_g, 1)
+    }
+
+
+def _round_1(values):
+    """Round an array to 1 decimal exactly like Python's round(x, 1)."""
+    import numpy as np
+
+    rounded = np.round(values, 1)
+    # np.round scales by 10 before rounding, so values within float error of a
+    # .x5 boundary can tip the wrong way. Decide those exactly: with
+    # |x| = mantissa * 2**-shift, |x| is above, on or below the boundary
+    # (k + 0.5) / 10 as mantissa * 20 compares to (2k + 1) * 2**shift.
+    magnitude = np.abs(values)
+    scaled = magnitude * 10
+    near = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near.any():
+        fraction, exponent = np.frexp(magnitude[near])
+        mantissa = (fraction * 2.0**53).astype(np.int64)
+        shift = (53 - exponent).astype(np.int64)
+        k = np.floor(scaled[near]).astype(np.int64)
+        lhs = mantissa * 20
+        rhs = np.left_shift(2 * k + 1, shift)
+        # Exact ties round half to even, as Python does
+        up = (lhs > rhs) | ((lhs == rhs) & (k % 2 == 1))
+        rounded[near] = np.copysign((k + up) / 10, values[near])
+    return rounded
+
+
+def _per_label(labels, fn):
+    """Evaluate fn once per distinct label and broadcast the results to every row."""
+    import numpy as np
+    import pandas as pd
+
+    if not isinstance(labels, pd.Series):
+        labels = np.asarray(labels, dtype=object).ravel()
+    codes, uniques = pd.factorize(labels)
+    return np.array([fn(str(label)) for label in uniques])[codes]
+
+
+def calculate_targets_arrays(gender, age, height_cm, weight_kg, goal):
+    """
+    Vectorized calculate_targets over NumPy arrays, pandas Series or lists.
+
+    Returns a dict of float64 arrays with the same keys as calculate_targets,
+    matching it value for value, including rounding.
+    """
+    import numpy as np
+
+    age = np.asarray(age, dtype=np.float64)
+    height_cm = np.asarray(height_cm, dtype=np.float64)
+    weight_kg = np.asarray(weight_kg, dtype=np.float64)
+
+    # BMR calculation (Mifflin-St Jeor)
+    is_male = _per_label(gender, lambda label: label.lower() == "male")
+    bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age + np.where(is_male, 5.0, -161.0)
+    
+    # Activity multiplier (assuming moderate activity)
+    tdee = bmr * 1.55
+    
+    # Adjust based on goal
+    goal = _per_label(goal, lambda label: label)
+    lose = goal == "Lose Weight"
+    gain = goal == "Gain Muscle"
+    daily_calories = np.select([lose, gain], [tdee - 500, tdee + 300], default=tdee)
+    protein_g = np.select([lose, gain], [weight_kg * 2.2, weight_kg * 2.0], default=weight_kg * 1.8)
+    
+    return {
+        "bmr": _round_1(bmr),
+        "tdee": _round_1(tdee),
+        "daily_calories": _round_1(daily_calories),
+        "daily_protein_g": _round_1(protein_g)
+    }
+
+
+def calculate_targets_frame(profiles):
+    """
+    Vectorized calculate_targets over a DataFrame of profiles.
+
+    profiles needs gender, age, height_cm, weight_kg and goal columns. Returns
+    a DataFrame with bmr, tdee, daily_calories and daily_protein_g columns on
+    the same index.
+    """
+    import pandas as pd
+
+    targets = calculate_targets_arrays(
+        profiles["gender"],
+        profiles["age"].to_numpy(),
+        profiles["height_cm"].to_numpy(),
+        profiles["weight_kg"].to_numpy(),
+        profiles["goal"]
+    )
+    return pd.DataFrame(targets, index=profiles.index)
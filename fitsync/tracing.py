@@ -0,0 +1,218 @@
+"""
+Leveled logging and tracing spans for the apps and agents.
+
+Log messages go through the standard logging module under the "fitsync"
+logger, printed to the terminal from FITSYNC_LOG_LEVEL up. Spans time the
+steps of a request (profile load, prompt build, API call, parse, render)
+and nest through contextvars, so the spans started by an agent coroutine on
+the shared event loop still point at the app span that started it.
+
+Spans and log events are only recorded when a sink is configured. Without
+one, span() returns a shared no-op and traced() returns the function
+itself, so instrumented code pays one global lookup.
+
+Configuration (environment variables):
+    FITSYNC_LOG_LEVEL     Terminal log level: debug, info, warning, error
+                          or off (default: warning)
+    FITSYNC_TRACE_FILE    Append spans and log events to this file as JSON lines
+    FITSYNC_DEBUG_PANEL   Set to 1 to keep recent spans in memory and show
+                          them in the chatbot's developer debug panel
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING,
+          "error": logging.ERROR, "off": logging.CRITICAL + 1}
+PANEL_SIZE = 500
+
+logger = logging.getLogger("fitsync")
+
+_current = contextvars.ContextVar("fitsync_span", default=None)
+_sinks = []
+_panel = None
+_file_lock = threading.Lock()
+
+
+def get_logger(name):
+    """Logger for a fitsync module, configured by this module on import."""
+    return logging.getLogger(name)
+
+
+def _new_id():
+    return os.urandom(8).hex()
+
+
+def _emit(record):
+    for sink in _sinks:
+        sink(record)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """One timed step, emitted to the sinks when it ends."""
+
+    __slots__ = ("name", "attrs", "trace_id", "span_id", "parent_id", "activate", "_start", "_wall", "_token")
+
+    def __init__(self, name, attrs, activate=True):
+        parent = _current.get()
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = parent.trace_id if parent else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.activate = activate
+        self._token = None
+
+    def set(self, **attrs):
+        """Add attributes known only once the step has run (sizes, counts)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        if self.activate:
+            self._token = _current.set(self)
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Exited from another context, e.g. a generator closed elsewhere
+                pass
+        record = {
+            "type": "span",
+            "name": self.name,
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "ts": self._wall,
+            "duration_ms": round(duration * 1000, 3),
+            "status": "ok" if exc_type is None else "error",
+            "attrs": self.attrs,
+        }
+        if exc is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        _emit(record)
+        return False
+
+
+def enabled():
+    """Whether spans are being recorded."""
+    return bool(_sinks)
+
+
+def span(name, activate=True, **attrs):
+    """
+    Context manager timing one step of a request.
+
+    Spans started inside it become its children. Pass activate=False for
+    spans held open across yields (streaming generators), which would
+    otherwise leak into the consumer's context.
+    """
+    if not _sinks:
+        return _NOOP
+    return Span(name, attrs, activate)
+
+
+def traced(name, fn, **attrs):
+    """fn wrapped so every call runs in a span, or fn itself when tracing is off."""
+    if not _sinks:
+        return fn
+
+    def call(*args, **kwargs):
+        with Span(name, dict(attrs)):
+            return fn(*args, **kwargs)
+    return call
+
+
+def recent(limit=200):
+    """The newest records kept for the debug panel, oldest first."""
+    if _panel is None:
+        return []
+    return list(_panel)[-limit:]
+
+
+def debug_panel_enabled():
+    return _panel is not None
+
+
+class _SinkHandler(logging.Handler):
+    """Forwards log records to the sinks as events of the current span."""
+
+    def emit(self, record):
+        current = _current.get()
+        _emit({
+            "type": "event",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "ts": record.created,
+            "trace": current.trace_id if current else None,
+            "span": current.span_id if current else None,
+        })
+
+
+def _file_sink(path):
+    # Line buffered, so every record is on disk as soon as it is written
+    f = open(path, "a", encoding="utf-8", buffering=1)
+
+    def write(record):
+        line = json.dumps(record, default=str) + "\n"
+        with _file_lock:
+            f.write(line)
+    return write
+
+
+def configure_from_env():
+    """Set up the terminal handler and sinks from the environment."""
+    global _panel
+    level = LEVELS[os.getenv("FITSYNC_LOG_LEVEL", "warning").lower()]
+    logger.handlers.clear()
+    logger.propagate = False
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(console)
+
+    _sinks.clear()
+    _panel = None
+    path = os.getenv("FITSYNC_TRACE_FILE")
+    if path:
+        _sinks.append(_file_sink(path))
+    if os.getenv("FITSYNC_DEBUG_PANEL") == "1":
+        _panel = deque(maxlen=PANEL_SIZE)
+        _sinks.append(_panel.append)
+    if _sinks:
+        # Recorded events include info messages even when the terminal is quieter
+        level = min(level, logging.INFO)
+        handler = _SinkHandler()
+        handler.setLevel(level)
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+configure_from_env()
@@ -0,0 +1,213 @@
+"""
+Render-ready views of generated plans.
+
+Each builder turns a plan dict into everything its renderer needs
+(DataFrames, Vega-Lite chart specs, formatted strings), so that work runs
+once per plan rather than on every Streamlit rerun. fitsync.render memoizes
+the views with st.cache_data under plan_key, a hash of the plan's content.
+
+The builders only depend on pandas and altair (imported on first use), not
+on Streamlit.
+"""
+
+import hashlib
+import json
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def plan_key(plan):
+    """Content hash identifying a plan's view in the render cache."""
+    return hashlib.sha256(json.dumps(plan, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def bullet_list(title, items):
+    return title + "\n" + "\n".join(f"- {item}" for item in items)
+
+
+def reconciliation_note(meal_data):
+    """One line on what fitsync/reconcile.py changed in a meal plan, or None."""
+    report = meal_data.get("reconciliation")
+    if not report:
+        return None
+    parts = []
+    # model_totals is only reported when the model stated them (not for fan-out plans)
+    model, foods = report.get("model_totals"), report.get("food_totals")
+    if model and foods:
+        parts.append(f"the model stated {model['total_calories']} kcal / {model['total_protein_g']}g protein, "
+                     f"its foods add up to {foods['total_calories']} kcal / {foods['total_protein_g']}g")
+    if report.get("recomputed_calories"):
+        parts.append("calories recomputed from the macros for " + ", ".join(report["recomputed_calories"]))
+    scale = report.get("scale")
+    if isinstance(scale, dict):
+        parts.append(f"portions scaled ×{scale['protein_foods']:.2f} (protein foods) "
+                     f"and ×{scale['other_foods']:.2f} (the rest) to meet your targets")
+    elif scale:
+        parts.append(f"portions scaled ×{scale:.2f} to meet your calorie target")
+    if report.get("unknown_foods"):
+        parts.append("kept as stated: " + ", ".join(report["unknown_foods"]))
+    return "🧾 Checked against the food table: " + "; ".join(parts) + "." if parts else None
+
+
+# app.py views
+def simple_meal_plan_view(meal_data):
+    """Meal table, formatted totals and macro pie spec for the 1-day meal plan."""
+    import altair as alt
+    import pandas as pd
+
+    df_meals = pd.DataFrame(meal_data["meals"])
+    total_protein = df_meals["protein_g"].sum()
+    total_carbs = df_meals["carbs_g"].sum()
+    total_fats = df_meals["fats_g"].sum()
+
+    macro_data = pd.DataFrame({
+        "Macro": ["Protein", "Carbs", "Fats"],
+        "Grams": [total_protein, total_carbs, total_fats]
+    })
+    pie_chart = alt.Chart(macro_data).mark_arc().encode(
+        theta=alt.Theta(field="Grams", type="quantitative"),
+        color=alt.Color(field="Macro", type="nominal",
+                        scale=alt.Scale(domain=["Protein", "Carbs", "Fats"],
+                                        range=["#FF6B6B", "#4ECDC4", "#FFE66D"])),
+        tooltip=["Macro", "Grams"]
+    ).properties(
+        width=400,
+        height=400
+    )
+
+    return {
+        "table": df_meals,
+        "totals": [
+            ("Total Calories", f"{df_meals['calories'].sum()} kcal"),
+            ("Total Protein", f"{total_protein}g"),
+            ("Total Carbs", f"{total_carbs}g"),
+            ("Total Fats", f"{total_fats}g"),
+        ],
+        "chart": pie_chart.to_dict(),
+        "note": reconciliation_note(meal_data),
+    }
+
+
+def simple_workout_plan_view(workout_data):
+    """Weekly schedule table and volume bar spec for the 7-day split."""
+    import altair as alt
+    import pandas as pd
+
+    df_workouts = pd.DataFrame(workout_data["workouts"])
+    bar_chart = alt.Chart(df_workouts).mark_bar().encode(
+        x=alt.X("day:N", sort=DAYS, title="Day of Week"),
+        y=alt.Y("total_sets:Q", title="Total Sets (Volume)"),
+        color=alt.Color("intensity_score:Q",
+                        scale=alt.Scale(scheme="redyellowgreen", reverse=True),
+                        title="Intensity"),
+        tooltip=["day", "focus", "total_sets", "intensity_score"]
+    ).properties(
+        width=700,
+        height=400
+    )
+
+    return {"table": df_workouts, "chart": bar_chart.to_dict()}
+
+
+# chatbot_app.py views
+def meal_view(meal):
+    """Heading, food lists and metric strings for one meal time."""
+    options = []
+    for idx, option in enumerate(meal.get("options", []), 1):
+        options.append({
+            "label": f"✨ {option['option_name']}",
+            "expanded": idx == 1,
+            "foods": "**Foods:**\n" + "\n".join(f"- {food['item']}: `{food['quantity']}`" for food in option.get("foods", [])),
+            "metrics": [
+                ("Calories", f"{option['calories']} kcal"),
+                ("Protein", f"{option['protein_g']}g"),
+                ("Carbs", f"{option['carbs_g']}g"),
+                ("Fats", f"{option['fats_g']}g"),
+            ],
+        })
+    return {"heading": f"### {meal['meal_time']}", "options": options}
+
+
+def meal_plan_summary_view(meal_data):
+    """Daily totals and tips shown below the meals."""
+    view = {"totals": None, "hydration": None, "timing": None, "note": reconciliation_note(meal_data)}
+    if "daily_totals" in meal_data:
+        totals = meal_data["daily_totals"]
+        view["totals"] = [
+            ("Total Calories", f"{totals['total_calories']} kcal"),
+            ("Total Protein", f"{totals['total_protein_g']}g"),
+            ("Total Carbs", f"{totals['total_carbs_g']}g"),
+            ("Total Fats", f"{totals['total_fats_g']}g"),
+        ]
+    if "hydration_tip" in meal_data:
+        view["hydration"] = f"💧 {meal_data['hydration_tip']}"
+    if "meal_timing_tips" in meal_data:
+        view["timing"] = bullet_list("⏰ **Meal Timing Tips:**", meal_data["meal_timing_tips"])
+    return view
+
+
+def meal_plan_view(meal_data):
+    return {
+        "meals": [meal_view(meal) for meal in meal_data.get("meals", [])],
+        "summary": meal_plan_summary_view(meal_data),
+    }
+
+
+def workout_day_view(day_plan):
+    """Expander label, details and exercise table for one training day."""
+    import pandas as pd
+
+    table = None
+    exercises = day_plan.get("exercises", [])
+    if exercises:
+        table = pd.DataFrame([{
+            "Exercise": ex["exercise_name"],
+            "Sets": ex["sets"],
+            "Reps": ex["reps"],
+            "Rest (sec)": ex["rest_seconds"],
+            "Tempo": ex.get("tempo", "N/A"),
+            "Notes": ex.get("notes", "")
+        } for ex in exercises])
+
+    return {
+        "label": f"📅 {day_plan['day']} - {day_plan['focus']}",
+        "details": [
+            f"**Warm-up:** {day_plan.get('warm_up', 'N/A')}",
+            f"**Duration:** ~{day_plan.get('estimated_duration_minutes', 'N/A')} minutes",
+            f"**Intensity:** {day_plan.get('intensity_score', 'N/A')}/10",
+        ],
+        "table": table,
+        "cool_down": f"**Cool-down:** {day_plan.get('cool_down', 'N/A')}",
+    }
+
+
+def workout_plan_summary_view(workout_data):
+    """Weekly summary metrics and tips shown below the training days."""
+    view = {"summary": None, "progression": None, "recovery": None}
+    if "weekly_summary" in workout_data:
+        summary = workout_data["weekly_summary"]
+        view["summary"] = [
+            ("Training Days", summary.get("total_training_days", "N/A")),
+            ("Rest Days", summary.get("rest_days", "N/A")),
+            ("Total Sets/Week", summary.get("total_sets_per_week", "N/A")),
+        ]
+    if "progression_tips" in workout_data:
+        view["progression"] = bullet_list("💪 **Progression Tips:**", workout_data["progression_tips"])
+    if "recovery_tips" in workout_data:
+        view["recovery"] = bullet_list("🛌 **Recovery Tips:**", workout_data["recovery_tips"])
+    return view
+
+
+def workout_plan_view(workout_data):
+    return {
+        "days": [workout_day_view(day) for day in workout_data.get("weekly_plan", [])],
+        "summary": workout_plan_summary_view(workout_data),
+    }
+
+
+VIEW_BUILDERS = {
+    "simple_meal_plan": simple_meal_plan_view,
+    "simple_workout_plan": simple_workout_plan_view,
+    "meal_plan": meal_plan_view,
+    "workout_plan": workout_plan_view,
+}
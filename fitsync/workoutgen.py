@@ -0,0 +1,309 @@
+"""
+Deterministic local workout planner over a bundled exercise library.
+
+The exercise library (fitsync/data/exercises.csv) tags every exercise with
+the muscle group it trains, whether it is a compound, isolation or
+conditioning movement, its equipment and the lowest fitness level it suits.
+A week is built from a split template per fitness level (full body three
+times a week, upper/lower four times, push/pull/legs six times, plus a
+conditioning day when losing weight) and a weekly set target per muscle
+group, scaled by goal and age. Each muscle's weekly sets are spread over
+the split days that train it, cut into exercises of at most
+MAX_SETS_PER_EXERCISE sets, and filled from the library (a compound first,
+then isolation work), rotating through the exercises so repeated days
+differ. Reps, rest and tempo come from the goal. The result has the shape
+of the detailed workout plan and meets the set targets exactly, in well
+under a millisecond.
+"""
+
+import csv
+import math
+import os
+import threading
+
+from fitsync.library import FITNESS_LEVELS
+from fitsync.views import DAYS
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "exercises.csv")
+
+MAX_SETS_PER_EXERCISE = 4
+# Weekly sets per muscle group for muscle gain, by fitness level (FITNESS_LEVELS order)
+WEEKLY_SETS = {
+    "chest": (6, 10, 14),
+    "back": (6, 10, 14),
+    "shoulders": (4, 8, 12),
+    "quads": (6, 10, 12),
+    "hamstrings": (4, 8, 10),
+    "glutes": (3, 6, 8),
+    "biceps": (3, 6, 8),
+    "triceps": (3, 6, 8),
+    "calves": (3, 4, 6),
+    "core": (3, 6, 8),
+}
+# Share of the muscle gain volume trained for the other goals
+GOAL_VOLUME = {"Lose Weight": 0.8, "Maintain": 0.7, "Gain Muscle": 1.0}
+# Weekly conditioning sets, by goal and fitness level
+CONDITIONING_SETS = {"Lose Weight": (6, 8, 8)}
+# From this age the weekly volume is reduced by AGE_VOLUME
+MATURE_AGE = 55
+AGE_VOLUME = 0.85
+
+# Focus and muscle groups of each kind of split day, biggest muscles first
+SPLIT_DAYS = {
+    "full": ("Full Body", ("quads", "chest", "back", "hamstrings", "shoulders", "glutes", "biceps", "triceps", "calves", "core")),
+    "upper": ("Upper Body (Chest, Back, Shoulders, Arms)", ("chest", "back", "shoulders", "biceps", "triceps")),
+    "lower": ("Lower Body & Core", ("quads", "hamstrings", "glutes", "calves", "core", "conditioning")),
+    "push": ("Push (Chest, Shoulders, Triceps)", ("chest", "shoulders", "triceps")),
+    "pull": ("Pull (Back, Biceps, Core)", ("back", "biceps", "core")),
+    "legs": ("Legs & Glutes", ("quads", "hamstrings", "glutes", "calves", "core", "conditioning")),
+    "conditioning": ("Full Body Conditioning", ("conditioning", "core")),
+}
+# Split day of every day of the week (DAYS order), None for rest, by fitness level
+SPLITS = {
+    "Beginner": ("full", None, "full", None, "full", None, None),
+    "Intermediate": ("upper", "lower", None, "upper", "lower", None, None),
+    "Advanced": ("push", "pull", "legs", "push", "pull", "legs", None),
+}
+# Extra split day for a goal, on the day it replaces when that is a rest day
+GOAL_DAYS = {"Lose Weight": ("Saturday", "conditioning")}
+
+# (reps, rest seconds, tempo) by goal and kind of exercise
+PRESCRIPTIONS = {
+    "Lose Weight": {
+        "compound": ("10-12", 60, "2-0-1-0"),
+        "isolation": ("12-15", 45, "2-0-1-0"),
+        "conditioning": ("40 s work / 20 s rest", 30, "1-0-1-0"),
+    },
+    "Maintain": {
+        "compound": ("8-10", 90, "2-0-2-0"),
+        "isolation": ("12-15", 60, "2-0-2-0"),
+        "conditioning": ("30 s work / 30 s rest", 45, "1-0-1-0"),
+    },
+    "Gain Muscle": {
+        "compound": ("6-10", 120, "3-0-1-0"),
+        "isolation": ("10-12", 60, "2-1-2-0"),
+        "conditioning": ("30 s work / 30 s rest", 60, "1-0-1-0"),
+    },
+}
+# Seconds under tension per set, and minutes of warm-up plus cool-down, for the duration estimate
+SET_SECONDS = 45
+WARM_UP_MINUTES = 10
+# Intensity of a training day by fitness level; one more on days of HEAVY_DAY_SETS or more
+INTENSITY = {"Beginner": 6, "Intermediate": 7, "Advanced": 8}
+HEAVY_DAY_SETS = 20
+
+WARM_UP = "5 min easy cardio + dynamic stretching, then 1-2 light ramp-up sets of the first exercise"
+COOL_DOWN = "5 min light stretching of the muscles trained"
+REST_DAY = {
+    "focus": "Rest & Recovery",
+    "warm_up": "None",
+    "cool_down": "Optional 20-30 min walk and light mobility work",
+}
+PROGRESSION_TIPS = {
+    "Lose Weight": [
+        "Keep the weights you lift while in a calorie deficit; add reps before adding load",
+        "Shorten the conditioning rest intervals by 5 seconds every two weeks",
+        "Track your workouts in a journal",
+    ],
+    "Maintain": [
+        "Add a rep or 2.5% load when every set reaches the top of the rep range",
+        "Rotate a few exercises every 6-8 weeks to keep training fresh",
+        "Track your workouts in a journal",
+    ],
+    "Gain Muscle": [
+        "Add 2.5-5% load when you complete every set at the top of the rep range",
+        "Add one set per muscle group every 2-3 weeks, then deload for a week",
+        "Track your workouts in a journal",
+    ],
+}
+RECOVERY_TIPS = [
+    "Get 7-9 hours of sleep",
+    "Eat enough protein on rest days too",
+    "Take a lighter week every 4-6 weeks",
+]
+
+
+class ExerciseLibrary:
+    """The bundled exercises, indexed by muscle group."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_muscle = {}
+        for row in rows:
+            self.by_muscle.setdefault(row["muscle"], []).append(row)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, encoding="utf-8", newline="") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def candidates(self, muscle, fitness_level, equipment=None):
+        """
+        Exercises for a muscle group at or below a fitness level, those
+        closest to the level first. equipment, if given, is the collection
+        of equipment available.
+        """
+        level = FITNESS_LEVELS.index(fitness_level)
+        rows = [
+            row for row in self.by_muscle.get(muscle, [])
+            if FITNESS_LEVELS.index(row["level"]) <= level
+            and (equipment is None or row["equipment"] in equipment)
+        ]
+        return sorted(rows, key=lambda row: level - FITNESS_LEVELS.index(row["level"]))
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_exercise_library():
+    """Return the process-wide ExerciseLibrary, loaded on first use."""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = ExerciseLibrary.load()
+        return _library
+
+
+def split_days(goal, fitness_level):
+    """Split day of every day of the week (DAYS order), None for rest."""
+    days = list(SPLITS[fitness_level])
+    if goal in GOAL_DAYS:
+        day, split_day = GOAL_DAYS[goal]
+        if days[DAYS.index(day)] is None:
+            days[DAYS.index(day)] = split_day
+    return days
+
+
+def volume_targets(goal, fitness_level, age):
+    """Weekly sets per muscle group (conditioning included) for a profile."""
+    level = FITNESS_LEVELS.index(fitness_level)
+    factor = GOAL_VOLUME[goal] * (AGE_VOLUME if age >= MATURE_AGE else 1.0)
+    targets = {muscle: max(round(sets[level] * factor), 1) for muscle, sets in WEEKLY_SETS.items()}
+    targets["conditioning"] = CONDITIONING_SETS.get(goal, (0, 0, 0))[level]
+    return targets
+
+
+def _even_split(total, parts):
+    """total as parts whole numbers that differ by at most one, larger first."""
+    return [total // parts + (index < total % parts) for index in range(parts)]
+
+
+def _session_sets(weekly_sets, sessions, offset):
+    """
+    Sets of a muscle on each of its sessions of the week. Muscles with
+    fewer than 2 sets per session are trained on fewer sessions, spread
+    out and shifted by offset so small muscles do not pile up on one day.
+    """
+    used = min(sessions, max(weekly_sets // 2, 1))
+    sets = [0] * sessions
+    for index, value in enumerate(_even_split(weekly_sets, used)):
+        sets[(index * sessions // used + offset) % sessions] = value
+    return sets
+
+
+def _exercise(row, sets, goal):
+    reps, rest_seconds, tempo = PRESCRIPTIONS[goal][row["kind"] if row["kind"] in PRESCRIPTIONS[goal] else "isolation"]
+    return {
+        "exercise_name": row["exercise"],
+        "sets": sets,
+        "reps": row["reps"] or reps,
+        "rest_seconds": rest_seconds,
+        "tempo": tempo,
+        "notes": row["notes"],
+    }
+
+
+def _training_day(day, split_day, exercises, goal, fitness_level):
+    total_sets = sum(exercise["sets"] for exercise in exercises)
+    seconds = sum(exercise["sets"] * (SET_SECONDS + exercise["rest_seconds"]) for exercise in exercises)
+    return {
+        "day": day,
+        "focus": SPLIT_DAYS[split_day][0],
+        "warm_up": WARM_UP,
+        "exercises": exercises,
+        "cool_down": COOL_DOWN,
+        "total_sets": total_sets,
+        "estimated_duration_minutes": 5 * math.ceil((WARM_UP_MINUTES + seconds / 60) / 5),
+        "intensity_score": INTENSITY[fitness_level] + (total_sets >= HEAVY_DAY_SETS),
+    }
+
+
+def build_workout_plan(goal, fitness_level="Intermediate", age=30, equipment=None):
+    """
+    Plan a week of training for a goal and fitness level. Returns the
+    detailed workout plan (weekly_plan, weekly_summary, progression_tips,
+    recovery_tips). equipment, if given, limits the exercises to the
+    equipment available. Raises ValueError if a muscle group with a set
+    target has no exercise left.
+    """
+    library = get_exercise_library()
+    days = split_days(goal, fitness_level)
+    targets = volume_targets(goal, fitness_level, age)
+
+    # Sets of every muscle on every day: the muscle's weekly target over the days that train it
+    day_sets = [{} for _ in DAYS]
+    for offset, (muscle, weekly_sets) in enumerate(targets.items()):
+        sessions = [index for index, split_day in enumerate(days) if split_day and muscle in SPLIT_DAYS[split_day][1]]
+        if not weekly_sets or not sessions:
+            continue
+        for index, sets in zip(sessions, _session_sets(weekly_sets, len(sessions), offset)):
+            if sets:
+                day_sets[index][muscle] = sets
+
+    # Fill the sets with exercises: a compound first on each day, then isolation work,
+    # each list rotated through over the week
+    cursors = {}
+    weekly_plan = []
+    for index, (day, split_day) in enumerate(zip(DAYS, days)):
+        if split_day is None:
+            weekly_plan.append({
+                "day": day,
+                **REST_DAY,
+                "exercises": [],
+                "total_sets": 0,
+                "estimated_duration_minutes": 0,
+                "intensity_score": 1,
+            })
+            continue
+        exercises = []
+        for muscle in SPLIT_DAYS[split_day][1]:
+            if muscle not in day_sets[index]:
+                continue
+            rows = library.candidates(muscle, fitness_level, equipment)
+            if not rows:
+                raise ValueError(f"No {muscle} exercise left for {fitness_level} with the available equipment")
+            compound = [row for row in rows if row["kind"] != "isolation"]
+            isolation = [row for row in rows if row["kind"] == "isolation"]
+            sets = day_sets[index][muscle]
+            picked = {}
+            for number, block in enumerate(_even_split(sets, math.ceil(sets / MAX_SETS_PER_EXERCISE))):
+                pool = (compound if number == 0 else isolation) or rows
+                key = (muscle, number > 0)
+                cursor = cursors.get(key, 0)
+                # The next exercise of the pool not already used for this muscle today
+                for step in range(len(pool)):
+                    row = pool[(cursor + step) % len(pool)]
+                    if row["exercise"] not in picked:
+                        break
+                cursors[key] = cursor + step + 1
+                if row["exercise"] in picked:
+                    # Too few exercises with this equipment: more sets of the same one
+                    picked[row["exercise"]]["sets"] += block
+                    continue
+                picked[row["exercise"]] = _exercise(row, block, goal)
+                exercises.append(picked[row["exercise"]])
+        weekly_plan.append(_training_day(day, split_day, exercises, goal, fitness_level))
+
+    training_days = [day for day in weekly_plan if day["exercises"]]
+    return {
+        "weekly_plan": weekly_plan,
+        "weekly_summary": {
+            "total_training_days": len(training_days),
+            "rest_days": len(weekly_plan) - len(training_days),
+            "total_sets_per_week": sum(day["total_sets"] for day in weekly_plan),
+            "focus_areas": list(dict.fromkeys(day["focus"] for day in training_days)),
+        },
+        "progression_tips": list(PROGRESSION_TIPS[goal]),
+        "recovery_tips": list(RECOVERY_TIPS),
+    }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Run from anywhere without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
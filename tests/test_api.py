@@ -0,0 +1,72 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from fitsync.api import create_server
+from fitsync.llm import LLMResponse
+
+PROFILE = {"gender": "Male", "age": 30, "height_cm": 180, "weight_kg": 80, "goal": "Maintain"}
+
+
+@pytest.fixture
+def server():
+    server = create_server(backend=None, host="127.0.0.1", port=0, workers=1, queue_size=1, timeout=5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+
+
+def post(server, path, body, content_length=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    connection.putrequest("POST", path)
+    connection.putheader("Content-Length", str(len(body)) if content_length is None else content_length)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def test_targets(server):
+    status, payload = post(server, "/targets", json.dumps(PROFILE).encode())
+    assert status == 200
+    assert payload["daily_calories"] > 0
+
+
+@pytest.mark.parametrize("content_length", ["-1", "abc", "1e3", str(2 * 1024 * 1024)])
+def test_bad_content_length_is_rejected(server, content_length):
+    status, payload = post(server, "/targets", b"{}", content_length)
+    assert status == 400
+    assert "error" in payload
+
+
+class ChatBackend:
+    """Answers every chat turn with reply, or fails with error."""
+
+    def __init__(self, reply=None, error=None):
+        self.reply = reply
+        self.error = error
+
+    async def acache_context(self, model, system_prompt, ttl):
+        raise NotImplementedError
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        if self.error:
+            raise self.error
+        return LLMResponse(self.reply)
+
+
+@pytest.mark.parametrize("backend, status, key, value", [
+    (ChatBackend(reply="Error: that's a common form mistake"), 200, "reply", "Error: that's a common form mistake"),
+    (ChatBackend(error=RuntimeError("quota exceeded")), 502, "error", "quota exceeded"),
+])
+def test_chat_status_comes_from_the_agent(server, backend, status, key, value):
+    server.service.backend = backend
+    got, payload = post(server, "/chat", json.dumps({"message": "Any tips?"}).encode())
+    assert got == status
+    assert payload[key] == value
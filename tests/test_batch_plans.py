@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from batch_plans import completed_rows, row_options
+
+
+def test_resume_is_keyed_on_the_plan_options(tmp_path):
+    output = tmp_path / "plans.jsonl"
+    records = [
+        {"id": "emp-1", "line": 1, **row_options(["workout", "meal"], "full")},
+        {"id": "emp-2", "line": 2, **row_options(["meal"], "simple")},
+        # Written before the options were recorded: never matches, so it is regenerated
+        {"id": "emp-3", "line": 3},
+    ]
+    output.write_text("".join(json.dumps(record) + "\n" for record in records))
+    assert completed_rows(str(output)) == {
+        ("emp-1", ("meal", "workout"), "full"),
+        ("emp-2", ("meal",), "simple"),
+        ("emp-3", (), None),
+    }
+
+
+def test_partial_last_line_is_truncated(tmp_path):
+    output = tmp_path / "plans.jsonl"
+    complete = json.dumps({"id": "emp-1", "line": 1, **row_options(["meal"], "full")}) + "\n"
+    output.write_text(complete + '{"id": "emp-2", "li')
+    assert completed_rows(str(output)) == {("emp-1", ("meal",), "full")}
+    assert output.read_text() == complete
+
+
+@pytest.mark.parametrize("line", ["[]\n", '"x"\n', "3\n", "null\n"])
+def test_non_record_line_ends_the_checkpoint(tmp_path, line):
+    output = tmp_path / "plans.jsonl"
+    complete = json.dumps({"id": "emp-1", "line": 1, **row_options(["meal"], "full")}) + "\n"
+    output.write_text(complete + line)
+    assert completed_rows(str(output)) == {("emp-1", ("meal",), "full")}
+    assert output.read_text() == complete
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import fitsync.cache as cache_module
+from fitsync.cache import PlanCache, acached_generate_content, cached_generate_content, cached_generate_content_stream, make_key
+from fitsync.llm import LLMResponse
+from fitsync.schemas import PlanParseError, plan_validator
+
+# Validates only after repair: trailing commas inside the plan
+REPAIRABLE = '{"option_names": ["Berry Bowl", "Egg Plate",],}'
+
+
+class FakeBackend:
+    """Serves one fixed response text, counting the upstream calls."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate(self, model, contents, config=None, task=None):
+        self.calls += 1
+        return LLMResponse(self.text)
+
+    async def agenerate(self, model, contents, config=None, task=None):
+        return self.generate(model, contents, config, task)
+
+    def generate_stream(self, model, contents, config=None, task=None):
+        self.calls += 1
+        yield self.text[:10]
+        yield self.text[10:]
+
+
+@pytest.fixture
+def plan_cache(tmp_path, monkeypatch):
+    cache = PlanCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_bytes=10_000)
+    monkeypatch.delenv("FITSYNC_CACHE_DISABLED", raising=False)
+    monkeypatch.setattr(cache_module, "_cache", cache)
+    return cache
+
+
+def test_get_set_and_counters(plan_cache):
+    assert plan_cache.get("key") is None
+    plan_cache.set("key", "value")
+    assert plan_cache.get("key") == "value"
+    stats = plan_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = PlanCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0.01)
+    cache.set("key", "value")
+    time.sleep(0.02)
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PlanCache(str(tmp_path / "cache.sqlite3"), max_bytes=10)
+    cache.set("old", "12345")
+    time.sleep(0.01)
+    cache.set("new", "67890")
+    time.sleep(0.01)
+    cache.get("old")
+    time.sleep(0.01)
+    cache.set("newest", "abcde")
+    assert cache.get("new") is None
+    assert cache.get("old") == "12345"
+
+
+def test_read_does_not_wait_for_a_writer(plan_cache):
+    plan_cache.set("key", "value")
+    writer = sqlite3.connect(plan_cache.path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.perf_counter()
+        assert plan_cache.get("key") == "value"
+        assert plan_cache.get("other") is None
+        assert time.perf_counter() - start < 2 * cache_module.BOOKKEEPING_TIMEOUT + 1
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+    # The bookkeeping was skipped while locked and works again afterwards
+    assert plan_cache.get("key") == "value"
+    assert plan_cache.stats()["hits"] == 1
+
+
+def test_database_errors_are_misses(plan_cache):
+    plan_cache.set("key", "value")
+    other = sqlite3.connect(plan_cache.path, isolation_level=None)
+    other.execute("DROP TABLE entries")
+    other.close()
+    assert plan_cache.get("key") is None
+
+
+def test_make_key_depends_on_every_part():
+    key = make_key("model", "prompt", {"a": 1})
+    assert key == make_key("model", "prompt", {"a": 1})
+    assert key != make_key("other", "prompt", {"a": 1})
+    assert key != make_key("model", "prompt", {"a": 2})
+
+
+def test_repaired_response_is_cached_as_valid_json(plan_cache):
+    backend = FakeBackend(REPAIRABLE)
+    first = cached_generate_content(backend, "model", "prompt", validate=plan_validator("meal_option_names"))
+    second = cached_generate_content(backend, "model", "prompt", validate=plan_validator("meal_option_names"))
+    assert backend.calls == 1
+    assert first == second
+    assert json.loads(second) == {"option_names": ["Berry Bowl", "Egg Plate"]}
+
+
+def test_repaired_stream_replays_as_valid_json(plan_cache):
+    backend = FakeBackend(REPAIRABLE)
+    validate = plan_validator("meal_option_names")
+    fresh = "".join(cached_generate_content_stream(backend, "model", "prompt", validate=validate))
+    assert fresh == REPAIRABLE
+    replayed = "".join(cached_generate_content_stream(backend, "model", "prompt", validate=validate))
+    assert backend.calls == 1
+    assert json.loads(replayed) == {"option_names": ["Berry Bowl", "Egg Plate"]}
+
+
+def test_invalid_response_is_not_cached(plan_cache):
+    backend = FakeBackend('{"option_names": "not a list"}')
+    for _ in range(2):
+        with pytest.raises(PlanParseError):
+            cached_generate_content(backend, "model", "prompt", validate=plan_validator("meal_option_names"))
+    assert backend.calls == 2
+    assert plan_cache.stats()["entries"] == 0
+
+
+
+def test_async_lookups_run_off_the_event_loop(plan_cache, monkeypatch):
+    threads = []
+    for name in ("get", "set"):
+        original = getattr(plan_cache, name)
+
+        def recorded(*args, original=original, name=name):
+            threads.append((name, threading.get_ident()))
+            return original(*args)
+
+        monkeypatch.setattr(plan_cache, name, recorded)
+
+    async def twice():
+        backend = FakeBackend('{"option_names": ["Berry Bowl"]}')
+        for _ in range(2):
+            text = await acached_generate_content(backend, "model", "prompt")
+        return threading.get_ident(), backend.calls, text
+
+    loop_thread, calls, text = asyncio.run(twice())
+    assert calls == 1
+    assert json.loads(text) == {"option_names": ["Berry Bowl"]}
+    assert [name for name, _ in threads] == ["get", "set", "get"]
+    assert all(thread != loop_thread for _, thread in threads)
@@ -0,0 +1,61 @@
+import json
+
+from fitsync.jsonstream import JSONArrayStreamer, consume_plan_stream, map_plan_stream
+
+PLAN = {
+    "weekly_plan": [{"day": "Monday", "exercises": [{"sets": 3}]}, {"day": "Tuesday", "exercises": []}],
+    "weekly_summary": {"total_training_days": 1},
+}
+
+
+def feed_in_chunks(parser, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+def test_elements_of_the_target_array_only():
+    text = json.dumps(PLAN)
+    for size in (1, 7, len(text)):
+        parser = JSONArrayStreamer("weekly_plan")
+        assert feed_in_chunks(parser, text, size) == PLAN["weekly_plan"]
+        assert parser.streamed == 2
+
+
+def test_braces_inside_strings_are_ignored():
+    text = '{"meals": [{"meal_time": "Lunch {big] }", "options": []}]}'
+    assert JSONArrayStreamer("meals").feed(text) == [{"meal_time": "Lunch {big] }", "options": []}]
+
+
+def test_repairable_element_is_repaired():
+    text = '{"meals": [{"meal_time": "Breakfast", "options": [],}, {"meal_time": "Lunch"}]}'
+    parser = JSONArrayStreamer("meals")
+    assert parser.feed(text) == [{"meal_time": "Breakfast", "options": []}, {"meal_time": "Lunch"}]
+    assert parser.streamed == 2
+
+
+def test_elements_after_an_unparseable_one_are_held_back():
+    text = '{"meals": [{"meal_time": "Breakfast"}, {"meal_time": Lunch}, {"meal_time": "Dinner"}]}'
+    parser = JSONArrayStreamer("meals")
+    # Dinner is not handed out ahead of Lunch; the caller sends both from the final plan
+    assert feed_in_chunks(parser, text, 5) == [{"meal_time": "Breakfast"}]
+    assert parser.streamed == 1
+
+
+def test_unbalanced_closer_does_not_raise():
+    parser = JSONArrayStreamer("meals")
+    assert parser.feed('}{"meals": [{"meal_time": "Lunch"}]}}') == [{"meal_time": "Lunch"}]
+
+
+def test_plan_stream_helpers():
+    def plan_stream():
+        yield 1
+        yield 2
+        return "plan", "raw"
+
+    seen = []
+    assert consume_plan_stream(plan_stream(), seen.append) == ("plan", "raw")
+    assert seen == [1, 2]
+    assert consume_plan_stream(map_plan_stream(plan_stream(), lambda item: item * 10), seen.append) == ("plan", "raw")
+    assert seen == [1, 2, 10, 20]
@@ -0,0 +1,74 @@
+import pytest
+
+from fitsync.foods import get_food_table
+from fitsync.mealsolver import excluded, parse_exclusions, solve_meals
+
+
+@pytest.mark.parametrize("preferences, tags", [
+    ("vegetarian", {"meat", "pork", "fish", "shellfish"}),
+    ("Vegan.", {"meat", "pork", "fish", "shellfish", "dairy", "egg"}),
+    ("no fish", {"fish"}),
+    ("gluten-free", {"gluten"}),
+    ("dairy and gluten free", {"dairy", "gluten"}),
+    ("nut allergy", {"nuts", "peanut"}),
+    ("allergic to peanuts", {"peanut"}),
+    ("I don't eat pork", {"pork"}),
+    ("lactose intolerant", {"dairy"}),
+    ("I love fish but no nuts", {"nuts", "peanut"}),
+])
+def test_negated_and_diet_phrasing_excludes(preferences, tags):
+    assert parse_exclusions(preferences)[0] == tags
+
+
+@pytest.mark.parametrize("preferences", [
+    "I love fish",
+    "non-vegetarian",
+    "not vegetarian",
+    "meat and eggs are fine",
+    "peanut butter every day",
+    "I eat meat, no preferences",
+    "",
+    None,
+])
+def test_positive_phrasing_excludes_nothing(preferences):
+    assert parse_exclusions(preferences)[0] == set()
+
+
+def test_items_excluded_by_name():
+    tags, words = parse_exclusions("no mushrooms but I love tuna, avoid white rice and bananas")
+    assert tags == set()
+    assert words == {"mushroom", "white rice", "banana"}
+
+
+def test_solved_meals_respect_exclusions():
+    table = get_food_table()
+    targets = {"daily_calories": 2200, "daily_protein_g": 150}
+    preferences = "vegetarian, nut allergy"
+    exclusions = parse_exclusions(preferences)
+    meals = solve_meals(targets, [("Breakfast", 0.3), ("Lunch", 0.4), ("Dinner", 0.3)], preferences)
+    index = {item: position for position, item in enumerate(table.items)}
+    for meal in meals:
+        assert meal["options"]
+        for option in meal["options"]:
+            for food in option["foods"]:
+                assert not excluded(table, index[food["item"]], exclusions)
+
+
+@pytest.mark.parametrize("preferences, tags", [
+    ("no dairy and no eggs", {"dairy", "egg"}),
+    ("avoid nuts and no pork", {"nuts", "peanut", "pork"}),
+])
+def test_second_negation_does_not_exclude_by_name(preferences, tags):
+    exclusions = parse_exclusions(preferences)
+    assert exclusions == (tags, set())
+    table = get_food_table()
+    for item in ("Quinoa", "Granola", "White rice"):
+        assert not excluded(table, table.items.index(item), exclusions)
+
+
+def test_names_match_whole_words():
+    table = get_food_table()
+    exclusions = parse_exclusions("no mushrooms, no rice")
+    assert excluded(table, table.items.index("Mushrooms"), exclusions)
+    assert excluded(table, table.items.index("Brown rice"), exclusions)
+    assert not excluded(table, table.items.index("Nonfat Greek yogurt"), exclusions)
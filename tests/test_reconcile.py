@@ -0,0 +1,69 @@
+import copy
+
+from fitsync.reconcile import DRIFT_TOLERANCE, reconcile_meal_plan
+from fitsync.views import reconciliation_note
+
+PLAN = {
+    "meals": [{
+        "meal_time": "Lunch",
+        "options": [{
+            "option_name": "Chicken and rice",
+            "foods": [
+                {"item": "Grilled chicken breast", "quantity": "150g"},
+                {"item": "Brown rice", "quantity": "1 cup cooked"},
+            ],
+            "calories": 900, "protein_g": 20, "carbs_g": 80, "fats_g": 40,
+        }],
+    }],
+    "daily_totals": {"total_calories": 900, "total_protein_g": 20, "total_carbs_g": 80, "total_fats_g": 40},
+}
+
+
+def test_options_are_recomputed_from_their_foods():
+    meal_data = reconcile_meal_plan(copy.deepcopy(PLAN))
+    option = meal_data["meals"][0]["options"][0]
+    assert option["protein_g"] > 40
+    assert option["calories"] < 900
+    assert meal_data["reconciliation"]["unknown_foods"] == []
+
+
+def test_note_quotes_stated_totals_only():
+    stated = reconciliation_note(reconcile_meal_plan(copy.deepcopy(PLAN)))
+    assert "the model stated 900 kcal / 20g protein" in stated
+    # Fan-out plans: the daily totals were summed locally, not stated by the model
+    computed = reconcile_meal_plan(copy.deepcopy(PLAN), stated_totals=False)
+    assert computed["reconciliation"]["model_totals"] is None
+    assert reconciliation_note(computed) is None
+
+
+def daily(meal_data):
+    return {name: sum(option[name] for meal in meal_data["meals"] for option in meal["options"])
+            for name in ("calories", "protein_g")}
+
+
+def test_plan_off_target_is_scaled_to_within_tolerance():
+    meal_data = copy.deepcopy(PLAN)
+    meal_data["meals"][0]["options"][0]["foods"].append({"item": "Grandma's secret sauce", "quantity": "2 tbsp"})
+    before = daily(reconcile_meal_plan(copy.deepcopy(meal_data)))
+    targets = {"daily_calories": round(before["calories"] * 1.3), "daily_protein_g": round(before["protein_g"] * 1.25)}
+
+    reconcile_meal_plan(meal_data, targets)
+    report = meal_data["reconciliation"]
+    assert report["scale"]["protein_foods"] > 1 and report["scale"]["other_foods"] > 1
+    after = daily(meal_data)
+    assert abs(after["calories"] / targets["daily_calories"] - 1) <= DRIFT_TOLERANCE
+    assert abs(after["protein_g"] / targets["daily_protein_g"] - 1) <= DRIFT_TOLERANCE
+
+    foods = {food["item"]: food["quantity"] for food in meal_data["meals"][0]["options"][0]["foods"]}
+    assert foods["Grilled chicken breast"] != "150g"
+    # Unknown foods are reported and keep their quantity
+    assert report["unknown_foods"] == ["Grandma's secret sauce"]
+    assert foods["Grandma's secret sauce"] == "2 tbsp"
+
+
+def test_plan_on_target_is_not_scaled():
+    before = daily(reconcile_meal_plan(copy.deepcopy(PLAN)))
+    targets = {"daily_calories": before["calories"], "daily_protein_g": before["protein_g"]}
+    meal_data = reconcile_meal_plan(copy.deepcopy(PLAN), targets)
+    assert meal_data["reconciliation"]["scale"] is None
+    assert meal_data["meals"][0]["options"][0]["foods"][0]["quantity"] == "150g"
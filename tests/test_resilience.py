@@ -0,0 +1,62 @@
+import asyncio
+
+from fitsync.resilience import ResilientBackend
+
+
+class StreamBackend:
+    """
+    Streams two chunks per call, reporting usage at the end and counting
+    closed streams. No call starts streaming before copies calls are made.
+    """
+
+    def __init__(self, copies=1):
+        self.copies = copies
+        self.calls = 0
+        self.closed = 0
+        self.started = asyncio.Event()
+
+    async def agenerate_stream(self, model, contents, config=None, task=None, on_usage=None):
+        self.calls += 1
+        if self.calls == self.copies:
+            self.started.set()
+        try:
+            await self.started.wait()
+            yield "Hello, "
+            yield "world"
+            if on_usage is not None:
+                on_usage({"response_token_count": 2})
+        finally:
+            self.closed += 1
+
+
+def test_stream_passes_usage_through():
+    inner = StreamBackend()
+    backend = ResilientBackend(inner)
+    usage = []
+
+    async def consume():
+        return [chunk async for chunk in backend.agenerate_stream("model", "prompt", on_usage=usage.append)]
+
+    assert asyncio.run(consume()) == ["Hello, ", "world"]
+    assert usage == [{"response_token_count": 2}]
+    assert inner.closed == 1
+
+
+def test_losing_hedge_stream_is_closed():
+    inner = StreamBackend(copies=2)
+    # Hedge at once: both copies get their first chunk in the same loop iteration
+    backend = ResilientBackend(inner, hedge=True, hedge_delay=0)
+
+    async def first_chunk():
+        chunks = backend.agenerate_stream("model", "prompt")
+        first = await chunks.__anext__()
+        closed = inner.closed
+        await chunks.aclose()
+        return first, closed
+
+    first, closed_at_first_chunk = asyncio.run(first_chunk())
+    assert first == "Hello, "
+    assert inner.calls == 2
+    assert backend.stats()["hedges"] == 1
+    assert closed_at_first_chunk == 1
+    assert inner.closed == 2
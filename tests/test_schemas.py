@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from fitsync.schemas import PlanParseError, parse_plan, parse_stats, plan_validator, repair_json
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2,],}', {"a": [1, 2]}),
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Here is the plan: {"a": 1} Enjoy!', {"a": 1}),
+    # Truncated mid-string and mid-key
+    ('{"a": ["x", "y', {"a": ["x", "y"]}),
+    ('{"a": 1, "b', {"a": 1}),
+    ('{"a": {"b": "c\\', {"a": {"b": "c"}}),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_parse_plan_reports_repairs():
+    assert parse_plan("meal_option_names", '{"option_names": ["Berry Bowl"]}') == ({"option_names": ["Berry Bowl"]}, False)
+    assert parse_plan("meal_option_names", '{"option_names": ["Berry Bowl",]}') == ({"option_names": ["Berry Bowl"]}, True)
+
+
+@pytest.mark.parametrize("text, problem", [
+    ('{"option_names": "Berry Bowl"}', "schema errors"),
+    ("not json at all", "invalid JSON"),
+])
+def test_parse_plan_raises_when_repair_does_not_help(text, problem):
+    with pytest.raises(PlanParseError, match=problem):
+        parse_plan("meal_option_names", text)
+
+
+def test_plan_validator_counts_and_returns_cacheable_text():
+    validate = plan_validator("meal_option_names")
+    before = parse_stats()
+    valid = '{"option_names": ["Berry Bowl"]}'
+    assert validate(valid) == valid
+    assert json.loads(validate('{"option_names": ["Berry Bowl",],}')) == {"option_names": ["Berry Bowl"]}
+    with pytest.raises(PlanParseError):
+        validate('{"option_names": 3}')
+    after = parse_stats()
+    assert [after[name] - before[name] for name in ("parsed", "repaired", "failed")] == [1, 1, 1]
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+
+import pytest
+
+from fitsync.singleflight import FlightCancelled, SingleFlight
+
+
+def test_do_shares_one_call():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("key", fn)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flights.do("key", fn)))
+    follower.start()
+    while flights.stats()["coalesced"] == 0:
+        pass
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert results == ["result", "result"]
+    assert len(calls) == 1
+    assert flights.in_flight() == 0
+
+
+def test_do_async_shares_errors():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        return await asyncio.gather(flights.do_async("key", fail), flights.do_async("key", fail), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.in_flight() == 0
+
+
+def test_cancelled_leader_lands_its_flight():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def fast():
+        return "fresh"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0.01)
+        assert flights.in_flight() == 0
+        assert cancelled == [1]
+        # The next identical call starts a new flight instead of hanging
+        return await asyncio.wait_for(flights.do_async("key", fast), 1)
+
+    assert asyncio.run(main()) == "fresh"
+
+
+def test_cancelled_leader_keeps_the_call_for_followers():
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "shared"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("key", slow))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flights.do_async("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        result = await asyncio.wait_for(follower, 1)
+        assert flights.in_flight() == 0
+        return result
+
+    assert asyncio.run(main()) == "shared"
+
+
+def test_interrupted_sync_leader_lands_its_flight():
+    flights = SingleFlight()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        flights.do("key", interrupted)
+    assert flights.in_flight() == 0
+    assert flights.do("key", lambda: "fresh") == "fresh"
+
+
+def test_stream_followers_replay_chunks():
+    flights = SingleFlight()
+
+    def chunks():
+        yield from ("a", "b", "c")
+
+    assert list(flights.stream("key", chunks)) == ["a", "b", "c"]
+    assert flights.in_flight() == 0
@@ -0,0 +1,35 @@
+import itertools
+from collections import Counter
+
+import pytest
+
+from fitsync.library import FITNESS_LEVELS, GOALS
+from fitsync.workoutgen import build_workout_plan, get_exercise_library, split_days, volume_targets
+
+
+@pytest.mark.parametrize("goal, level, age", list(itertools.product(GOALS, FITNESS_LEVELS, (25, 60))))
+def test_plan_hits_weekly_set_targets_and_day_count(goal, level, age):
+    plan = build_workout_plan(goal, level, age)
+    muscle_of = {row["exercise"]: row["muscle"] for row in get_exercise_library().rows}
+    sets = Counter()
+    for day in plan["weekly_plan"]:
+        for exercise in day["exercises"]:
+            sets[muscle_of[exercise["exercise_name"]]] += exercise["sets"]
+        assert day["total_sets"] == sum(exercise["sets"] for exercise in day["exercises"])
+    targets = {muscle: count for muscle, count in volume_targets(goal, level, age).items() if count}
+    assert dict(sets) == targets
+
+    training_days = sum(split_day is not None for split_day in split_days(goal, level))
+    assert len(plan["weekly_plan"]) == 7
+    assert plan["weekly_summary"]["total_training_days"] == training_days
+    assert plan["weekly_summary"]["rest_days"] == 7 - training_days
+    assert plan["weekly_summary"]["total_sets_per_week"] == sum(targets.values())
+
+
+def test_equipment_limits_the_exercises():
+    library = get_exercise_library()
+    equipment_of = {row["exercise"]: row["equipment"] for row in library.rows}
+    plan = build_workout_plan("Gain Muscle", "Intermediate", equipment=("bodyweight",))
+    names = [exercise["exercise_name"] for day in plan["weekly_plan"] for exercise in day["exercises"]]
+    assert names
+    assert {equipment_of[name] for name in names} == {"bodyweight"}